@@ -35,4 +35,100 @@ RESOURCE_PATH: typing.Final[Path] = Path(
 MODEL_CATALOG_PATH: typing.Final[Path] = Path(
     os.environ.get("NARRATOR_MODEL_CATALOG_PATH", RESOURCE_PATH / "model_catalog.json")
 )
-DATETIME_FORMAT: typing.Final[str] = os.environ.get("NARRATOR_DATETIME_FORMAT", "%Y-%m-%d %H:%M%z")
\ No newline at end of file
+DATETIME_FORMAT: typing.Final[str] = os.environ.get("NARRATOR_DATETIME_FORMAT", "%Y-%m-%d %H:%M%z")
+
+MODEL_CACHE_MAX_MODELS: typing.Final[int] = int(os.environ.get("NARRATOR_MODEL_CACHE_MAX_MODELS", 0))
+"""The most models that may be resident at once. 0 means that there is no limit"""
+
+MODEL_CACHE_MEMORY_BUDGET: typing.Final[int] = int(os.environ.get("NARRATOR_MODEL_CACHE_MEMORY_BUDGET", 0))
+"""The most bytes that resident models may occupy at once. 0 means that there is no limit"""
+
+PINNED_MODELS: typing.Final[typing.Sequence[str]] = tuple(
+    model_name.strip()
+    for model_name in os.environ.get("NARRATOR_PINNED_MODELS", "").split(",")
+    if model_name.strip()
+)
+"""Names of models that should never be evicted from the model cache"""
+
+MODEL_LOAD_TIMEOUT: typing.Final[float] = float(os.environ.get("NARRATOR_MODEL_LOAD_TIMEOUT", 300))
+"""The most seconds a request will wait on a model that another request is loading. 0 means wait forever"""
+
+MODEL_INDEX_REFRESH_INTERVAL: typing.Final[float] = float(os.environ.get("NARRATOR_MODEL_INDEX_REFRESH_INTERVAL", 2))
+"""The most often, in seconds, that the TTS data directory is checked for newly downloaded or removed models"""
+
+CATALOG_PROCESS_COUNT: typing.Final[int] = int(os.environ.get("NARRATOR_CATALOG_PROCESSES", 0))
+"""The number of processes that describe models while generating the model catalog. 0 uses one per CPU core"""
+
+STARTUP_TIME_BUDGET: typing.Final[float] = float(os.environ.get("NARRATOR_STARTUP_TIME_BUDGET", 1.0))
+"""The most seconds that importing the server should take, before any model is loaded"""
+
+SYNTHESIS_WORKER_COUNT: typing.Final[int] = int(os.environ.get("NARRATOR_SYNTHESIS_WORKERS", 1))
+"""The number of threads that may generate speech at the same time"""
+
+SYNTHESIS_PROCESS_COUNT: typing.Final[int] = int(os.environ.get("NARRATOR_SYNTHESIS_PROCESSES", 0))
+"""The number of worker processes that generate speech, each with its own models. 0 generates speech in the server"""
+
+TORCH_THREADS_PER_WORKER: typing.Final[int] = int(os.environ.get("NARRATOR_TORCH_THREADS", 0))
+"""The number of threads torch may use in each synthesis process. 0 divides the CPU cores between the processes"""
+
+REMOTE_WORKER_ADDRESSES: typing.Final[typing.Sequence[str]] = tuple(
+    address.strip()
+    for address in os.environ.get("NARRATOR_REMOTE_WORKERS", "").split(",")
+    if address.strip()
+)
+"""Addresses of remote synthesis workers, like 'tcp://host:port' or 'unix:///path'. Speech is generated locally if empty"""
+
+WORKER_ADDRESS: typing.Final[str] = os.environ.get("NARRATOR_WORKER_ADDRESS", "tcp://127.0.0.1:9700")
+"""Where a standalone synthesis worker listens for requests"""
+
+WORKER_HEALTH_INTERVAL: typing.Final[float] = float(os.environ.get("NARRATOR_WORKER_HEALTH_INTERVAL", 5))
+"""Seconds between checks on whether each remote synthesis worker is responding"""
+
+WORKER_REQUEST_TIMEOUT: typing.Final[float] = float(os.environ.get("NARRATOR_WORKER_REQUEST_TIMEOUT", 300))
+"""The most seconds to wait on a remote synthesis worker before trying another"""
+
+CACHE_DIRECTORY: typing.Final[Path] = Path(
+    os.environ.get("NARRATOR_CACHE_DIRECTORY")
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / SAFE_APPLICATION_NAME
+).absolute()
+"""Where generated files that may be thrown away are kept. Follows XDG_CACHE_HOME, like ~/.cache/easy_narrator"""
+
+PHRASE_CACHE_PATH: typing.Final[Path] = Path(
+    os.environ.get("NARRATOR_PHRASE_CACHE_PATH", CACHE_DIRECTORY / "phrases")
+).absolute()
+"""Where generated phrase audio is kept so that it survives restarts"""
+
+PHRASE_CACHE_MEMORY_LIMIT: typing.Final[int] = int(os.environ.get("NARRATOR_PHRASE_CACHE_MEMORY_LIMIT", 64 * 1024 * 1024))
+"""The most bytes of phrase audio to keep in memory. 0 disables the in-memory tier"""
+
+PHRASE_CACHE_DISK_LIMIT: typing.Final[int] = int(os.environ.get("NARRATOR_PHRASE_CACHE_DISK_LIMIT", 1024 * 1024 * 1024))
+"""The most bytes of phrase audio to keep on disk. 0 disables the on-disk tier"""
+
+MAX_INFERENCES_PER_MODEL: typing.Final[int] = int(os.environ.get("NARRATOR_MAX_INFERENCES_PER_MODEL", 1))
+"""The most phrases that a single model may be synthesizing at the same time"""
+
+INTERACTIVE_PHRASE_LIMIT: typing.Final[int] = int(os.environ.get("NARRATOR_INTERACTIVE_PHRASE_LIMIT", 20))
+"""Requests with more phrases than this are treated as bulk work and yield to shorter, interactive requests"""
+
+INTERACTIVE_WEIGHT: typing.Final[int] = int(os.environ.get("NARRATOR_INTERACTIVE_WEIGHT", 4))
+"""How many interactive phrases are scheduled for every bulk phrase when both are waiting"""
+
+LEXICON_PATH: typing.Final[Path] = Path(
+    os.environ.get("NARRATOR_LEXICON_PATH", RESOURCE_PATH / "lexicons")
+).absolute()
+"""Where pronunciation lexicons are kept. Lexicons are JSON files named after a language, model, or 'default'"""
+
+CHUNK_TARGET_LENGTH: typing.Final[int] = int(os.environ.get("NARRATOR_CHUNK_TARGET_LENGTH", 200))
+"""The number of characters each phrase is split or merged toward until enough has been measured to tune it per model"""
+
+CHUNK_MINIMUM_LENGTH: typing.Final[int] = int(os.environ.get("NARRATOR_CHUNK_MINIMUM_LENGTH", 40))
+"""Phrases shorter than this many characters are merged with the phrases that follow them"""
+
+CHUNK_MAXIMUM_LENGTH: typing.Final[int] = int(os.environ.get("NARRATOR_CHUNK_MAXIMUM_LENGTH", 400))
+"""No phrase given to a model will be longer than this many characters"""
+
+FIRST_CHUNK_LENGTH: typing.Final[int] = int(os.environ.get("NARRATOR_FIRST_CHUNK_LENGTH", 80))
+"""The number of characters the first phrase of a narration is cut down to so that audio starts quickly"""
+
+STATIC_ASSET_MAX_CACHED_SIZE: typing.Final[int] = int(os.environ.get("NARRATOR_STATIC_ASSET_MAX_CACHED_SIZE", 1024 * 1024))
+"""The largest static file, in bytes, that is kept in memory. Larger files are streamed from disk on each request"""
@@ -3,3 +3,6 @@ from .http import *
 from .models import get_models
 from .models import get_parameters_for_all_models
 from .models import get_model_parameters
+from .models import get_model_cache_statistics
+
+from .narration import get_narration_statistics
@@ -7,22 +7,35 @@ import pathlib
 
 from aiohttp import web
 
-from easy_narrator.application_details import STATIC_DIRECTORY
 from easy_narrator.messages.responses import ErrorResponse
 from easy_narrator.utilities.common import local_only
-from easy_narrator.utilities.common import get_html_response
 
-MARKUP_DIRECTORY = STATIC_DIRECTORY / "markup"
+from ..resources import MARKUP_DIRECTORY
+from ..resources import get_static_asset
+from ..resources import get_static_asset_response
 
 INDEX_PATH = MARKUP_DIRECTORY / "index.html"
 SAMPLE_GALLERY_PATH = MARKUP_DIRECTORY / "sample_gallery.html"
 
 
+async def get_page_response(request: web.Request, path: pathlib.Path) -> web.StreamResponse:
+    """
+    Answer a request for a page through the static asset cache so that it is compressed and revalidated like
+    every other static file
+    """
+    asset = await get_static_asset(path)
+
+    if asset is None:
+        return web.HTTPNotFound(text=f"No page was found at '{path.name}'")
+
+    return get_static_asset_response(request, asset)
+
+
 @local_only
-async def handle_index(request: web.Request) -> web.Response:
-    return get_html_response(INDEX_PATH)
+async def handle_index(request: web.Request) -> web.StreamResponse:
+    return await get_page_response(request, INDEX_PATH)
 
 
 @local_only
-async def view_sample_gallery(request: web.Request) -> web.Response:
-    return get_html_response(SAMPLE_GALLERY_PATH)
+async def view_sample_gallery(request: web.Request) -> web.StreamResponse:
+    return await get_page_response(request, SAMPLE_GALLERY_PATH)
@@ -3,6 +3,7 @@
 """
 from __future__ import annotations
 
+import asyncio
 import typing
 import json
 
@@ -32,31 +33,43 @@ async def get_model_parameters(request: web.Request) -> web.Response:
 
     if model_name is None:
         response = ErrorResponse(
-            message=f"A model name is required if a list of languages is requested",
+            error_message=f"A model name is required if a list of languages is requested",
             operation="get_langauges"
         )
         return web.json_response(
-            response.dict(),
+            response.model_dump(),
             status=400
         )
 
     if not ModelCache.is_available(model_name):
         response = ErrorResponse(
-            message=f"The {model_name} model is not available for use",
+            error_message=f"The {model_name} model is not available for use",
             operation="get_langauges"
         )
         return web.json_response(
-            response.dict(),
+            response.model_dump(),
             status=404
         )
 
-    model = ModelCache.get_model(model_name)
+    metadata = await asyncio.to_thread(ModelCache.get_model_metadata, model_name)
+
+    if metadata is None:
+        response = ErrorResponse(
+            error_message=f"The files describing the {model_name} model could not be read",
+            operation="get_langauges"
+        )
+        return web.json_response(
+            response.model_dump(),
+            status=500
+        )
 
     return web.json_response({
-        "languages": model.languages,
-        "has_languages": model.is_multi_lingual,
-        "speakers": model.speakers,
-        "has_speakers": model.is_multi_speaker
+        "languages": metadata.languages,
+        "has_languages": metadata.is_multi_lingual,
+        "speakers": metadata.speakers,
+        "has_speakers": metadata.is_multi_speaker,
+        "sample_rate": metadata.sample_rate,
+        "architecture": metadata.architecture
     })
 
 
@@ -72,4 +85,20 @@ async def get_parameters_for_all_models(request: web.Request) -> web.Response:
             for model in ModelCache.get_available_models()
         }
 
-    return web.json_response(model_to_parameters)
\ No newline at end of file
+    return web.json_response(model_to_parameters)
+
+
+@local_only
+async def get_model_cache_statistics(request: web.Request) -> web.Response:
+    from easy_narrator.utilities.model_cache import ModelCache
+    cache = ModelCache.get_instance()
+    return web.json_response({
+        "statistics": cache.statistics.dict(),
+        "resident_bytes": cache.resident_size,
+        "downloaded_models": len(cache.model_index),
+        "download_directory_scans": cache.model_index.scans,
+        "loaded_models": [
+            resident_model.dict(pinned=cache.is_pinned(resident_model.name))
+            for resident_model in cache.resident_models
+        ]
+    })
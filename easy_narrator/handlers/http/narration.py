@@ -0,0 +1,23 @@
+"""
+Views that describe the state of narration on the server
+"""
+from __future__ import annotations
+
+from aiohttp import web
+
+from easy_narrator.utilities.common import local_only
+
+
+@local_only
+async def get_narration_statistics(request: web.Request) -> web.Response:
+    from easy_narrator.narrate import PhraseAudioCache
+    from easy_narrator.narrate import PhraseDispatcher
+    from easy_narrator.narrate import SynthesisScheduler
+    from easy_narrator.narrate import SynthesisCostModel
+    return web.json_response({
+        "phrase_cache": PhraseAudioCache.get_instance().dict(),
+        "dispatch": PhraseDispatcher.get_instance().dict(),
+        "scheduling": SynthesisScheduler.get_instance().dict(),
+        "chunking": SynthesisCostModel.get_instance().dict(),
+        "synthesis": PhraseDispatcher.get_instance().executor.dict()
+    })
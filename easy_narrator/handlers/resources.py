@@ -3,6 +3,7 @@
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import typing
 import pathlib
@@ -10,12 +11,16 @@ from collections import defaultdict
 from dataclasses import dataclass
 from dataclasses import field
 
+from aiohttp import hdrs
 from aiohttp import web
 
 from ..application_details import MODEL_CATALOG_PATH
 from ..messages.responses import ErrorResponse
 from ..utilities.common import local_only
 from ..utilities import mimetypes
+from ..utilities.static_assets import StaticAsset
+from ..utilities.static_assets import StaticAssetCache
+from ..utilities.static_assets import is_compressible
 
 from easy_narrator.application_details import STATIC_DIRECTORY
 from easy_narrator.application_details import RESOURCE_PATH
@@ -27,6 +32,7 @@ _LOGGER = get_logger()
 SCRIPT_DIRECTORY = STATIC_DIRECTORY / "scripts"
 STYLE_DIRECTORY = STATIC_DIRECTORY / "style"
 IMAGE_DIRECTORY = STATIC_DIRECTORY / "images"
+MARKUP_DIRECTORY = STATIC_DIRECTORY / "markup"
 SAMPLE_ROOT_DIRECTORY = RESOURCE_PATH / "samples"
 FAVICON_PATH = IMAGE_DIRECTORY / "favicon.ico"
 
@@ -73,8 +79,76 @@ def get_resource_directory(resource_type: str) -> pathlib.Path:
     return RESOURCE_MAP[resource_type]
 
 
+async def get_static_asset(path: pathlib.Path) -> typing.Optional[StaticAsset]:
+    """
+    Get a static file from the cache, reading it from disk first if it is new or has changed
+
+    :param path: The file to get
+    :return: The file. None if it doesn't exist
+    """
+    cache = StaticAssetCache.get_instance()
+    asset, status = cache.get_current(path)
+
+    if asset is None and status is not None:
+        asset = await asyncio.to_thread(cache.load, path, status)
+
+    return asset
+
+
+def get_static_asset_response(request: web.Request, asset: StaticAsset) -> web.StreamResponse:
+    """
+    Answer a request for a static file
+
+    Clients that already have this version of the file are told so with a 304. Everyone else is sent the smallest
+    copy of the file that they accept. Files too large to be held in memory are sent straight from disk.
+
+    :param request: The request for the file
+    :param asset: The file that was asked for
+    :return: A response carrying the file or telling the client to use the copy it has
+    """
+    statistics = StaticAssetCache.get_instance().statistics
+
+    if not asset.in_memory:
+        # File responses check ETags and modification times themselves and use sendfile where they can
+        statistics.streamed += 1
+        headers = {hdrs.CONTENT_TYPE: asset.content_type} if asset.content_type else None
+        return web.FileResponse(asset.path, headers=headers)
+
+    headers = {
+        hdrs.ETAG: asset.etag,
+        hdrs.LAST_MODIFIED: asset.last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+        # Files aren't versioned by name, so browsers may keep them but must ask whether they changed before using them
+        hdrs.CACHE_CONTROL: "no-cache",
+    }
+
+    if asset.encodings:
+        headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+
+    # If-Modified-Since is only considered when there is no If-None-Match to go by
+    if hdrs.IF_NONE_MATCH in request.headers:
+        not_modified = asset.matches(request.headers[hdrs.IF_NONE_MATCH])
+    else:
+        not_modified = asset.is_unmodified_since(request.if_modified_since)
+
+    if not_modified:
+        statistics.not_modified += 1
+        return web.Response(status=304, headers=headers)
+
+    encoding, body = asset.select_encoding(request.headers.get(hdrs.ACCEPT_ENCODING))
+
+    if encoding:
+        headers[hdrs.CONTENT_ENCODING] = encoding
+
+    return web.Response(
+        body=body,
+        content_type=asset.content_type or "application/octet-stream",
+        charset="utf-8" if is_compressible(asset.content_type) else None,
+        headers=headers
+    )
+
+
 @local_only
-async def get_resource(request: web.Request) -> web.Response:
+async def get_resource(request: web.Request) -> web.StreamResponse:
     resource_type: str = request.match_info['resource_type']
 
     if resource_type not in RESOURCE_MAP:
@@ -83,20 +157,14 @@ async def get_resource(request: web.Request) -> web.Response:
     resource_name: str = request.match_info['name']
     resource_directory = get_resource_directory(resource_type)
     resource_path = resource_directory / resource_name
+    resolved_path = resource_path.resolve()
 
-    if resource_path.exists():
-        content_type = get_content_type(resource_type, resource_path)
+    # Anything read here stays in memory, so nothing outside of the resource's directory may be asked for
+    if resource_directory.resolve() in resolved_path.parents:
+        asset = await get_static_asset(resolved_path)
 
-        if content_type.startswith("image") or content_type.startswith("video"):
-            return web.Response(
-                body=resource_path.read_bytes(),
-                content_type=content_type
-            )
-        else:
-            return web.Response(
-                text=resource_path.read_text(),
-                content_type=content_type
-            )
+        if asset is not None:
+            return get_static_asset_response(request, asset)
 
     return web.HTTPNotFound(text=f"No resource was found at '{resource_path}'")
 
@@ -301,10 +369,13 @@ async def get_sample_list(request: web.Request) -> web.Response:
 
 
 @local_only
-async def get_favicon(request: web.Request) -> web.Response:
-    return web.Response(
-        body=FAVICON_PATH.read_bytes()
-    )
+async def get_favicon(request: web.Request) -> web.StreamResponse:
+    asset = await get_static_asset(FAVICON_PATH)
+
+    if asset is None:
+        return web.HTTPNotFound(text="No favicon is available")
+
+    return get_static_asset_response(request, asset)
 
 RESOURCE_ROUTES = [
     RouteInfo(path="/static/{resource_type}/{name:.*}", handler=get_resource, name="get_resource"),
@@ -314,6 +385,19 @@ RESOURCE_ROUTES = [
 ]
 
 
+def warm_static_assets():
+    cache = StaticAssetCache.get_instance()
+    loaded = sum(cache.warm(directory) for directory in {*RESOURCE_MAP.values(), MARKUP_DIRECTORY})
+    _LOGGER.info(f"Loaded {loaded} static files into memory: {cache.dict()}")
+
+
+async def start_warming_static_assets(application: web.Application):
+    # Files are read and compressed in the background so that the server may start taking requests right away
+    warming = asyncio.ensure_future(asyncio.to_thread(warm_static_assets))
+    yield
+    await warming
+
+
 def register_resource_handlers(application: web.Application):
     for route in RESOURCE_ROUTES:
         if not route.is_local_only():
@@ -322,4 +406,6 @@ def register_resource_handlers(application: web.Application):
                 f"Please decorate it with '@local_only'"
             )
 
-        route.register(application=application)
\ No newline at end of file
+        route.register(application=application)
+
+    application.cleanup_ctx.append(start_warming_static_assets)
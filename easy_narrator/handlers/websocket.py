@@ -3,8 +3,9 @@
 """
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import inspect
-import json
 import logging
 import random
 import string
@@ -13,32 +14,41 @@ import typing
 
 from dataclasses import dataclass
 from dataclasses import field
-from pprint import pprint
 
 from aiohttp import WSMessage
 from aiohttp import web
 
+from ..messages.codec import get_codec
+from ..messages.codec import get_supported_codecs
+from ..messages.codec import is_supported_codec
+from ..messages.codec import MessageCodec
 from ..messages.responses import AudioResponse
 from ..messages.responses import invalid_message_response
+from ..messages.responses.data import FileContentResponse
 from ..messages.responses.data import LoadMessageResponse
 from ..messages.responses.data import TransferCompleteResponse
-from ..narrate import break_down_sentences
-from ..narrate import generate_sound
+from ..narrate import NarrationSession
+from ..narrate import stream_sound
+from ..narrate import DEFAULT_AUDIO_FORMAT
+from ..narrate import encode_async
+from ..narrate import get_supported_formats
+from ..narrate import is_supported
+from ..narrate import SchedulingPriority
 from ..utilities.common import local_only
 from ..backend.base import BaseBackend
 from ..backend.file import FileBackend
 from ..messages.base import NarratorMessage
 from ..messages.requests import FileSelectionRequest
-from ..messages.requests import MasterRequest
 from ..messages.requests import NarratorRequest
 from ..messages.requests import ReadRequest
 from ..messages.responses import ErrorResponse
 from ..messages.responses import AcknowledgementResponse
 from ..messages.responses import OpenResponse
 from ..messages.responses import NoHandlerResponse
-from ..messages.responses.data import NarratorDataResponse
 from ..messages.requests import KillRequest
+from ..messages.requests import CancelRequest
 from ..messages.responses import KillResponse
+from ..messages.responses import CancelledResponse
 
 from ..application_logging import get_logger
 
@@ -59,14 +69,60 @@ class SocketState:
     The state for the single page app
     """
     connection: web.WebSocketResponse
+    connection_id: typing.Optional[str] = field(default=None)
     backend: BaseBackend = field(default_factory=FileBackend)
+    audio_format: str = field(default=DEFAULT_AUDIO_FORMAT)
+    codec: MessageCodec = field(default_factory=get_codec)
+    """How messages on this connection are encoded"""
     data: typing.Dict[str, typing.Any] = field(default_factory=dict)
+    narrations: typing.Dict[str, asyncio.Task] = field(default_factory=dict)
+    """In-flight narrations, keyed by the ID of the message that asked for them"""
+    tasks: typing.Set[asyncio.Task] = field(default_factory=set)
+    """Every message that is still being handled"""
+    killed: bool = field(default=False)
+    session: NarrationSession = field(default_factory=NarrationSession)
+    """The audio of the last narration, reused when the same text is read again after an edit"""
+    narration_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    """Held by the narration that is sending audio so that narrations on one connection never interleave"""
+    queued_narrations: typing.Set[str] = field(default_factory=set)
+    """IDs of messages asking for narrations that are waiting on or holding the narration lock"""
+    cancelled_narrations: typing.Set[str] = field(default_factory=set)
+    """IDs of queued narrations that were cancelled before they could start"""
+
+    def cancel_narrations(self):
+        for narration in self.narrations.values():
+            narration.cancel()
+
+    def take_turn(self, request: typing.Optional[NarratorRequest]) -> typing.AsyncContextManager:
+        """
+        Wait until every narration asked for earlier on this connection is finished and has been reported
+
+        Audio frames don't say which narration they belong to, so a client can only tell narrations apart if each
+        one's audio and final response arrive before anything from the next
+
+        :param request: The request about to be handled. Only requests to read text wait their turn
+        """
+        if not isinstance(request, ReadRequest):
+            return contextlib.nullcontext()
+        return self.__narrate_in_turn(request.message_id)
+
+    @contextlib.asynccontextmanager
+    async def __narrate_in_turn(self, message_id: typing.Optional[str]):
+        if message_id:
+            self.queued_narrations.add(message_id)
+
+        try:
+            async with self.narration_lock:
+                yield
+        finally:
+            self.queued_narrations.discard(message_id)
+            self.cancelled_narrations.discard(message_id)
 
 
 HANDLER = typing.Callable[[REQUEST_TYPE, SocketState], typing.Union[RESPONSE_TYPE, typing.Sequence[RESPONSE_TYPE]]]
 
 
-def load_file(request: FileSelectionRequest, state: SocketState) -> NarratorDataResponse:
+def load_file(request: FileSelectionRequest, state: SocketState) -> FileContentResponse:
     data = state.backend.load(request.path)
     name = "::".join(
         [
@@ -75,10 +131,10 @@ def load_file(request: FileSelectionRequest, state: SocketState) -> NarratorData
             if part
         ][-3:]
     )
-    response = NarratorDataResponse(
-        operation=request.operation,
+    response = FileContentResponse(
         data_id=name,
-        data={"content": data},
+        size=len(data),
+        content=data,
         message_id=request.message_id
     )
 
@@ -93,54 +149,109 @@ async def read_text(request: ReadRequest, state: SocketState) -> TransferComplet
     if not request.text:
         raise ValueError("Cannot generate sound - no text provided")
 
-    text = break_down_sentences(request.text)
+    audio_format = request.audio_format or state.audio_format
 
-    item_count = len(text) * 3
-    items_complete = 0
+    if not is_supported(audio_format):
+        raise ValueError(
+            f"Cannot send audio as '{audio_format}' - the server may only send {', '.join(get_supported_formats())}"
+        )
 
+    # Without a requested priority, stream_sound decides one from the size of the text
+    priority = SchedulingPriority[request.priority.upper()] if request.priority else None
+
+    # The number of phrases isn't known until stream_sound has counted them alongside the first phrase
     await LoadMessageResponse(
-        percent_complete=items_complete / item_count,
-        item_count=item_count,
+        percent_complete=0.0,
+        item_count=None,
         message=f"Generating sound..."
-    ).send(state.connection)
+    ).send(state.connection, state.codec)
+
+    if request.message_id in state.cancelled_narrations:
+        return CancelledResponse(message_id=request.message_id, item_count=0)
+
+    tracks_sent = 0
+
+    async def send_narration():
+        nonlocal tracks_sent
+        sounds = stream_sound(
+            request.text,
+            request.configuration,
+            connection_id=state.connection_id,
+            priority=priority,
+            session=state.session
+        )
+
+        # Closing the stream right away cancels any phrases that are still waiting for their turn
+        async with contextlib.aclosing(sounds):
+            async for phrase_index, phrase_count, sound in sounds:
+                encoded_sound = await encode_async(sound, audio_format)
+
+                # Cancellation takes effect between tracks rather than partway through sending one
+                await asyncio.shield(
+                    AudioResponse(
+                        audio=encoded_sound,
+                        audio_index=phrase_index,
+                        audio_count=phrase_count,
+                        message_id=request.message_id
+                    ).send(state.connection, state.codec)
+                )
+                tracks_sent += 1
+                await asyncio.shield(
+                    LoadMessageResponse(
+                        percent_complete=((phrase_index + 1) / phrase_count) * 100.0,
+                        item_count=phrase_count,
+                        count_complete=phrase_index + 1,
+                        message=f"Sent track {phrase_index + 1} of {phrase_count}..."
+                    ).send(state.connection, state.codec)
+                )
 
-    audio = generate_sound(request.text, request.configuration)
+    narration = asyncio.ensure_future(send_narration())
 
-    items_complete += len(text)
+    if request.message_id:
+        state.narrations[request.message_id] = narration
 
-    await LoadMessageResponse(
-        message="Sound generated...",
-        percent_complete=(items_complete / item_count) * 100.0,
-    ).send(state.connection)
-
-    if not isinstance(audio, typing.List):
-        audio = [audio]
-
-    for sound_index, sound in enumerate(audio):
-        items_complete += 1
-        await LoadMessageResponse(
-            percent_complete=(items_complete / item_count) * 100.0,
-            item_count=item_count,
-            count_complete=items_complete + sound_index,
-            message=f"Sending track {sound_index + 1} of {len(audio)}..."
-        ).send(state.connection)
-        await state.connection.send_bytes(sound)
+    try:
+        await narration
+    except asyncio.CancelledError:
+        # Only a cancelled narration is reported; the whole handler being cancelled means the socket is closing
+        if asyncio.current_task().cancelling() or not narration.cancelled():
+            raise
+        _LOGGER.info(f"Narration for message {request.message_id} was cancelled after {tracks_sent} tracks")
+        return CancelledResponse(message_id=request.message_id, item_count=tracks_sent)
+    finally:
+        state.narrations.pop(request.message_id, None)
 
     await LoadMessageResponse(
         message_id=request.message_id,
         percent_complete=100.0,
-        item_count=item_count,
-        count_complete=items_complete,
+        item_count=tracks_sent,
+        count_complete=tracks_sent,
         message="All audio sent"
-    ).send(state.connection)
+    ).send(state.connection, state.codec)
 
-    return TransferCompleteResponse(message_id=request.message_id, item_count=len(audio))
+    return TransferCompleteResponse(message_id=request.message_id, item_count=tracks_sent)
+
+
+def cancel_request(request: CancelRequest, state: SocketState) -> AcknowledgementResponse:
+    narration = state.narrations.get(request.target_message_id)
+
+    if narration is None and request.target_message_id in state.queued_narrations:
+        # The narration hasn't started yet, so it is dropped once its turn comes
+        state.cancelled_narrations.add(request.target_message_id)
+        return AcknowledgementResponse(message_id=request.message_id)
+
+    if narration is None:
+        raise ValueError(f"Cannot cancel message {request.target_message_id} - it is not being processed")
+
+    narration.cancel()
+    return AcknowledgementResponse(message_id=request.message_id)
 
 
 MESSAGE_HANDLERS: typing.Mapping[typing.Type[REQUEST_TYPE], typing.Union[HANDLER, typing.Sequence[HANDLER]]] = {
     FileSelectionRequest: load_file,
     KillRequest: kill_application,
-    ReadRequest: read_text
+    ReadRequest: read_text,
+    CancelRequest: cancel_request
 }
 
 
@@ -148,27 +259,20 @@ def default_message_handler(request: NarratorRequest, state: SocketState) -> RES
     return NoHandlerResponse(message_id=request.message_id)
 
 
-async def handle_message(
+async def respond(
     connection: web.WebSocketResponse,
-    message: typing.Union[str, bytes, dict],
+    request: typing.Optional[NarratorRequest],
+    responses: typing.List[typing.Union[RESPONSE_TYPE, str, dict, bytes, None, BaseException]],
     state: SocketState
 ):
-    if isinstance(message, (str, bytes)):
-        message = json.loads(message)
-
-    request: typing.Optional[NarratorRequest] = None
-    responses: typing.List[typing.Union[RESPONSE_TYPE, str, dict, bytes, None, BaseException]] = []
-
-    try:
-        request_wrapper = MasterRequest.model_validate({"request": message})
-        request = request_wrapper.request
-        _LOGGER.debug(f"Parsed request as {type(request)}")
-    except Exception as error:
-        print(error)
-        print("Could not deserialize incoming message:")
-        pprint(message)
-        responses.append(invalid_message_response())
+    """
+    Handle a decoded request and send everything it results in
 
+    :param connection: The socket to reply on
+    :param request: The decoded request. None if the message could not be decoded
+    :param responses: Responses that were already decided on, such as a complaint about an invalid message
+    :param state: The state of the connection
+    """
     if isinstance(request, NarratorRequest):
         handler = MESSAGE_HANDLERS.get(type(request), default_message_handler)
 
@@ -188,6 +292,8 @@ async def handle_message(
                     responses.extend(response)
                 else:
                     responses.append(response)
+            except asyncio.CancelledError:
+                raise
             except BaseException as error:
                 message = f"An error occurred while handling a `{type(request).__name__}` message: {str(error)}"
                 _LOGGER.error(
@@ -210,16 +316,16 @@ async def handle_message(
             elif isinstance(response, str):
                 await connection.send_str(data=response)
             elif isinstance(response, dict):
-                await connection.send_json(data=response)
+                await state.codec.send_data(connection, response)
             elif isinstance(response, NarratorMessage):
-                await response.send(connection=connection)
+                await response.send(connection=connection, codec=state.codec)
             elif isinstance(response, BaseException):
                 error_response = ErrorResponse(
                     message_id=request.message_id,
                     message_type=type(request).__name__,
                     error_message=str(response)
                 )
-                await error_response.send(connection=connection)
+                await error_response.send(connection=connection, codec=state.codec)
             elif response is not None:
                 message = (f"Cannot send a response for an '{request.operation}' operation - "
                            f"the resulting value was a {type(response).__name__}, which cannot be transmitted")
@@ -229,22 +335,41 @@ async def handle_message(
                     message_type=type(request).__name__,
                     error_message=message
                 )
-                await error_message.send(connection=connection)
+                await error_message.send(connection=connection, codec=state.codec)
             else:
                 acknowledgement = AcknowledgementResponse(message_id=request.message_id)
-                await acknowledgement.send(connection=connection)
+                await acknowledgement.send(connection=connection, codec=state.codec)
         except TypeError as error:
             error_response = ErrorResponse(
                 message_id=request.message_id,
                 message_type=type(request).__name__,
                 error_message=str(error)
             )
-            await error_response.send(connection=connection)
+            await error_response.send(connection=connection, codec=state.codec)
 
     if isinstance(request, KillRequest):
         return _KILL_SYMBOL
 
 
+async def handle_message(
+    connection: web.WebSocketResponse,
+    message: typing.Union[str, bytes, dict],
+    state: SocketState
+):
+    request: typing.Optional[NarratorRequest] = None
+    responses: typing.List[typing.Union[RESPONSE_TYPE, str, dict, bytes, None, BaseException]] = []
+
+    try:
+        request = state.codec.decode_request(message)
+        _LOGGER.debug(f"Parsed request as {type(request)}")
+    except Exception as error:
+        _LOGGER.warning("Could not deserialize incoming message", exc_info=error)
+        responses.append(invalid_message_response())
+
+    async with state.take_turn(request):
+        return await respond(connection, request, responses, state)
+
+
 @local_only
 async def socket_handler(request: web.Request) -> web.WebSocketResponse:
     connection = web.WebSocketResponse()
@@ -252,25 +377,63 @@ async def socket_handler(request: web.Request) -> web.WebSocketResponse:
     connection_id = ''.join(random.choices(population=CONNECTION_ID_CHARACTER_SET, k=CONNECTION_ID_LENGTH))
 
     await connection.prepare(request=request)
-    state = SocketState(connection=connection)
+    state = SocketState(connection=connection, connection_id=connection_id)
+
+    requested_audio_format = request.query.get("audio_format")
+
+    if is_supported(requested_audio_format):
+        state.audio_format = requested_audio_format
+    elif requested_audio_format:
+        _LOGGER.warning(
+            f"Socket {connection_id} asked for audio as '{requested_audio_format}', which is not supported. "
+            f"Audio will be sent as '{state.audio_format}' instead."
+        )
+
+    requested_codec = request.query.get("codec")
+
+    if is_supported_codec(requested_codec):
+        state.codec = get_codec(requested_codec)
+    elif requested_codec:
+        _LOGGER.warning(
+            f"Socket {connection_id} asked for messages as '{requested_codec}', which is not supported. "
+            f"Messages will be sent as '{state.codec.name}' instead."
+        )
 
     print(f"Connected to socket {connection_id} from {request.remote}")
 
-    open_response = OpenResponse()
+    open_response = OpenResponse(
+        audio_format=state.audio_format,
+        audio_formats=get_supported_formats(),
+        codec=state.codec.name,
+        codecs=get_supported_codecs()
+    )
 
-    await connection.send_json(open_response.model_dump())
-    result = None
-    async for message in connection:  # type: WSMessage
-        _LOGGER.info(f"Received {message.data} from socket")
-        result = await handle_message(connection, message=message.data, state=state)
+    await open_response.send(connection, state.codec)
 
-        if result == _KILL_SYMBOL:
+    def message_handled(task: asyncio.Task):
+        state.tasks.discard(task)
+
+        if not task.cancelled() and task.exception() is None and task.result() == _KILL_SYMBOL:
             print(f"Instructed to kill the application")
-            break
+            state.killed = True
+            asyncio.ensure_future(connection.close())
+
+    # Messages are handled alongside one another so that a cancellation may reach a narration that is in progress
+    async for message in connection:  # type: WSMessage
+        _LOGGER.info(f"Received {message.data} from socket")
+        task = asyncio.ensure_future(handle_message(connection, message=message.data, state=state))
+        state.tasks.add(task)
+        task.add_done_callback(message_handled)
 
     print(f"Connection to Socket {connection_id} closing")
 
-    if result == _KILL_SYMBOL:
+    # Nobody is left to hear any remaining audio
+    state.cancel_narrations()
+
+    for task in list(state.tasks):
+        task.cancel()
+
+    if state.killed:
         sys.exit(0)
 
-    return connection
\ No newline at end of file
+    return connection
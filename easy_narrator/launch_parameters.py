@@ -16,6 +16,12 @@ class ApplicationArguments:
         self.__open_browser: bool = False
         self.__generate_model_catalog: bool = False
         self.__generate_models: bool = False
+        self.__rebuild_model_catalog: bool = False
+        self.__catalog_processes: int = application_details.CATALOG_PROCESS_COUNT
+        self.__synthesis_workers: int = application_details.SYNTHESIS_WORKER_COUNT
+        self.__synthesis_processes: int = application_details.SYNTHESIS_PROCESS_COUNT
+        self.__torch_threads: int = application_details.TORCH_THREADS_PER_WORKER
+        self.__remote_workers: typing.Sequence[str] = application_details.REMOTE_WORKER_ADDRESSES
 
         self.__parse_arguments(*argv)
 
@@ -39,6 +45,30 @@ class ApplicationArguments:
     def generate_samples(self) -> bool:
         return self.__generate_samples
 
+    @property
+    def synthesis_workers(self) -> int:
+        return self.__synthesis_workers
+
+    @property
+    def rebuild_model_catalog(self) -> bool:
+        return self.__rebuild_model_catalog
+
+    @property
+    def catalog_processes(self) -> int:
+        return self.__catalog_processes
+
+    @property
+    def synthesis_processes(self) -> int:
+        return self.__synthesis_processes
+
+    @property
+    def torch_threads(self) -> int:
+        return self.__torch_threads
+
+    @property
+    def remote_workers(self) -> typing.Sequence[str]:
+        return self.__remote_workers
+
     def __parse_arguments(self, *argv):
         parser = argparse.ArgumentParser(
             prog=application_details.APPLICATION_NAME,
@@ -52,6 +82,21 @@ class ApplicationArguments:
             help="Generate a listing of available models, their languages, and their speakers"
         )
 
+        parser.add_argument(
+            "--rebuild-model-catalog",
+            action="store_true",
+            dest="rebuild_model_catalog",
+            help="Describe every model again when generating the model catalog, even those that haven't changed"
+        )
+
+        parser.add_argument(
+            "--catalog-processes",
+            dest="catalog_processes",
+            type=int,
+            default=application_details.CATALOG_PROCESS_COUNT,
+            help="The number of processes that describe models while generating the model catalog. 0 uses one per core"
+        )
+
         parser.add_argument(
             "--generate-samples",
             action="store_true",
@@ -83,6 +128,40 @@ class ApplicationArguments:
             help="The path to the index page"
         )
 
+        parser.add_argument(
+            "--synthesis-workers",
+            dest="synthesis_workers",
+            type=int,
+            default=application_details.SYNTHESIS_WORKER_COUNT,
+            help="The number of threads that may generate speech at the same time"
+        )
+
+        parser.add_argument(
+            "--synthesis-processes",
+            dest="synthesis_processes",
+            type=int,
+            default=application_details.SYNTHESIS_PROCESS_COUNT,
+            help="The number of worker processes that generate speech. 0 generates speech in the server process"
+        )
+
+        parser.add_argument(
+            "--torch-threads",
+            dest="torch_threads",
+            type=int,
+            default=application_details.TORCH_THREADS_PER_WORKER,
+            help="The number of threads torch may use in each synthesis process. 0 divides the cores between them"
+        )
+
+        parser.add_argument(
+            "--remote-worker",
+            dest="remote_workers",
+            action="append",
+            default=None,
+            help="The address of a synthesis worker to send phrases to, like 'tcp://host:9700'. May be given more "
+                 "than once and replaces NARRATOR_REMOTE_WORKERS. Speech is generated by this process if no workers "
+                 "are given"
+        )
+
         parameters = parser.parse_args(argv)
 
         self.__port = parameters.port
@@ -90,4 +169,12 @@ class ApplicationArguments:
         self.__open_browser = parameters.open_browser
         self.__generate_model_catalog = parameters.generate_model_catalog
         self.__generate_samples = parameters.generate_samples
+        self.__synthesis_workers = parameters.synthesis_workers
+        self.__rebuild_model_catalog = parameters.rebuild_model_catalog
+        self.__catalog_processes = parameters.catalog_processes
+        self.__synthesis_processes = parameters.synthesis_processes
+        self.__torch_threads = parameters.torch_threads
+        # 'append' would add to a list default, so the environment's workers are only used when none were given
+        if parameters.remote_workers is not None:
+            self.__remote_workers = parameters.remote_workers
 
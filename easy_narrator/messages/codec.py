@@ -0,0 +1,221 @@
+"""
+Encodes the messages sent to and read from websocket clients
+
+Messages are JSON unless a client asks for MessagePack when it connects, like `/ws?codec=msgpack`. With MessagePack,
+every message in either direction is a single binary frame and bytes, such as audio and file contents, are carried as
+raw binary. With JSON, audio is sent alone in a binary frame, as it always has been, and any other bytes are base64
+encoded within their message.
+
+MessagePack requires the optional `msgpack` package.
+"""
+from __future__ import annotations
+
+import abc
+import functools
+import typing
+
+from aiohttp import web
+
+from easy_narrator.application_logging import get_logger
+
+from .base import NarratorMessage
+
+if typing.TYPE_CHECKING:
+    from .requests import NarratorRequest
+
+_LOGGER = get_logger()
+
+CodecName = typing.Literal["json", "msgpack"]
+
+DEFAULT_CODEC: CodecName = "json"
+
+Frame = typing.Union[str, bytes]
+"""A single websocket message - text frames are strings and binary frames are bytes"""
+
+MessageSerializer = typing.Callable[[NarratorMessage], typing.Sequence[Frame]]
+
+
+class MessageCodec(abc.ABC):
+    """
+    Turns messages into websocket frames and frames into requests
+
+    A serializer is built for each type of message the first time that type is sent and reused from then on
+    """
+    name: typing.ClassVar[CodecName]
+
+    def __init__(self):
+        self.__serializers: typing.Dict[typing.Type[NarratorMessage], MessageSerializer] = {}
+
+    def get_serializer(self, message_type: typing.Type[NarratorMessage]) -> MessageSerializer:
+        serializer = self.__serializers.get(message_type)
+
+        if serializer is None:
+            serializer = self._build_serializer(message_type)
+            self.__serializers[message_type] = serializer
+
+        return serializer
+
+    @abc.abstractmethod
+    def _build_serializer(self, message_type: typing.Type[NarratorMessage]) -> MessageSerializer:
+        """
+        Create a function that turns messages of the given type into frames
+        """
+
+    @abc.abstractmethod
+    def encode_data(self, data: typing.Any) -> Frame:
+        """
+        Encode a plain value that isn't a message, like a dictionary
+        """
+
+    @abc.abstractmethod
+    def decode(self, payload: Frame) -> typing.Any:
+        """
+        Read the value within a frame sent by a client
+        """
+
+    def encode(self, message: NarratorMessage) -> typing.Sequence[Frame]:
+        return self.get_serializer(type(message))(message)
+
+    def decode_request(self, payload: typing.Union[Frame, typing.Mapping[str, typing.Any]]) -> NarratorRequest:
+        """
+        Turn a frame from a client into the request it describes
+        """
+        from .requests import decode_request
+        return decode_request(payload)
+
+    async def send(self, connection: web.WebSocketResponse, message: NarratorMessage):
+        for frame in self.encode(message):
+            await write_frame(connection, frame)
+
+    async def send_data(self, connection: web.WebSocketResponse, data: typing.Any):
+        await write_frame(connection, self.encode_data(data))
+
+
+async def write_frame(connection: web.WebSocketResponse, frame: Frame):
+    if isinstance(frame, bytes):
+        await connection.send_bytes(frame)
+    else:
+        await connection.send_str(frame)
+
+
+def get_payload_field(message_type: typing.Type[NarratorMessage]) -> typing.Optional[str]:
+    """
+    Get the name of the field on a type of message that holds bytes that should be sent as raw binary
+    """
+    return getattr(message_type, "payload_field", None)
+
+
+class JSONCodec(MessageCodec):
+    """
+    Sends messages as JSON text, except for audio, which is sent alone as a binary frame
+    """
+    name = "json"
+
+    def _build_serializer(self, message_type: typing.Type[NarratorMessage]) -> MessageSerializer:
+        serializer = message_type.__pydantic_serializer__
+        payload_field = get_payload_field(message_type)
+
+        if payload_field is None or not getattr(message_type, "payload_frame", False):
+            return lambda message: [serializer.to_json(message).decode()]
+
+        return lambda message: [getattr(message, payload_field)]
+
+    def encode_data(self, data: typing.Any) -> Frame:
+        import json
+        return json.dumps(data)
+
+    def decode(self, payload: Frame) -> typing.Any:
+        import json
+        return json.loads(payload)
+
+
+class MessagePackCodec(MessageCodec):
+    """
+    Sends every message as a single MessagePack frame with payloads kept as raw binary
+    """
+    name = "msgpack"
+
+    def __init__(self):
+        super().__init__()
+        import msgpack
+        self.__packer = msgpack.Packer(use_bin_type=True)
+        self.__unpack = functools.partial(msgpack.unpackb, raw=False)
+
+    def _build_serializer(self, message_type: typing.Type[NarratorMessage]) -> MessageSerializer:
+        serializer = message_type.__pydantic_serializer__
+        payload_field = get_payload_field(message_type)
+        pack = self.__packer.pack
+
+        if payload_field is None:
+            return lambda message: [pack(serializer.to_python(message, mode="json"))]
+
+        excluded_fields = {payload_field}
+
+        def serialize(message: NarratorMessage) -> typing.Sequence[Frame]:
+            data = serializer.to_python(message, mode="json", exclude=excluded_fields)
+            data[payload_field] = getattr(message, payload_field)
+            return [pack(data)]
+
+        return serialize
+
+    def encode_data(self, data: typing.Any) -> Frame:
+        return self.__packer.pack(data)
+
+    def decode(self, payload: Frame) -> typing.Any:
+        if isinstance(payload, str):
+            import json
+            return json.loads(payload)
+        return self.__unpack(payload)
+
+    def decode_request(self, payload: typing.Union[Frame, typing.Mapping[str, typing.Any]]) -> NarratorRequest:
+        # Clients may still send JSON text, which is validated without being parsed twice
+        if isinstance(payload, bytes):
+            payload = self.decode(payload)
+        return super().decode_request(payload)
+
+
+CODECS: typing.Mapping[str, typing.Type[MessageCodec]] = {
+    JSONCodec.name: JSONCodec,
+    MessagePackCodec.name: MessagePackCodec,
+}
+
+
+@functools.lru_cache(maxsize=1)
+def get_supported_codecs() -> typing.Sequence[str]:
+    """
+    Get the names of every codec that clients may ask for
+    """
+    supported_codecs = [DEFAULT_CODEC]
+
+    try:
+        import msgpack
+    except ImportError:
+        _LOGGER.info("The msgpack package is not installed; messages may only be sent as JSON")
+        return supported_codecs
+
+    supported_codecs.append(MessagePackCodec.name)
+    return supported_codecs
+
+
+def is_supported_codec(name: typing.Optional[str]) -> bool:
+    return name in get_supported_codecs()
+
+
+@functools.lru_cache(maxsize=None)
+def create_codec(name: str) -> MessageCodec:
+    return CODECS[name]()
+
+
+def get_codec(name: str = None) -> MessageCodec:
+    """
+    Get the shared codec with the given name
+
+    :param name: The name of the codec. DEFAULT_CODEC if not given
+    :raises ValueError: If the codec isn't supported
+    """
+    name = name or DEFAULT_CODEC
+
+    if not is_supported_codec(name):
+        raise ValueError(f"Cannot encode messages as '{name}' - only {', '.join(get_supported_codecs())} may be used")
+
+    return create_codec(name)
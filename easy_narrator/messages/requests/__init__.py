@@ -7,12 +7,82 @@ from .base import NarratorRequest
 from .data import FileSelectionRequest
 from .data import ReadRequest
 from .management import KillRequest
+from .management import CancelRequest
 from ...utilities.common import get_subclasses
 
+UNTAGGED_REQUEST = "untagged"
+"""The tag for requests that don't name a specific operation, checked only when no other request type matches"""
+
 
 def get_message_types() -> typing.Tuple[typing.Type[NarratorRequest], ...]:
     return tuple([message_type for message_type in get_subclasses(NarratorRequest)])
 
 
+def get_operations(message_type: typing.Type[NarratorRequest]) -> typing.Tuple[str, ...]:
+    """
+    Get the operations that a type of request handles
+
+    :return: The values listed in the request's `operation` Literal. Empty if it accepts any operation
+    """
+    annotation = message_type.model_fields["operation"].annotation
+
+    if typing.get_origin(annotation) is typing.Literal:
+        return typing.get_args(annotation)
+
+    return ()
+
+
+def get_request_type() -> typing.Type[typing.Union[NarratorRequest, ...]]:
+    """
+    Create a Union of every request type that picks its member by the request's operation
+
+    Each message is validated against the single type that handles its operation rather than against every type in
+    turn. Requests that don't name a specific operation are only considered when no other type claims it.
+    """
+    operations: typing.Dict[str, str] = {}
+    members = []
+    untagged_types = []
+
+    for message_type in get_message_types():
+        message_operations = get_operations(message_type)
+
+        if not message_operations:
+            untagged_types.append(message_type)
+            continue
+
+        members.append(typing.Annotated[message_type, pydantic.Tag(message_type.__name__)])
+
+        for operation in message_operations:
+            operations.setdefault(operation, message_type.__name__)
+
+    if untagged_types:
+        members.append(typing.Annotated[typing.Union[tuple(untagged_types)], pydantic.Tag(UNTAGGED_REQUEST)])
+
+    def get_request_tag(value: typing.Any) -> typing.Optional[str]:
+        operation = value.get("operation") if isinstance(value, dict) else getattr(value, "operation", None)
+        return operations.get(operation, UNTAGGED_REQUEST if untagged_types else None)
+
+    return typing.Annotated[typing.Union[tuple(members)], pydantic.Discriminator(get_request_tag)]
+
+
 class MasterRequest(pydantic.BaseModel):
-    request: typing.Union[get_message_types()]
\ No newline at end of file
+    request: get_request_type()
+
+
+REQUEST_ADAPTER: pydantic.TypeAdapter = pydantic.TypeAdapter(get_request_type())
+"""Decodes any request. Built once since building it means compiling a validator for every request type"""
+
+
+def decode_request(message: typing.Union[str, bytes, typing.Mapping[str, typing.Any]]) -> NarratorRequest:
+    """
+    Turn an incoming message into the request it describes
+
+    Raw JSON is parsed and validated in a single pass
+
+    :param message: The message as JSON or as already parsed data
+    :raises pydantic.ValidationError: If the message isn't a valid request
+    :return: The request
+    """
+    if isinstance(message, (str, bytes)):
+        return REQUEST_ADAPTER.validate_json(message)
+    return REQUEST_ADAPTER.validate_python(message)
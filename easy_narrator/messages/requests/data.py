@@ -12,6 +12,7 @@ import pydantic
 from .base import NarratorRequest
 from ...models.narration_config import NarrationConfig
 from ...models import get_narration_config_types
+from ...narrate.encoding import AudioFormat
 
 _INDEX_TYPE = typing.Union[datetime, str, float, int]
 
@@ -35,4 +36,12 @@ class ReadRequest(NarratorRequest):
     configuration: typing.Optional[get_narration_config_types()] = pydantic.Field(
         default_factory=NarrationConfig,
         description="Values for how to configure models for narrating the given text"
-    )
\ No newline at end of file
+    )
+    audio_format: typing.Optional[AudioFormat] = pydantic.Field(
+        default=None,
+        description="The format to send narrated audio in. Uses the format chosen for the connection if not given"
+    )
+    priority: typing.Optional[typing.Literal["interactive", "bulk"]] = pydantic.Field(
+        default=None,
+        description="How urgently the audio is needed. Decided by the length of the text if not given"
+    )
@@ -12,4 +12,14 @@ from .base import NarratorRequest
 class KillRequest(NarratorRequest):
     operation: typing.Literal["kill"] = pydantic.Field(
         description="Description stating that this should kill the application"
-    )
\ No newline at end of file
+    )
+
+
+class CancelRequest(NarratorRequest):
+    """
+    A message asking to stop an in-flight narration
+    """
+    operation: typing.Literal["cancel"] = pydantic.Field(
+        description="Description stating that this should cancel an earlier request"
+    )
+    target_message_id: str = pydantic.Field(description="The ID of the message whose work should be cancelled")
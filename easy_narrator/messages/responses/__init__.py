@@ -9,6 +9,7 @@ from .base import OpenResponse
 from .data import AudioResponse
 
 from .management import KillResponse
+from .management import CancelledResponse
 
 from .error import ErrorResponse
 from .error import invalid_message_response
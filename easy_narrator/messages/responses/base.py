@@ -10,14 +10,44 @@ from aiohttp import web
 
 from ..base import NarratorMessage
 
+if typing.TYPE_CHECKING:
+    from ..codec import MessageCodec
+
 
 class NarratorResponse(NarratorMessage):
-    async def send(self, connection: web.WebSocketResponse):
-        return await connection.send_json(self.model_dump())
+    payload_field: typing.ClassVar[typing.Optional[str]] = None
+    """The name of a bytes field that binary codecs send as raw binary rather than encoding it"""
+
+    payload_frame: typing.ClassVar[bool] = False
+    """
+    Whether JSON clients receive the payload alone in a binary frame rather than base64 encoded within the message
+
+    JSON clients treat every binary frame as audio, so only audio should be sent this way
+    """
+
+    async def send(self, connection: web.WebSocketResponse, codec: MessageCodec = None):
+        from ..codec import get_codec
+        return await (codec or get_codec()).send(connection, self)
 
 
 class OpenResponse(NarratorResponse):
     operation: typing.Literal['connection_opened'] = pydantic.Field(default="connection_opened")
+    audio_format: typing.Optional[str] = pydantic.Field(
+        default=None,
+        description="The format that narrated audio will be sent in unless a request asks otherwise"
+    )
+    audio_formats: typing.List[str] = pydantic.Field(
+        default_factory=list,
+        description="Every format that narrated audio may be sent in"
+    )
+    codec: typing.Optional[str] = pydantic.Field(
+        default=None,
+        description="How messages on this connection are encoded"
+    )
+    codecs: typing.List[str] = pydantic.Field(
+        default_factory=list,
+        description="Every encoding that a connection may ask for"
+    )
 
 
 class AcknowledgementResponse(NarratorResponse):
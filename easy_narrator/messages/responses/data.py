@@ -3,10 +3,10 @@
 """
 from __future__ import annotations
 
+import base64
 import typing
 
 import pydantic
-from aiohttp import web
 
 from .base import NarratorResponse
 from ..base import DataMessage
@@ -16,15 +16,43 @@ class NarratorDataResponse(NarratorResponse, DataMessage):
     data: typing.Dict[str, typing.Any]
 
 
+class FileContentResponse(NarratorResponse, DataMessage):
+    """
+    The contents of a file that a client asked for
+
+    JSON clients receive the contents base64 encoded within the message since a bare binary frame would be taken as
+    audio. Binary codecs carry them as they are.
+    """
+    payload_field: typing.ClassVar[str] = "content"
+
+    operation: typing.Literal['load'] = pydantic.Field(default='load')
+    size: int = pydantic.Field(description="The number of bytes in the file")
+    content: bytes = pydantic.Field(description="The contents of the file")
+
+    @pydantic.field_serializer("content", when_used="json")
+    def serialize_content(self, content: bytes) -> str:
+        # Standard rather than URL-safe base64 so that browsers may decode it with atob
+        return base64.b64encode(content).decode()
+
+
 class ReadResponse(NarratorResponse):
-    narration: bytes
+    payload_field: typing.ClassVar[str] = "narration"
+    payload_frame: typing.ClassVar[bool] = True
 
-    async def send(self, connection: web.WebSocketResponse):
-        await connection.send_bytes(self.narration)
+    narration: bytes
 
 
 class AudioResponse(NarratorResponse):
-    audio: str
+    """
+    A single track of narrated audio
+
+    JSON clients receive only the audio itself as a binary frame, just as they always have
+    """
+    payload_field: typing.ClassVar[str] = "audio"
+    payload_frame: typing.ClassVar[bool] = True
+
+    operation: typing.Literal['audio'] = pydantic.Field(default='audio')
+    audio: bytes
     audio_index: typing.Optional[int] = pydantic.Field(
         default=0,
         description="The index of the audio in case of multiple parts"
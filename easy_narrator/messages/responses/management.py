@@ -11,4 +11,15 @@ from .base import NarratorResponse
 
 
 class KillResponse(NarratorResponse):
-    operation: typing.Literal['kill'] = pydantic.Field(description='Description stating that the application is being killed')
\ No newline at end of file
+    operation: typing.Literal['kill'] = pydantic.Field(description='Description stating that the application is being killed')
+
+
+class CancelledResponse(NarratorResponse):
+    """
+    A response stating that a request was stopped before it finished
+    """
+    operation: typing.Literal['cancelled'] = pydantic.Field(default='cancelled')
+    item_count: typing.Optional[int] = pydantic.Field(
+        default=0,
+        description="The number of items that were transferred before the request was stopped"
+    )
@@ -1,9 +1,12 @@
 """
 @TODO: Put a module wide description here
 """
+import functools
 import typing
 import inspect
 
+import pydantic
+
 from .narration_config import NarrationConfig
 from .narration_config import VCTKVITSConfig
 from .narration_config import XTTSv2Config
@@ -16,11 +19,49 @@ from .model_info import ModelInfo
 NarratorConfiguration = typing.TypeVar('NarratorConfiguration', bound=NarrationConfig)
 
 
+GENERIC_CONFIGURATION_TAG = "generic"
+"""The tag for configurations of models that don't have a configuration of their own"""
+
+
+def get_configured_model_names(configuration_type: typing.Type[NarrationConfig]) -> typing.Tuple[str, ...]:
+    """
+    Get the names of the models that a configuration is restricted to
+
+    :return: The names listed in the configuration's `name` Literal. Empty if it accepts any model
+    """
+    annotation = configuration_type.model_fields["name"].annotation
+
+    if typing.get_origin(annotation) is typing.Literal:
+        return typing.get_args(annotation)
+
+    return ()
+
+
+@functools.lru_cache(maxsize=None)
 def get_narration_config_types() -> typing.Type[typing.Union[NarratorConfiguration, ...]]:
     """
-    Create a Union of all concrete NarrationConfig types
+    Create a Union of all concrete NarrationConfig types that picks its member by model name
 
-    Helps define all possible objects that are allowable/parseable as a config in requests for reading
+    Helps define all possible objects that are allowable/parseable as a config in requests for reading. Configurations
+    made for specific models are used for those models and the generic configuration is used for everything else, so
+    a configuration is validated against exactly one type rather than each in turn. Built once and shared.
     """
-    types = tuple([GenericSpeakerLanguageConfig, NarrationConfig])
-    return typing.Union[tuple(types)]
+    model_configurations: typing.Dict[str, str] = {}
+    members = [typing.Annotated[GenericSpeakerLanguageConfig, pydantic.Tag(GENERIC_CONFIGURATION_TAG)]]
+
+    for configuration_type in get_subclasses(NarrationConfig):
+        model_names = get_configured_model_names(configuration_type)
+
+        if not model_names:
+            continue
+
+        members.append(typing.Annotated[configuration_type, pydantic.Tag(configuration_type.__name__)])
+
+        for model_name in model_names:
+            model_configurations.setdefault(model_name, configuration_type.__name__)
+
+    def get_configuration_tag(value: typing.Any) -> str:
+        name = value.get("name") if isinstance(value, dict) else getattr(value, "name", None)
+        return model_configurations.get(name, GENERIC_CONFIGURATION_TAG)
+
+    return typing.Annotated[typing.Union[tuple(members)], pydantic.Discriminator(get_configuration_tag)]
@@ -11,6 +11,8 @@ from pydantic import Field
 from pydantic import PrivateAttr
 from pydantic.main import IncEx
 
+from .model_metadata import ModelMetadata
+
 
 class ModelProtocol(typing.Protocol):
     @property
@@ -38,6 +40,9 @@ class CacheProtocol(typing.Protocol):
     def get(self, model_name: str) -> ModelProtocol:
         pass
 
+    def get_metadata(self, model_name: str) -> typing.Optional[ModelMetadata]:
+        ...
+
     @property
     def models(self) -> typing.List[ModelInfo]:
         ...
@@ -46,6 +51,9 @@ class CacheProtocol(typing.Protocol):
     def available_models(self) -> typing.List[ModelInfo]:
         ...
 
+    def __contains__(self, model: typing.Union[str, ModelInfo]) -> bool:
+        ...
+
 
 class ModelInfo(BaseModel):
     fullname: str
@@ -85,7 +93,9 @@ class ModelInfo(BaseModel):
             is_multi_lingual=self.is_multi_lingual,
             is_multi_speaker=self.is_multi_speaker,
             languages=self.languages,
-            speakers=self.speakers
+            speakers=self.speakers,
+            sample_rate=self.sample_rate,
+            architecture=self.architecture
         )
         return generated_dictionary
 
@@ -105,31 +115,49 @@ class ModelInfo(BaseModel):
 
     @property
     def is_available(self) -> bool:
-        return self.model_cache is not None and self in self.model_cache.available_models
+        return self.model_cache is not None and self in self.model_cache
 
     @property
-    def is_multi_lingual(self) -> typing.Optional[bool]:
+    def metadata(self) -> typing.Optional[ModelMetadata]:
+        """
+        What the model can do, read from the files downloaded with it rather than from the loaded model
+        """
         if not self.is_available:
             return None
-        return self.model.is_multi_lingual
+        return self.model_cache.get_metadata(self.fullname)
+
+    @property
+    def is_multi_lingual(self) -> typing.Optional[bool]:
+        metadata = self.metadata
+        return metadata.is_multi_lingual if metadata is not None else None
 
     @property
     def is_multi_speaker(self) -> typing.Optional[bool]:
-        if not self.is_available:
-            return None
-        return self.model.is_multi_speaker
+        metadata = self.metadata
+        return metadata.is_multi_speaker if metadata is not None else None
 
     @property
     def speakers(self) -> typing.Optional[typing.List[str]]:
-        if not self.is_available:
-            return None
-        return self.model.speakers or []
+        metadata = self.metadata
+        return metadata.speakers if metadata is not None else None
 
     @property
     def languages(self) -> typing.Optional[typing.List[str]]:
-        if not self.is_available:
+        metadata = self.metadata
+
+        if metadata is None:
             return [self.language] if self.language != 'multilingual' else None
-        return self.model.languages or [self.language]
+        return metadata.languages or [self.language]
+
+    @property
+    def sample_rate(self) -> typing.Optional[int]:
+        metadata = self.metadata
+        return metadata.sample_rate if metadata is not None else None
+
+    @property
+    def architecture(self) -> typing.Optional[str]:
+        metadata = self.metadata
+        return metadata.architecture if metadata is not None else None
 
     def __eq__(self, other):
         return hash(self) == hash(other)
@@ -0,0 +1,249 @@
+"""
+Describes downloaded models by reading the configuration and speaker files stored next to their weights
+
+Nothing here loads a model, so models may be browsed without pulling their weights into memory
+"""
+from __future__ import annotations
+
+import functools
+import importlib.util
+import json
+import pickle
+import typing
+
+from pathlib import Path
+
+from pydantic import BaseModel
+from pydantic import Field
+
+from easy_narrator.application_logging import get_logger
+
+_LOGGER = get_logger()
+
+CONFIG_FILE_NAME = "config.json"
+"""The name of the file within a model's directory that describes how the model was built"""
+
+SPEAKER_FILE_NAMES: typing.Sequence[str] = ("speaker_ids.json", "speakers.json", "speakers.pth", "speakers_xtts.pth")
+"""Files within a model's directory that may name its speakers, in the order they are checked"""
+
+SPEAKER_FILE_KEYS: typing.Sequence[str] = ("speaker_ids_file", "speakers_file", "d_vector_file")
+"""Configuration entries that may point to a file naming the model's speakers"""
+
+LANGUAGE_FILE_NAMES: typing.Sequence[str] = ("language_ids.json",)
+"""Files within a model's directory that may name its languages"""
+
+LANGUAGE_FILE_KEYS: typing.Sequence[str] = ("language_ids_file",)
+"""Configuration entries that may point to a file naming the model's languages"""
+
+MODEL_MANIFEST_NAME = ".models.json"
+"""The file shipped within the TTS package that lists every model it can download"""
+
+NAME_FILE_ERRORS: typing.Tuple[typing.Type[BaseException], ...] = (
+    OSError,
+    ValueError,
+    EOFError,
+    pickle.UnpicklingError,
+    RuntimeError,
+    ImportError,
+    AttributeError,
+    TypeError,
+)
+"""
+What reading a speaker or language file may raise: the file can't be opened, is truncated or corrupt, torch can't
+unpickle it or isn't installed, or it doesn't hold the mapping or list that was expected
+"""
+
+
+class ModelMetadata(BaseModel):
+    """
+    What a model can do, as described by the files downloaded with it
+    """
+    fullname: str
+    architecture: typing.Optional[str] = Field(default=None)
+    sample_rate: typing.Optional[int] = Field(default=None)
+    speakers: typing.List[str] = Field(default_factory=list)
+    languages: typing.List[str] = Field(default_factory=list)
+    speaker_count: int = Field(default=0)
+
+    @property
+    def is_multi_speaker(self) -> bool:
+        return max(self.speaker_count, len(self.speakers)) > 1
+
+    @property
+    def is_multi_lingual(self) -> bool:
+        return "xtts" in self.fullname or len(self.languages) > 1
+
+
+def get_setting(configuration: typing.Mapping[str, typing.Any], key: str) -> typing.Any:
+    """
+    Find a value in a model's configuration, which may be at the top level or within its model arguments
+    """
+    value = configuration.get(key)
+
+    if value in (None, "", []):
+        value = (configuration.get("model_args") or {}).get(key)
+
+    return value
+
+
+def find_file(
+    directory: Path,
+    configuration: typing.Mapping[str, typing.Any],
+    names: typing.Sequence[str],
+    keys: typing.Sequence[str]
+) -> typing.Optional[Path]:
+    """
+    Find a file that belongs to a model, first by its usual name and then by where the configuration says it is
+    """
+    for name in names:
+        path = directory / name
+
+        if path.is_file():
+            return path
+
+    for key in keys:
+        configured_paths = get_setting(configuration, key)
+
+        if isinstance(configured_paths, str):
+            configured_paths = [configured_paths]
+
+        for configured_path in configured_paths or []:
+            # Paths in configurations often point to wherever the model was trained, so only the file name is trusted
+            for path in (Path(configured_path), directory / Path(configured_path).name):
+                if path.is_file():
+                    return path
+
+    return None
+
+
+def read_names(path: Path) -> typing.List[str]:
+    """
+    Read the names of the speakers or languages in a file shipped with a model
+
+    Files map either names to IDs or audio clips to embeddings that carry the name of their speaker
+
+    :param path: The JSON or torch file to read
+    :return: Every name in the file, in the order the model knows them
+    """
+    if path.suffix == ".json":
+        with path.open() as name_file:
+            entries = json.load(name_file)
+    else:
+        # Only embeddings are stored in these files - they are a small fraction of the size of the model's weights
+        import torch
+        entries = torch.load(path, map_location="cpu")
+
+    if isinstance(entries, list):
+        return [str(entry) for entry in entries]
+
+    names: typing.Dict[str, None] = {}
+
+    for key, value in entries.items():
+        if isinstance(value, typing.Mapping) and "name" in value:
+            names[str(value["name"])] = None
+        else:
+            names[str(key)] = None
+
+    return list(names)
+
+
+@functools.lru_cache(maxsize=256)
+def read_model_metadata(
+    fullname: str,
+    directory: str,
+    modified_at: typing.Optional[int] = None
+) -> typing.Optional[ModelMetadata]:
+    """
+    Describe a downloaded model from the files in its directory
+
+    The modification time of the model's configuration is part of the key so that a model that was downloaded again
+    is read again rather than served from the cache.
+
+    :param fullname: The full name of the model, like 'tts_models/en/vctk/vits'
+    :param directory: The directory that the model was downloaded into
+    :param modified_at: When the model's configuration was last changed
+    :return: What the model can do. None if its configuration could not be read
+    """
+    model_directory = Path(directory)
+
+    try:
+        with (model_directory / CONFIG_FILE_NAME).open() as config_file:
+            configuration: typing.Dict[str, typing.Any] = json.load(config_file)
+    except (OSError, ValueError) as error:
+        _LOGGER.warning(f"Could not read the configuration for {fullname}: {error}")
+        return None
+
+    audio = configuration.get("audio") or {}
+    metadata = ModelMetadata(
+        fullname=fullname,
+        architecture=configuration.get("model"),
+        sample_rate=audio.get("output_sample_rate") or audio.get("sample_rate"),
+        languages=[str(language) for language in configuration.get("languages") or []],
+        speaker_count=get_setting(configuration, "num_speakers") or 0
+    )
+
+    speaker_file = find_file(model_directory, configuration, SPEAKER_FILE_NAMES, SPEAKER_FILE_KEYS)
+
+    if speaker_file is not None:
+        try:
+            metadata.speakers = read_names(speaker_file)
+        except NAME_FILE_ERRORS as error:
+            _LOGGER.warning(f"Could not read the speakers for {fullname} from {speaker_file}: {error}")
+
+    if not metadata.languages:
+        language_file = find_file(model_directory, configuration, LANGUAGE_FILE_NAMES, LANGUAGE_FILE_KEYS)
+
+        if language_file is not None:
+            try:
+                metadata.languages = read_names(language_file)
+            except NAME_FILE_ERRORS as error:
+                _LOGGER.warning(f"Could not read the languages for {fullname} from {language_file}: {error}")
+
+    return metadata
+
+
+def get_model_metadata(fullname: str, directory: Path) -> typing.Optional[ModelMetadata]:
+    """
+    Describe a downloaded model, reading its files only if they changed since they were last read
+
+    :param fullname: The full name of the model
+    :param directory: The directory that the model was downloaded into
+    :return: What the model can do. None if it has not been downloaded or its configuration could not be read
+    """
+    try:
+        modified_at = (directory / CONFIG_FILE_NAME).stat().st_mtime_ns
+    except OSError:
+        return None
+
+    return read_model_metadata(fullname, str(directory), modified_at)
+
+
+def list_known_models() -> typing.List[str]:
+    """
+    List every model that TTS knows how to download
+
+    The list is read straight from the manifest shipped with TTS so that TTS, and torch with it, isn't imported just
+    to name its models
+
+    :return: The full name of every model, like 'tts_models/en/vctk/vits'
+    """
+    specification = importlib.util.find_spec("TTS")
+    locations = list(specification.submodule_search_locations or []) if specification is not None else []
+
+    for location in locations:
+        try:
+            with (Path(location) / MODEL_MANIFEST_NAME).open() as manifest_file:
+                manifest: typing.Dict[str, typing.Any] = json.load(manifest_file)
+        except (OSError, ValueError):
+            continue
+
+        return [
+            f"{model_type}/{language}/{dataset}/{model_name}"
+            for model_type, languages in manifest.items()
+            for language, datasets in languages.items()
+            for dataset, models in datasets.items()
+            for model_name in models
+        ]
+
+    from TTS.api import TTS
+    return TTS.list_models()
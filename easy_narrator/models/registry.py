@@ -0,0 +1,152 @@
+"""
+Sets of names that request fields are validated against, such as the names of models and speakers
+
+Names are held in hashed sets so that checking a name takes the same time no matter how many there are. Each set is
+loaded the first time it is needed and may be reloaded without redefining the models that validate against it.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import threading
+import time
+import typing
+
+from pathlib import Path
+
+import pydantic
+
+from easy_narrator.application_details import MODEL_CATALOG_PATH
+from easy_narrator.application_details import MODEL_INDEX_REFRESH_INTERVAL
+from easy_narrator.application_details import RESOURCE_PATH
+
+
+class NameRegistry:
+    """
+    A set of valid names that is loaded on demand
+
+    When given a source file, the names are loaded again whenever that file changes. The file is checked no more
+    often than the refresh interval, so validation rarely touches the filesystem.
+    """
+    def __init__(
+        self,
+        description: str,
+        loader: typing.Callable[[], typing.Iterable[str]],
+        source: Path = None,
+        refresh_interval: float = None
+    ):
+        """
+        :param description: What the names are, like 'model' or 'VCTK speaker', for use in error messages
+        :param loader: Reads every valid name
+        :param source: A file whose changes mean that the names should be loaded again
+        :param refresh_interval: The fewest seconds between checks of the source. MODEL_INDEX_REFRESH_INTERVAL if
+            not given
+        """
+        self.__description = description
+        self.__loader = loader
+        self.__source = source
+        self.__refresh_interval = MODEL_INDEX_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        self.__lock = threading.Lock()
+        self.__names: typing.Optional[typing.FrozenSet[str]] = None
+        self.__source_modified_at: typing.Optional[int] = None
+        self.__checked_at = float("-inf")
+
+    @property
+    def description(self) -> str:
+        return self.__description
+
+    def __get_source_modification_time(self) -> typing.Optional[int]:
+        if self.__source is None:
+            return None
+
+        try:
+            return self.__source.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def __is_stale(self) -> bool:
+        if self.__names is None:
+            return True
+
+        if self.__source is None or time.monotonic() - self.__checked_at < self.__refresh_interval:
+            return False
+
+        self.__checked_at = time.monotonic()
+        return self.__get_source_modification_time() != self.__source_modified_at
+
+    @property
+    def names(self) -> typing.FrozenSet[str]:
+        if self.__is_stale():
+            with self.__lock:
+                if self.__names is None or self.__get_source_modification_time() != self.__source_modified_at:
+                    self.__source_modified_at = self.__get_source_modification_time()
+                    self.__names = frozenset(self.__loader())
+                    self.__checked_at = time.monotonic()
+        return self.__names
+
+    def reload(self):
+        """
+        Load the names again the next time they are needed, such as right after the catalog was written
+        """
+        with self.__lock:
+            self.__names = None
+
+    def validate(self, name: typing.Optional[str]) -> typing.Optional[str]:
+        """
+        Ensure that a name is one of the valid names
+
+        :param name: The name to check. Missing names are left for the field's own rules to judge
+        :raises ValueError: If the name isn't valid
+        :return: The name
+        """
+        if name is not None and name not in self.names:
+            raise ValueError(f"'{name}' is not a known {self.__description}")
+        return name
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({self.__description})"
+
+
+def read_speaker_ids(file_name: str) -> typing.List[str]:
+    """
+    Read the IDs of every speaker listed in a speaker CSV within the resource directory
+
+    :param file_name: The name of the CSV within the resource directory
+    :return: Each speaker's ID, in the order they are listed
+    """
+    with (RESOURCE_PATH / file_name).open(newline="") as speaker_file:
+        return [row["ID"] for row in csv.DictReader(speaker_file) if row.get("ID")]
+
+
+def read_model_names() -> typing.List[str]:
+    """
+    Read the names of every model that may be asked for
+
+    :return: The models in the catalog, or every model that TTS knows of if no catalog has been generated
+    """
+    if MODEL_CATALOG_PATH.exists():
+        with MODEL_CATALOG_PATH.open("r") as model_catalog_file:
+            return list(json.load(model_catalog_file).keys())
+
+    from .model_metadata import list_known_models
+    return list_known_models()
+
+
+MODEL_NAMES = NameRegistry("model", read_model_names, source=MODEL_CATALOG_PATH)
+"""The names of every model that may be asked for"""
+
+VCTK_SPEAKERS = NameRegistry("VCTK speaker", lambda: read_speaker_ids("vits_speakers.csv"))
+"""The speakers of the VCTK VITS model"""
+
+XTTS_V2_SPEAKERS = NameRegistry("XTTS v2 speaker", lambda: read_speaker_ids("xtts_v2_speakers.csv"))
+"""The built-in speakers of the XTTS v2 model"""
+
+ModelName = typing.Annotated[str, pydantic.AfterValidator(MODEL_NAMES.validate)]
+VCTKSpeaker = typing.Annotated[str, pydantic.AfterValidator(VCTK_SPEAKERS.validate)]
+XTTSv2Speaker = typing.Annotated[str, pydantic.AfterValidator(XTTS_V2_SPEAKERS.validate)]
@@ -1,2 +1,25 @@
 from .narration import generate_sound
-from .narration import break_down_sentences
\ No newline at end of file
+from .narration import stream_sound
+from .narration import break_down_sentences
+from .phrases import PhraseSpan
+from .phrases import PhraseType
+from .phrases import count_phrases
+from .phrases import iterate_sentences
+from .phrases import split_phrases
+from .executor import SynthesisExecutor
+from .audio_cache import PhraseAudioCache
+from .dispatch import PhraseDispatcher
+from .audio import Waveform
+from .encoding import AudioFormat
+from .encoding import DEFAULT_AUDIO_FORMAT
+from .encoding import encode_async
+from .encoding import get_supported_formats
+from .encoding import is_supported
+from .scheduler import SchedulingPriority
+from .scheduler import SynthesisScheduler
+from .normalization import TextNormalizer
+from .normalization import get_normalizer
+from .session import NarrationSession
+from .chunking import PhraseChunker
+from .chunking import SynthesisCostModel
+from .remote import RemoteWorkerPool
@@ -0,0 +1,134 @@
+"""
+In-memory representations of generated speech that avoid encoding and decoding audio containers between steps
+"""
+from __future__ import annotations
+
+import struct
+import typing
+
+from dataclasses import dataclass
+
+import numpy
+
+PCM_DTYPE = numpy.dtype("<i2")
+"""Samples are kept as little endian 16-bit signed integers, the same layout used within a PCM wav file"""
+
+_PCM_HEADER = struct.Struct("<I")
+"""The layout of the sample rate that precedes samples in the compact serialized form of a waveform"""
+
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+@dataclass(frozen=True)
+class Waveform:
+    """
+    Mono 16-bit PCM audio and the rate it should be played at
+    """
+    samples: numpy.ndarray
+    sample_rate: int
+
+    @classmethod
+    def from_float(cls, waveform: typing.Union[numpy.ndarray, typing.Sequence[float]], sample_rate: int) -> Waveform:
+        """
+        Convert the floating point output of a model into 16-bit PCM in a single vectorized step
+
+        The waveform is scaled so that its peak sits at full volume, matching how TTS writes wav files
+
+        :param waveform: Samples within [-1.0, 1.0]
+        :param sample_rate: The number of samples per second
+        :return: The converted waveform
+        """
+        floating_samples = numpy.asarray(waveform, dtype=numpy.float32).reshape(-1)
+        peak = float(numpy.abs(floating_samples).max()) if floating_samples.size else 0.0
+        scale = 32767 / max(0.01, peak)
+        return cls(samples=(floating_samples * scale).astype(PCM_DTYPE), sample_rate=int(sample_rate))
+
+    @classmethod
+    def from_bytes(cls, data: typing.Union[bytes, memoryview]) -> Waveform:
+        """
+        Read a waveform written by `to_bytes`
+
+        :raises ValueError: if the data is too short or doesn't hold a whole number of samples
+        """
+        if len(data) < _PCM_HEADER.size or (len(data) - _PCM_HEADER.size) % PCM_DTYPE.itemsize:
+            raise ValueError(f"Cannot read a waveform from {len(data)} bytes - the data is truncated")
+
+        sample_rate, = _PCM_HEADER.unpack_from(data)
+        samples = numpy.frombuffer(data, dtype=PCM_DTYPE, offset=_PCM_HEADER.size)
+        return cls(samples=samples, sample_rate=sample_rate)
+
+    @classmethod
+    def concatenate(cls, waveforms: typing.Sequence[Waveform], pause: float = 0.0) -> Waveform:
+        """
+        Stitch several waveforms of the same sample rate together
+
+        :param waveforms: The waveforms to join, in order
+        :param pause: Seconds of silence to place between each waveform
+        :return: A single waveform
+        """
+        if not waveforms:
+            raise ValueError("Cannot concatenate waveforms - none were given")
+
+        sample_rate = waveforms[0].sample_rate
+
+        if any(waveform.sample_rate != sample_rate for waveform in waveforms):
+            raise ValueError("Cannot concatenate waveforms that were generated at different sample rates")
+
+        parts: typing.List[numpy.ndarray] = []
+        silence = numpy.zeros(int(pause * sample_rate), dtype=PCM_DTYPE)
+
+        for index, waveform in enumerate(waveforms):
+            if index and silence.size:
+                parts.append(silence)
+            parts.append(waveform.samples)
+
+        return cls(samples=numpy.concatenate(parts), sample_rate=sample_rate)
+
+    def resample(self, sample_rate: int) -> Waveform:
+        """
+        Linearly interpolate the waveform onto a different sample rate
+        """
+        if sample_rate == self.sample_rate or not self.samples.size:
+            return self
+
+        sample_count = int(round(self.samples.shape[0] * sample_rate / self.sample_rate))
+        original_positions = numpy.arange(self.samples.shape[0], dtype=numpy.float64)
+        new_positions = numpy.linspace(0, self.samples.shape[0] - 1, num=sample_count)
+        samples = numpy.interp(new_positions, original_positions, self.samples).astype(PCM_DTYPE)
+        return Waveform(samples=samples, sample_rate=sample_rate)
+
+    @property
+    def nbytes(self) -> int:
+        return self.samples.nbytes
+
+    @property
+    def duration(self) -> float:
+        return self.samples.shape[0] / self.sample_rate if self.sample_rate else 0.0
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the waveform as its sample rate followed by its raw samples
+        """
+        return _PCM_HEADER.pack(self.sample_rate) + self.samples.tobytes()
+
+    def to_wav(self) -> bytes:
+        """
+        Encode the waveform as a mono 16-bit PCM wav file
+        """
+        data_size = self.samples.nbytes
+        header = _WAV_HEADER.pack(
+            b"RIFF",
+            36 + data_size,
+            b"WAVE",
+            b"fmt ",
+            16,
+            1,
+            1,
+            self.sample_rate,
+            self.sample_rate * PCM_DTYPE.itemsize,
+            PCM_DTYPE.itemsize,
+            PCM_DTYPE.itemsize * 8,
+            b"data",
+            data_size
+        )
+        return header + self.samples.tobytes()
@@ -0,0 +1,337 @@
+"""
+A content-addressed cache of generated phrase audio, held in memory and on disk
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import typing
+
+from collections import OrderedDict
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+
+from easy_narrator.application_details import PHRASE_CACHE_PATH
+from easy_narrator.application_details import PHRASE_CACHE_MEMORY_LIMIT
+from easy_narrator.application_details import PHRASE_CACHE_DISK_LIMIT
+from easy_narrator.application_logging import get_logger
+
+from .audio import Waveform
+
+_LOGGER = get_logger()
+
+AUDIO_SUFFIX = ".pcm"
+
+
+def normalize_phrase(content: str) -> str:
+    """
+    Reduce a phrase to the form that determines how it sounds so that trivially different text shares audio
+    """
+    return " ".join(content.split())
+
+
+@dataclass
+class PhraseCacheStatistics:
+    """
+    Counts describing how well the phrase cache is serving requests
+    """
+    memory_hits: int = field(default=0)
+    disk_hits: int = field(default=0)
+    misses: int = field(default=0)
+    memory_evictions: int = field(default=0)
+    disk_evictions: int = field(default=0)
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def dict(self) -> typing.Dict[str, typing.Union[int, float]]:
+        statistics = asdict(self)
+        statistics.update(hits=self.hits, hit_rate=self.hit_rate)
+        return statistics
+
+
+class PhraseAudioCache:
+    """
+    A two tier least-recently-used cache of phrase audio keyed on the phrase and everything that affects how it sounds
+
+    The in-memory tier is bounded by bytes and lost on restart. The on-disk tier is bounded by bytes and survives
+    restarts; files are touched when read so that their modification times track how recently they were used.
+    """
+    __instance: PhraseAudioCache = None
+    __instance_lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> PhraseAudioCache:
+        if cls.__instance is None:
+            with cls.__instance_lock:
+                if cls.__instance is None:
+                    cls.__instance = cls()
+        return cls.__instance
+
+    @staticmethod
+    def create_key(content: str, model_name: str, arguments: typing.Mapping[str, typing.Any] = None) -> str:
+        """
+        Create a key that identifies the audio for a phrase
+
+        :param content: The text of the phrase
+        :param model_name: The name of the model speaking the phrase
+        :param arguments: Everything else that affects how the phrase sounds, such as speaker, language, and speed
+        :return: A hex digest identifying the audio
+        """
+        description = json.dumps(
+            {
+                "text": normalize_phrase(content),
+                "model": model_name,
+                "arguments": {
+                    name: value
+                    for name, value in (arguments or {}).items()
+                    if value is not None
+                }
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def __init__(self, directory: Path = None, memory_limit: int = None, disk_limit: int = None):
+        """
+        :param directory: Where audio should be written. PHRASE_CACHE_PATH if not given
+        :param memory_limit: The most bytes to hold in memory. PHRASE_CACHE_MEMORY_LIMIT if not given
+        :param disk_limit: The most bytes to hold on disk. PHRASE_CACHE_DISK_LIMIT if not given
+        """
+        self.__directory = Path(directory or PHRASE_CACHE_PATH)
+        self.__memory_limit = PHRASE_CACHE_MEMORY_LIMIT if memory_limit is None else memory_limit
+        self.__disk_limit = PHRASE_CACHE_DISK_LIMIT if disk_limit is None else disk_limit
+        self.__lock = threading.RLock()
+        self.__statistics = PhraseCacheStatistics()
+
+        self.__memory: typing.OrderedDict[str, Waveform] = OrderedDict()
+        self.__memory_size = 0
+
+        self.__disk: typing.OrderedDict[str, int] = OrderedDict()
+        self.__disk_size = 0
+
+        if self.__disk_limit:
+            self.__index_disk()
+
+    def __index_disk(self):
+        """
+        Record what is already on disk, ordered from least to most recently used
+        """
+        try:
+            self.__directory.mkdir(parents=True, exist_ok=True)
+        except OSError as error:
+            _LOGGER.warning(f"Phrase audio will not be cached on disk - {self.__directory} is unavailable: {error}")
+            self.__disk_limit = 0
+            return
+
+        entries = []
+
+        for path in self.__directory.glob(f"*{AUDIO_SUFFIX}"):
+            try:
+                status = path.stat()
+            except OSError:
+                continue
+            entries.append((status.st_mtime, path.stem, status.st_size))
+
+        for _, key, size in sorted(entries):
+            self.__disk[key] = size
+            self.__disk_size += size
+
+        self.__remove_from_disk(self.__trim_disk())
+
+    def __get_path(self, key: str) -> Path:
+        return self.__directory / f"{key}{AUDIO_SUFFIX}"
+
+    @property
+    def statistics(self) -> PhraseCacheStatistics:
+        return self.__statistics
+
+    @property
+    def memory_size(self) -> int:
+        return self.__memory_size
+
+    @property
+    def disk_size(self) -> int:
+        return self.__disk_size
+
+    def get_from_memory(self, key: str) -> typing.Optional[Waveform]:
+        """
+        Get previously generated audio only if it is held in memory
+
+        Nothing is read from disk, so this is safe to call from the event loop. Nothing is counted as a miss since
+        the caller is expected to follow up with `get`.
+
+        :param key: The key created by `create_key`
+        :return: The audio if it is in memory
+        """
+        with self.__lock:
+            audio = self.__memory.get(key)
+
+            if audio is not None:
+                self.__memory.move_to_end(key)
+                self.__statistics.memory_hits += 1
+
+            return audio
+
+    def get(self, key: str) -> typing.Optional[Waveform]:
+        """
+        Get previously generated audio
+
+        Audio that is only on disk is read from it, so this is best called from a thread
+
+        :param key: The key created by `create_key`
+        :return: The audio if it has been cached
+        """
+        with self.__lock:
+            if key in self.__memory:
+                self.__memory.move_to_end(key)
+                self.__statistics.memory_hits += 1
+                return self.__memory[key]
+
+            if key not in self.__disk:
+                self.__statistics.misses += 1
+                return None
+
+        path = self.__get_path(key)
+
+        # The file is read without holding the lock so that lookups in memory never wait on the disk
+        try:
+            audio = Waveform.from_bytes(path.read_bytes())
+            os.utime(path)
+        except (OSError, ValueError) as error:
+            _LOGGER.warning(f"Could not read cached audio from {path}; it will be removed: {error}")
+
+            with self.__lock:
+                if key in self.__disk:
+                    self.__disk_size -= self.__disk.pop(key)
+                self.__statistics.misses += 1
+
+            # A damaged file would otherwise be found and fail again the next time the cache is indexed
+            self.__remove_from_disk([key])
+            return None
+
+        with self.__lock:
+            if key in self.__disk:
+                self.__disk.move_to_end(key)
+            self.__statistics.disk_hits += 1
+            self.__remember(key, audio)
+
+        return audio
+
+    def put(self, key: str, audio: Waveform):
+        """
+        Store generated audio in every enabled tier
+
+        Audio may be written to disk, so this is best called from a thread
+
+        :param key: The key created by `create_key`
+        :param audio: The generated audio
+        """
+        with self.__lock:
+            self.__remember(key, audio)
+
+            if not self.__disk_limit or key in self.__disk or audio.nbytes > self.__disk_limit:
+                return
+
+        path = self.__get_path(key)
+        temporary_path = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp")
+        data = audio.to_bytes()
+
+        try:
+            self.__directory.mkdir(parents=True, exist_ok=True)
+            temporary_path.write_bytes(data)
+            temporary_path.replace(path)
+        except OSError as error:
+            _LOGGER.warning(f"Could not write cached audio to {path}: {error}")
+            temporary_path.unlink(missing_ok=True)
+            return
+
+        with self.__lock:
+            if key not in self.__disk:
+                self.__disk[key] = len(data)
+                self.__disk_size += len(data)
+            evicted_keys = self.__trim_disk()
+
+        self.__remove_from_disk(evicted_keys)
+
+    def __remember(self, key: str, audio: Waveform):
+        if not self.__memory_limit or audio.nbytes > self.__memory_limit:
+            return
+
+        if key in self.__memory:
+            self.__memory.move_to_end(key)
+            return
+
+        self.__memory[key] = audio
+        self.__memory_size += audio.nbytes
+
+        while self.__memory_size > self.__memory_limit:
+            _, evicted_audio = self.__memory.popitem(last=False)
+            self.__memory_size -= evicted_audio.nbytes
+            self.__statistics.memory_evictions += 1
+
+    def __trim_disk(self) -> typing.List[str]:
+        """
+        Forget the least recently used audio on disk until the disk tier is within its limit
+
+        :return: The keys whose files should be removed once the lock is released
+        """
+        evicted_keys = []
+
+        while self.__disk_size > self.__disk_limit and self.__disk:
+            key, size = self.__disk.popitem(last=False)
+            self.__disk_size -= size
+            self.__statistics.disk_evictions += 1
+            evicted_keys.append(key)
+
+        return evicted_keys
+
+    def __remove_from_disk(self, keys: typing.Iterable[str]):
+        for key in keys:
+            try:
+                self.__get_path(key).unlink(missing_ok=True)
+            except OSError as error:
+                _LOGGER.warning(f"Could not remove cached audio for {key}: {error}")
+
+    def clear(self):
+        """
+        Remove everything from both tiers
+        """
+        with self.__lock:
+            self.__memory.clear()
+            self.__memory_size = 0
+
+            removed_keys = list(self.__disk)
+            self.__disk.clear()
+            self.__disk_size = 0
+
+        # Files are removed after the lock is released so that lookups and writes from other threads never wait on them
+        self.__remove_from_disk(removed_keys)
+
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        with self.__lock:
+            return {
+                "statistics": self.__statistics.dict(),
+                "memory": {
+                    "entries": len(self.__memory),
+                    "bytes": self.__memory_size,
+                    "limit": self.__memory_limit
+                },
+                "disk": {
+                    "entries": len(self.__disk),
+                    "bytes": self.__disk_size,
+                    "limit": self.__disk_limit,
+                    "path": str(self.__directory)
+                }
+            }
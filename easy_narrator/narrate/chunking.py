@@ -0,0 +1,302 @@
+"""
+Reshapes phrases into chunks of the length that each model speaks most efficiently
+
+How long a model takes to speak text is measured as it runs. The measurements are fit to a curve with a fixed cost
+per call, a cost per character, and a cost that grows with the square of the length of the input, which is where
+autoregressive decoders lose their time. The length that minimizes the cost per character is used as the target for
+that model: long phrases are split at sentence and clause boundaries and short phrases are merged.
+
+A model's target is fit once and then kept for the life of the process. Chunk boundaries decide the text of each
+phrase, so a target that kept drifting would keep missing the phrase cache and the phrases saved in a session.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+import typing
+
+from collections import deque
+from dataclasses import dataclass
+
+import numpy
+
+from easy_narrator.application_details import CHUNK_TARGET_LENGTH
+from easy_narrator.application_details import CHUNK_MINIMUM_LENGTH
+from easy_narrator.application_details import CHUNK_MAXIMUM_LENGTH
+from easy_narrator.application_details import FIRST_CHUNK_LENGTH
+from easy_narrator.application_logging import get_logger
+
+from .phrases import PhraseSpan
+from .phrases import PhraseType
+
+_LOGGER = get_logger()
+
+BOUNDARY_PATTERNS: typing.Sequence[re.Pattern] = (
+    re.compile(r"[.!?]+[\"')\]]*\s+"),
+    re.compile(r"[,;:]\s+|\s+[-–—]+\s+"),
+    re.compile(r"\s+"),
+)
+"""Places where a phrase may be split, from the most natural place to pause to the least"""
+
+MINIMUM_SAMPLES = 16
+"""The number of different phrase lengths a model must be measured at before its target length is tuned"""
+
+SAMPLE_LIMIT = 256
+"""The number of the most recent measurements kept for each model"""
+
+
+@dataclass(frozen=True)
+class ChunkLengths:
+    """
+    The lengths, in characters, that phrases should be shaped into
+    """
+    target: int
+    minimum: int
+    maximum: int
+    first: int
+
+    @classmethod
+    def default(cls) -> ChunkLengths:
+        return cls(
+            target=CHUNK_TARGET_LENGTH,
+            minimum=CHUNK_MINIMUM_LENGTH,
+            maximum=CHUNK_MAXIMUM_LENGTH,
+            first=FIRST_CHUNK_LENGTH
+        )
+
+
+class SynthesisCostModel:
+    """
+    Measures how long each model takes to speak text of different lengths and decides the best length to give it
+    """
+    __instance: SynthesisCostModel = None
+    __instance_lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> SynthesisCostModel:
+        if cls.__instance is None:
+            with cls.__instance_lock:
+                if cls.__instance is None:
+                    cls.__instance = cls()
+        return cls.__instance
+
+    def __init__(self, defaults: ChunkLengths = None):
+        """
+        :param defaults: The lengths to use for models that have not been measured enough to be tuned
+        """
+        self.__defaults = defaults or ChunkLengths.default()
+        self.__lock = threading.Lock()
+        self.__samples: typing.Dict[str, typing.Deque[typing.Tuple[int, float]]] = {}
+        self.__targets: typing.Dict[str, int] = {}
+        self.__unreported: typing.Deque[typing.Tuple[str, int, float]] = deque(maxlen=SAMPLE_LIMIT)
+
+    def __add(self, model_name: str, characters: int, seconds: float):
+        # Tuned targets are never refit since every change moves the chunk boundaries of the texts being read
+        if characters <= 0 or seconds <= 0 or model_name in self.__targets:
+            return
+
+        samples = self.__samples.setdefault(model_name, deque(maxlen=SAMPLE_LIMIT))
+        samples.append((characters, seconds))
+
+        # The fit is only made once, so it waits until it can see how the cost changes across many lengths
+        if len({length for length, _ in samples}) >= MINIMUM_SAMPLES:
+            target = self.__fit(samples)
+
+            if target is not None:
+                self.__targets[model_name] = target
+                _LOGGER.info(f"Chunks for {model_name} will be shaped to {target} characters")
+
+    def record(self, model_name: str, characters: int, seconds: float):
+        """
+        Record how long a model took to speak a phrase
+
+        :param model_name: The name of the model that spoke
+        :param characters: The length of the phrase
+        :param seconds: How long it took to speak
+        """
+        with self.__lock:
+            self.__add(model_name, characters, seconds)
+            self.__unreported.append((model_name, characters, seconds))
+
+    def take_measurements(self) -> typing.List[typing.Tuple[str, int, float]]:
+        """
+        Get every measurement recorded since this was last called so that it may be shared with another process
+        """
+        with self.__lock:
+            measurements = list(self.__unreported)
+            self.__unreported.clear()
+        return measurements
+
+    def merge(self, measurements: typing.Iterable[typing.Tuple[str, int, float]]):
+        """
+        Add measurements that were taken in another process
+
+        Merged measurements are reported onward as well so that they reach the server when this process is a worker
+        """
+        with self.__lock:
+            for model_name, characters, seconds in measurements:
+                self.__add(model_name, characters, seconds)
+                self.__unreported.append((model_name, characters, seconds))
+
+    def __fit(self, samples: typing.Collection[typing.Tuple[int, float]]) -> typing.Optional[int]:
+        lengths = numpy.array([length for length, _ in samples], dtype=float)
+        durations = numpy.array([duration for _, duration in samples], dtype=float)
+
+        # A curve can't be fit through measurements that all have the same length, so wait for more varied ones
+        if numpy.ptp(lengths) < self.__defaults.minimum:
+            return None
+
+        quadratic, linear, overhead = numpy.polyfit(lengths, durations, deg=2)
+
+        # Seconds per character is overhead / n + linear + quadratic * n, which is smallest at sqrt(overhead / quadratic)
+        if quadratic <= 0:
+            target = self.__defaults.maximum
+        elif overhead <= 0:
+            target = self.__defaults.minimum
+        else:
+            target = math.sqrt(overhead / quadratic)
+
+        return int(min(max(target, self.__defaults.minimum), self.__defaults.maximum))
+
+    def get_target_length(self, model_name: str) -> int:
+        """
+        Get the number of characters that a model speaks most efficiently
+
+        :param model_name: The name of the model
+        :return: The tuned length for the model, or the default if it hasn't been measured enough
+        """
+        with self.__lock:
+            return self.__targets.get(model_name, self.__defaults.target)
+
+    def get_lengths(self, model_name: str) -> ChunkLengths:
+        """
+        Get the lengths that phrases for a model should be shaped into
+        """
+        target = self.get_target_length(model_name)
+        return ChunkLengths(
+            target=target,
+            minimum=min(self.__defaults.minimum, target),
+            maximum=max(self.__defaults.maximum, target),
+            first=min(self.__defaults.first, target)
+        )
+
+    def dict(self) -> typing.Dict[str, typing.Dict[str, typing.Union[int, bool]]]:
+        with self.__lock:
+            return {
+                model_name: {
+                    "samples": len(samples),
+                    "tuned": model_name in self.__targets,
+                    "target_length": self.__targets.get(model_name, self.__defaults.target)
+                }
+                for model_name, samples in self.__samples.items()
+            }
+
+
+class PhraseChunker:
+    """
+    Splits long phrases and merges short ones so that each is close to a target length
+
+    Chunks are spans over the original text, just like the phrases they came from. Headers are left alone. The
+    lengths are fixed when the chunker is created so that counting the chunks in a text and reading them agree.
+    """
+    @classmethod
+    def for_model(cls, model_name: str, short_start: bool = True) -> PhraseChunker:
+        """
+        Create a chunker tuned to the given model
+
+        :param model_name: The name of the model that will speak the chunks
+        :param short_start: Whether the first chunk should be cut short so that audio starts quickly
+        """
+        return cls(SynthesisCostModel.get_instance().get_lengths(model_name), short_start=short_start)
+
+    def __init__(self, lengths: ChunkLengths = None, short_start: bool = True):
+        """
+        :param lengths: The lengths to shape phrases into. The defaults if not given
+        :param short_start: Whether the first chunk should be cut short so that audio starts quickly
+        """
+        self.__lengths = lengths or ChunkLengths.default()
+        self.__short_start = short_start
+
+    @property
+    def lengths(self) -> ChunkLengths:
+        return self.__lengths
+
+    def __find_cut(self, text: str, start: int, end: int, target: int) -> int:
+        """
+        Find where to end a chunk that begins at `start`, as close to `start + target` as the text allows
+        """
+        earliest = start + min(self.__lengths.minimum, target)
+        latest = min(end, start + max(self.__lengths.maximum, target))
+        ideal = start + target
+
+        for pattern in BOUNDARY_PATTERNS:
+            best_cut = None
+
+            for boundary in pattern.finditer(text, earliest, latest):
+                if best_cut is not None and abs(boundary.end() - ideal) > abs(best_cut - ideal):
+                    break
+                best_cut = boundary.end()
+
+            if best_cut is not None:
+                return best_cut
+
+        return latest
+
+    def __split(self, text: str, span: PhraseSpan, first: bool) -> typing.Iterator[PhraseSpan]:
+        start = span.start
+        target = self.__lengths.first if first and self.__short_start else self.__lengths.target
+
+        while span.end - start > target + self.__lengths.minimum or span.end - start > self.__lengths.maximum:
+            cut = self.__find_cut(text, start, span.end, target)
+            chunk_end = cut
+
+            while chunk_end > start and text[chunk_end - 1].isspace():
+                chunk_end -= 1
+
+            yield PhraseSpan(span.phrase_type, start, chunk_end)
+
+            start = cut
+            target = self.__lengths.target
+
+        if start < span.end:
+            yield PhraseSpan(span.phrase_type, start, span.end)
+
+    def chunk(self, text: str, spans: typing.Iterable[PhraseSpan]) -> typing.Iterator[PhraseSpan]:
+        """
+        Reshape phrases into chunks
+
+        :param text: The text that the phrases were found in
+        :param spans: The phrases in the text
+        :return: Chunks of the text, in order
+        """
+        pending: typing.Optional[PhraseSpan] = None
+        is_first = True
+
+        for span in spans:
+            if span.phrase_type != PhraseType.CONTENT:
+                if pending is not None:
+                    yield pending
+                    pending = None
+                yield span
+                is_first = False
+                continue
+
+            for piece in self.__split(text, span, is_first):
+                if is_first:
+                    # The first chunk is kept short rather than grown so that audio starts as quickly as possible
+                    yield piece
+                    is_first = False
+                elif pending is None:
+                    pending = piece
+                elif (
+                    pending.end - pending.start < self.__lengths.minimum
+                    and piece.end - pending.start <= self.__lengths.target
+                ):
+                    pending = PhraseSpan(PhraseType.CONTENT, pending.start, piece.end)
+                else:
+                    yield pending
+                    pending = piece
+
+        if pending is not None:
+            yield pending
@@ -0,0 +1,176 @@
+"""
+Hands the phrases that the scheduler releases to the synthesis executor
+
+Coqui models have no batched forward pass, so phrases are never held back to be grouped with others. Each phrase is
+synthesized on its own and delivered the moment its audio is ready, which keeps one bad phrase from failing its
+neighbours. Identical phrases requested at the same time share a single synthesis.
+
+How many phrases each model may work on at once is decided by the scheduler alone; everything handed to the dispatcher
+is sent to the executor right away.
+"""
+from __future__ import annotations
+
+import asyncio
+import typing
+
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+
+from easy_narrator.application_logging import get_logger
+from easy_narrator.models import NarratorConfiguration
+
+from .audio import Waveform
+from .executor import SynthesisExecutor
+
+if typing.TYPE_CHECKING:
+    from .remote import RemoteWorkerPool
+
+_LOGGER = get_logger()
+
+VoiceKey = typing.Tuple[str, typing.Tuple[typing.Tuple[str, typing.Any], ...]]
+"""The name of a model paired with the arguments that determine the voice it speaks with"""
+
+PhraseKey = typing.Tuple[VoiceKey, str]
+"""A model and voice paired with the text they should speak"""
+
+
+def get_voice_key(model_configuration: NarratorConfiguration) -> VoiceKey:
+    """
+    Get a key shared by every configuration that speaks with the same model and voice
+    """
+    arguments = model_configuration.get_arguments()
+    return model_configuration.name, tuple(sorted((name, str(value)) for name, value in arguments.items()))
+
+
+@dataclass
+class PendingPhrase:
+    """
+    A phrase waiting to be synthesized along with where its audio should be delivered
+    """
+    content: str
+    result: asyncio.Future
+    waiters: int = field(default=0)
+    """The number of requesters still waiting on this phrase"""
+
+
+@dataclass
+class DispatchStatistics:
+    """
+    Counts describing how phrases are being handed to the synthesis executor
+    """
+    phrases: int = field(default=0)
+    """Every phrase that was asked for"""
+    synthesized: int = field(default=0)
+    """Phrases that were sent to the executor"""
+    shared: int = field(default=0)
+    """Phrases that were answered by an identical phrase that was already being synthesized"""
+    abandoned: int = field(default=0)
+    """Phrases that were dropped because every requester gave up before they reached the executor"""
+    failures: int = field(default=0)
+
+    def dict(self) -> typing.Dict[str, typing.Union[int, float]]:
+        return asdict(self)
+
+
+class PhraseDispatcher:
+    """
+    Sends phrases headed for the same model, regardless of which request they came from, to the synthesis executor
+
+    Every phrase is its own unit of work, so its audio is delivered as soon as it is ready and a failure only
+    affects the requesters of that one phrase.
+    """
+    __instance: PhraseDispatcher = None
+
+    @classmethod
+    def get_instance(cls) -> PhraseDispatcher:
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @classmethod
+    def configure(cls, executor: typing.Union[SynthesisExecutor, RemoteWorkerPool] = None) -> PhraseDispatcher:
+        cls.__instance = cls(executor=executor)
+        return cls.__instance
+
+    def __init__(self, executor: typing.Union[SynthesisExecutor, RemoteWorkerPool] = None):
+        """
+        :param executor: Where phrases are synthesized, either locally or on remote workers.
+            The shared SynthesisExecutor if not given
+        """
+        self.__executor = executor
+        self.__pending: typing.Dict[PhraseKey, PendingPhrase] = {}
+        self.__statistics = DispatchStatistics()
+
+    @property
+    def executor(self) -> typing.Union[SynthesisExecutor, RemoteWorkerPool]:
+        return self.__executor or SynthesisExecutor.get_instance()
+
+    @property
+    def statistics(self) -> DispatchStatistics:
+        return self.__statistics
+
+    @property
+    def pending_phrase_count(self) -> int:
+        return len(self.__pending)
+
+    async def synthesize(self, model_configuration: NarratorConfiguration, content: str) -> Waveform:
+        """
+        Synthesize a phrase, sharing the work with anyone already waiting on the same phrase in the same voice
+
+        :param model_configuration: Details on HOW the phrase should be turned into speech
+        :param content: The text of the phrase
+        :return: The audio for the phrase
+        """
+        key = (get_voice_key(model_configuration), content)
+        phrase = self.__pending.get(key)
+        self.__statistics.phrases += 1
+
+        if phrase is None:
+            phrase = PendingPhrase(content=content, result=asyncio.get_running_loop().create_future())
+            self.__pending[key] = phrase
+            asyncio.ensure_future(self.__run(model_configuration, key, phrase))
+        else:
+            self.__statistics.shared += 1
+
+        phrase.waiters += 1
+
+        try:
+            # Shielded so that one requester giving up doesn't take the audio away from the others
+            return await asyncio.shield(phrase.result)
+        finally:
+            phrase.waiters -= 1
+
+    async def __run(self, model_configuration: NarratorConfiguration, key: PhraseKey, phrase: PendingPhrase):
+        try:
+            # Requesters may have given up before this job got started
+            if phrase.waiters == 0:
+                self.__statistics.abandoned += 1
+                phrase.result.cancel()
+                return
+
+            self.__statistics.synthesized += 1
+            sound = await self.executor.synthesize(model_configuration, phrase.content)
+
+            if not phrase.result.done():
+                phrase.result.set_result(sound)
+        except asyncio.CancelledError:
+            phrase.result.cancel()
+            raise
+        except Exception as error:
+            self.__statistics.failures += 1
+            _LOGGER.error(f"Could not synthesize a phrase with {model_configuration.name}: {error}", exc_info=error)
+
+            # An error left on a future that nobody awaits anymore would be reported again as never retrieved
+            if phrase.waiters and not phrase.result.done():
+                phrase.result.set_exception(error)
+            else:
+                phrase.result.cancel()
+        finally:
+            self.__pending.pop(key, None)
+
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "pending_phrases": self.pending_phrase_count,
+            "statistics": self.__statistics.dict()
+        }
@@ -0,0 +1,144 @@
+"""
+Encodes generated speech into the audio formats that clients may ask for
+
+Compressed formats require the optional `soundfile` package and a libsndfile build that supports them
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import io
+import typing
+
+from dataclasses import dataclass
+from dataclasses import field
+
+from easy_narrator.application_logging import get_logger
+
+from .audio import Waveform
+
+_LOGGER = get_logger()
+
+AudioFormat = typing.Literal["wav", "flac", "ogg", "opus"]
+
+DEFAULT_AUDIO_FORMAT: AudioFormat = "wav"
+
+
+@dataclass(frozen=True)
+class AudioEncoding:
+    """
+    How to write a specific audio format with libsndfile
+    """
+    name: str
+    container: typing.Optional[str]
+    subtype: typing.Optional[str]
+    content_type: str
+    sample_rates: typing.Tuple[int, ...] = field(default=tuple())
+    """Sample rates that the format supports. Any sample rate is allowed if empty"""
+
+    def get_sample_rate(self, sample_rate: int) -> int:
+        """
+        Get the supported sample rate closest to, but not below, the given rate where possible
+        """
+        if not self.sample_rates or sample_rate in self.sample_rates:
+            return sample_rate
+
+        higher_rates = [rate for rate in self.sample_rates if rate >= sample_rate]
+        return min(higher_rates) if higher_rates else max(self.sample_rates)
+
+
+AUDIO_ENCODINGS: typing.Mapping[str, AudioEncoding] = {
+    "wav": AudioEncoding(name="wav", container=None, subtype=None, content_type="audio/wav"),
+    "flac": AudioEncoding(name="flac", container="FLAC", subtype="PCM_16", content_type="audio/flac"),
+    "ogg": AudioEncoding(name="ogg", container="OGG", subtype="VORBIS", content_type="audio/ogg"),
+    "opus": AudioEncoding(
+        name="opus",
+        container="OGG",
+        subtype="OPUS",
+        content_type="audio/ogg; codecs=opus",
+        sample_rates=(8000, 12000, 16000, 24000, 48000)
+    ),
+}
+
+
+@functools.lru_cache(maxsize=1)
+def get_supported_formats() -> typing.Sequence[str]:
+    """
+    Get the names of every audio format that this server is able to produce
+    """
+    supported_formats = [DEFAULT_AUDIO_FORMAT]
+
+    try:
+        import soundfile
+    except ImportError:
+        _LOGGER.info("The soundfile package is not installed; narration audio may only be sent as wav")
+        return supported_formats
+
+    available_containers = soundfile.available_formats()
+
+    for name, encoding in AUDIO_ENCODINGS.items():
+        if encoding.container is None:
+            continue
+
+        if encoding.container in available_containers \
+                and encoding.subtype in soundfile.available_subtypes(encoding.container):
+            supported_formats.append(name)
+
+    return supported_formats
+
+
+def is_supported(audio_format: typing.Optional[str]) -> bool:
+    return audio_format in get_supported_formats()
+
+
+def encode(waveform: Waveform, audio_format: str = None) -> bytes:
+    """
+    Encode a waveform in the given audio format
+
+    :param waveform: The audio to encode
+    :param audio_format: The name of the format to encode the audio in. wav if not given
+    :return: The encoded audio
+    """
+    audio_format = audio_format or DEFAULT_AUDIO_FORMAT
+
+    if not is_supported(audio_format):
+        raise ValueError(
+            f"Cannot encode audio as '{audio_format}' - "
+            f"only {', '.join(get_supported_formats())} are supported on this server"
+        )
+
+    encoding = AUDIO_ENCODINGS[audio_format]
+
+    if encoding.container is None:
+        return waveform.to_wav()
+
+    import soundfile
+
+    waveform = waveform.resample(encoding.get_sample_rate(waveform.sample_rate))
+    buffer = io.BytesIO()
+    soundfile.write(
+        buffer,
+        waveform.samples,
+        samplerate=waveform.sample_rate,
+        format=encoding.container,
+        subtype=encoding.subtype
+    )
+    return buffer.getvalue()
+
+
+async def encode_async(waveform: Waveform, audio_format: str = None) -> bytes:
+    """
+    Encode a waveform without blocking the event loop
+
+    Uncompressed audio is cheap enough to produce on the loop; everything else is handed to a worker thread
+
+    :param waveform: The audio to encode
+    :param audio_format: The name of the format to encode the audio in. wav if not given
+    :return: The encoded audio
+    """
+    encoding = AUDIO_ENCODINGS.get(audio_format or DEFAULT_AUDIO_FORMAT)
+
+    if encoding is None or encoding.container is None:
+        return encode(waveform, audio_format)
+
+    return await asyncio.to_thread(encode, waveform, audio_format)
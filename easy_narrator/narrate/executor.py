@@ -0,0 +1,236 @@
+"""
+Runs blocking speech synthesis away from the event loop so that the server may keep responding while audio is generated
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import typing
+
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from easy_narrator.application_details import SYNTHESIS_WORKER_COUNT
+from easy_narrator.application_details import SYNTHESIS_PROCESS_COUNT
+from easy_narrator.application_details import TORCH_THREADS_PER_WORKER
+from easy_narrator.application_logging import get_logger
+
+if typing.TYPE_CHECKING:
+    from easy_narrator.models import NarratorConfiguration
+    from .audio import Waveform
+
+_LOGGER = get_logger()
+
+_RESULT = typing.TypeVar("_RESULT")
+
+
+def set_torch_threads(thread_count: int):
+    """
+    Limit how many threads torch may use for inference in this process
+
+    :param thread_count: The most threads torch may use. Nothing is changed if this is 0
+    """
+    if not thread_count:
+        return
+
+    try:
+        import torch
+    except ImportError:
+        return
+
+    torch.set_num_threads(thread_count)
+
+
+def initialize_worker(torch_threads: int):
+    """
+    Prepare a newly started synthesis process
+    """
+    set_torch_threads(torch_threads)
+    _LOGGER.debug(f"Synthesis process {os.getpid()} started with {torch_threads or 'the default number of'} torch threads")
+
+
+def call_in_worker(
+    function: typing.Callable[..., _RESULT],
+    args: typing.Sequence,
+    kwargs: typing.Mapping[str, typing.Any]
+) -> typing.Tuple[_RESULT, typing.Sequence[typing.Tuple[str, int, float]]]:
+    """
+    Call a function within a synthesis process
+
+    Costs measured in the process are sent back with the result so that the server can tune chunk lengths
+
+    :return: The result of the function and every synthesis cost measured since the last call
+    """
+    from .chunking import SynthesisCostModel
+    result = function(*args, **kwargs)
+    return result, SynthesisCostModel.get_instance().take_measurements()
+
+
+class SynthesisExecutor:
+    """
+    A process-wide pool of workers dedicated to generating speech
+
+    Workers are threads within the server by default. When given a process count, speech is generated in that many
+    worker processes instead, each with its own interpreter, its own models, and its own share of the CPU, so that
+    concurrent requests aren't held to a single core by the GIL. Processes that crash are replaced.
+    """
+    __instance: SynthesisExecutor = None
+    __instance_lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> SynthesisExecutor:
+        if cls.__instance is None:
+            with cls.__instance_lock:
+                if cls.__instance is None:
+                    cls.__instance = cls()
+        return cls.__instance
+
+    @classmethod
+    def configure(cls, worker_count: int = None, process_count: int = None, torch_threads: int = None) -> SynthesisExecutor:
+        """
+        Replace the shared executor with one that uses the given number of workers
+
+        :param worker_count: The number of threads that may generate speech at the same time
+        :param process_count: The number of worker processes that generate speech. Threads are used if 0
+        :param torch_threads: The number of threads torch may use in each process
+        :return: The newly configured executor
+        """
+        with cls.__instance_lock:
+            if cls.__instance is not None:
+                cls.__instance.shutdown(wait=False)
+            cls.__instance = cls(worker_count=worker_count, process_count=process_count, torch_threads=torch_threads)
+        return cls.__instance
+
+    def __init__(self, worker_count: int = None, process_count: int = None, torch_threads: int = None):
+        """
+        :param worker_count: The number of threads that may generate speech at the same time.
+            SYNTHESIS_WORKER_COUNT if not given. Ignored when using processes
+        :param process_count: The number of worker processes that generate speech. SYNTHESIS_PROCESS_COUNT if not
+            given. Speech is generated on threads in this process if 0
+        :param torch_threads: The number of threads torch may use in each worker process. TORCH_THREADS_PER_WORKER if
+            not given. The CPU cores are divided evenly between processes if 0
+        """
+        self.__process_count = max(0, SYNTHESIS_PROCESS_COUNT if process_count is None else process_count)
+        self.__torch_threads = TORCH_THREADS_PER_WORKER if torch_threads is None else torch_threads
+        self.__lock = threading.Lock()
+        self.__restarts = 0
+
+        if self.__process_count:
+            self.__worker_count = self.__process_count
+
+            if not self.__torch_threads:
+                self.__torch_threads = max(1, (os.cpu_count() or 1) // self.__process_count)
+        else:
+            self.__worker_count = max(1, worker_count or SYNTHESIS_WORKER_COUNT)
+            set_torch_threads(self.__torch_threads)
+
+        self.__executor = self.__create_executor()
+
+    def __create_executor(self) -> Executor:
+        if not self.__process_count:
+            _LOGGER.debug(f"Generating speech on {self.__worker_count} worker thread(s)")
+            return ThreadPoolExecutor(max_workers=self.__worker_count, thread_name_prefix="synthesis")
+
+        _LOGGER.debug(
+            f"Generating speech on {self.__process_count} worker process(es) "
+            f"with {self.__torch_threads} torch thread(s) each"
+        )
+
+        # Workers are spawned rather than forked since forking a process that has started torch's threads may deadlock
+        return ProcessPoolExecutor(
+            max_workers=self.__process_count,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initialize_worker,
+            initargs=(self.__torch_threads,)
+        )
+
+    @property
+    def worker_count(self) -> int:
+        return self.__worker_count
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.__process_count > 0
+
+    @property
+    def restarts(self) -> int:
+        """
+        The number of times that worker processes have been replaced after one crashed
+        """
+        return self.__restarts
+
+    def __restart(self, broken_executor: Executor):
+        with self.__lock:
+            # Another caller may have already replaced the pool that failed for both of them
+            if self.__executor is not broken_executor:
+                return
+
+            _LOGGER.warning("A synthesis process stopped unexpectedly - replacing the synthesis processes")
+            broken_executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = self.__create_executor()
+            self.__restarts += 1
+
+    async def run(self, function: typing.Callable[..., _RESULT], *args, **kwargs) -> _RESULT:
+        """
+        Call a blocking function on a synthesis worker and wait for its result without blocking the event loop
+
+        When using processes, the function and its arguments must be picklable. Work that was running when a process
+        crashed is tried once more on the replacement processes.
+
+        :param function: The function to call
+        :param args: Positional arguments for the function
+        :param kwargs: Keyword arguments for the function
+        :return: The result of the function
+        """
+        loop = asyncio.get_running_loop()
+
+        if not self.__process_count:
+            return await loop.run_in_executor(self.__executor, functools.partial(function, *args, **kwargs))
+
+        from .chunking import SynthesisCostModel
+
+        for attempt in range(2):
+            executor = self.__executor
+
+            try:
+                result, measurements = await loop.run_in_executor(
+                    executor,
+                    functools.partial(call_in_worker, function, args, kwargs)
+                )
+            except BrokenProcessPool:
+                self.__restart(executor)
+
+                if attempt:
+                    raise
+
+                continue
+
+            SynthesisCostModel.get_instance().merge(measurements)
+            return result
+
+    async def synthesize(self, model_configuration: NarratorConfiguration, content: str) -> Waveform:
+        """
+        Speak a phrase on a synthesis worker
+
+        :param model_configuration: Details on HOW the phrase should be turned into speech
+        :param content: The text of the phrase
+        :return: The audio for the phrase
+        """
+        from .narration import speak_phrase
+        return await self.run(speak_phrase, model_configuration, content)
+
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "mode": "processes" if self.__process_count else "threads",
+            "worker_count": self.__worker_count,
+            "torch_threads": self.__torch_threads,
+            "restarts": self.__restarts
+        }
+
+    def shutdown(self, wait: bool = True):
+        self.__executor.shutdown(wait=wait, cancel_futures=True)
@@ -3,112 +3,241 @@
 """
 from __future__ import annotations
 
-import os
-import string
+import asyncio
+import time
+import uuid
 import typing
-import io
-import re
-import enum
 
 from easy_narrator.models import NarratorConfiguration
 from easy_narrator.application_logging import get_logger
 
+from .audio import Waveform
+from .audio_cache import PhraseAudioCache
+from .scheduler import SchedulingPriority
+from .scheduler import SynthesisScheduler
+from .session import NarrationSession
+from .chunking import PhraseChunker
+from .chunking import SynthesisCostModel
+from .normalization import ACRONYM_PATTERN
+from .normalization import SIMPLE_REPLACEMENTS
+from .phrases import NEWLINE_SEPARATOR
+from .phrases import HEADER_PATTERN
+from .phrases import BULLET_PATTERN
+from .phrases import PhraseType
+from .phrases import break_down_sentences
+from .phrases import count_phrases
+from .phrases import iterate_sentences
+
 _LOGGER = get_logger()
 
-NEWLINE_SEPARATOR = "$$NEWLINE$$"
 
-HEADER_PATTERN = re.compile(r"^\d+\. .+(?=\n)", re.MULTILINE)
-BULLET_PATTERN = re.compile(r"^([*-]|[a-zA-Z][.)]|\d+[.)]) ([^\n]|\n {4,})+")
-ACRONYM_PATTERN = re.compile(r"(?P<letter>([A-Z](?=[A-Z.])|(?<=[A-Z])[.A-Z\d]))")
+def get_sample_rate(model) -> int:
+    """
+    Get the number of samples per second in the audio that a model produces
+    """
+    return model.synthesizer.output_sample_rate
+
+
+def synthesize_phrase(model, content: str, arguments: typing.Dict[str, typing.Any]) -> Waveform:
+    """
+    Turn a single phrase into audio
 
+    :param model: The loaded model that will speak the phrase
+    :param content: The text of the phrase
+    :param arguments: Model specific arguments, such as the speaker and language
+    :return: The spoken phrase as 16-bit PCM
+    """
+    return Waveform.from_float(model.tts(text=content, **arguments), get_sample_rate(model))
 
-class PhraseType(enum.Enum):
-    HEADER = "Header"
-    CONTENT = "Content"
-    SUBHEADER = "Subheader"
-    BULLET = "Bullet"
 
+def speak_phrase(model_configuration: NarratorConfiguration, content: str) -> Waveform:
+    """
+    Turn a single phrase into audio with the model and voice that a configuration describes
 
-SIMPLE_REPLACEMENTS = {
-    " m ": " meters ",
-    "CONUS": "Cone us",
-    "~": " around ",
-    "hydrologic": "hydro logic"
-}
+    How long the phrase took is recorded so that chunk lengths may be tuned to the model
 
+    :param model_configuration: Details on HOW the phrase should be turned into speech
+    :param content: The text of the phrase
+    :return: The spoken phrase as 16-bit PCM
+    """
+    model = model_configuration.get_model()
+    arguments: typing.Dict[str, typing.Any] = model_configuration.get_arguments()
 
-def break_down_sentences(text: str) -> typing.Sequence[typing.Tuple[PhraseType, str]]:
-    sentences: typing.List[typing.Tuple[PhraseType, str]] = []
+    started_at = time.perf_counter()
+    sound = synthesize_phrase(model, content, arguments)
+    SynthesisCostModel.get_instance().record(model_configuration.name, len(content), time.perf_counter() - started_at)
+    return sound
 
-    text = ACRONYM_PATTERN.sub(lambda match: f'"{match.group()}" ' if match.group() not in string.punctuation else "", text.strip())
 
-    for old_value, new_value in SIMPLE_REPLACEMENTS.items():
-        text = text.replace(old_value, new_value)
+def generate_sound(
+    text: typing.Union[str, typing.Sequence[typing.Tuple[PhraseType, str]]],
+    model_configuration: NarratorConfiguration,
+    progress: typing.Callable[[int, int], typing.Any] = None
+) -> typing.List[Waveform]:
+    """
+    Turn the given text into audio
 
-    obvious_breaks = [
-        line
-        for line in re.split(r"\n{2:}", text)
-        if line not in (None, '', '\t', os.linesep)
-    ]
+    :param text: The text to convert to speech
+    :param model_configuration: Details on HOW it should be turned into speech
+    :param progress: A function called with the number of completed phrases and the total number of phrases
+        after each phrase is generated
+    :return: The audio for each phrase
+    """
+    model = None
+    cache = PhraseAudioCache.get_instance()
+    arguments: typing.Dict[str, typing.Any] = model_configuration.get_arguments()
 
-    for part in obvious_breaks:
-        part_breaks: typing.List[typing.Union[str, typing.Tuple[PhraseType, str]]] = []
+    if isinstance(text, str):
+        chunker = PhraseChunker.for_model(model_configuration.name, short_start=False)
+        text_parts = iterate_sentences(text, model_configuration, chunker)
+        phrase_count = count_phrases(text, chunker) if progress is not None else None
+    else:
+        text_parts = text
+        phrase_count = len(text)
 
-        while header_location := HEADER_PATTERN.match(part):
-            beginning, ending = header_location.span()
+    sounds: typing.List[Waveform] = []
 
-            if beginning != 0:
-                part_breaks.append(part[:beginning].strip())
+    _LOGGER.debug(f"Generating audio with {model_configuration}")
 
-            part_breaks.append((PhraseType.HEADER, part[beginning:ending].strip()))
+    for phrase_type, content in text_parts:
+        cache_key = cache.create_key(content, model_configuration.name, arguments)
+        sound = cache.get(cache_key)
 
-            part = part[ending:].strip()
+        if sound is None:
+            if model is None:
+                model = model_configuration.get_model()
 
-        if part:
-            part_breaks.append(part)
+            _LOGGER.debug('Generating %s audio for %s', phrase_type, content)
+            started_at = time.perf_counter()
+            sound = synthesize_phrase(model, content, arguments)
+            SynthesisCostModel.get_instance().record(
+                model_configuration.name,
+                len(content),
+                time.perf_counter() - started_at
+            )
+            cache.put(cache_key, sound)
 
-        part_breaks = [
-            content if isinstance(content, tuple) else content.replace(os.linesep, ' ')
-            for content in part_breaks
-        ]
+        sounds.append(sound)
 
-        sentences.extend([
-            (PhraseType.CONTENT, content) if isinstance(content, str) else content
-            for content in part_breaks
-        ])
+        if progress is not None:
+            progress(len(sounds), phrase_count)
 
-    return sentences
+    return sounds
 
 
-def generate_sound(text: typing.Union[str, typing.Sequence[str]], model_configuration: NarratorConfiguration) -> typing.Union[bytes, typing.List[bytes]]:
+async def stream_sound(
+    text: typing.Union[str, typing.Sequence[typing.Tuple[PhraseType, str]]],
+    model_configuration: NarratorConfiguration,
+    connection_id: str = None,
+    priority: SchedulingPriority = None,
+    scheduler: SynthesisScheduler = None,
+    session: NarrationSession = None,
+    chunker: PhraseChunker = None
+) -> typing.AsyncIterator[typing.Tuple[int, int, Waveform]]:
     """
-    Turn the given text into binary audio data
+    Turn the given text into audio, yielding each phrase as soon as it has been spoken
+
+    The next phrase is generated while the caller handles the current one
 
     :param text: The text to convert to speech
     :param model_configuration: Details on HOW it should be turned into speech
-    :return: A bytes object encoded as audio/wav
+    :param connection_id: Who is asking for the audio, so that their work may be balanced against everyone else's
+    :param priority: How urgently the audio is needed. Decided by the amount of text if not given.
+        The first phrase is always treated as interactive so that audio starts quickly.
+    :param scheduler: What decides when each phrase is synthesized. The shared SynthesisScheduler if not given
+    :param session: The previous narration for the same listener. Phrases that it already spoke are reused rather
+        than synthesized again, and this narration is remembered in it for next time
+    :param chunker: What reshapes the phrases in the text into lengths that suit the model. One tuned to the model,
+        with a short first chunk, is used if not given
+    :return: An asynchronous iterator of each phrase's index, the total number of phrases, and its audio. The total
+        comes from counting the text while the first phrase is spoken and is exact by the time the last phrase arrives
     """
-    model = model_configuration.get_model()
+    if scheduler is None:
+        scheduler = SynthesisScheduler.get_instance()
 
-    arguments: typing.Dict[str, typing.Any] = model_configuration.get_arguments()
+    if connection_id is None:
+        connection_id = uuid.uuid4().hex
 
     if isinstance(text, str):
-        text_parts = break_down_sentences(text)
+        if chunker is None:
+            chunker = PhraseChunker.for_model(model_configuration.name)
+        text_parts = iterate_sentences(text, model_configuration, chunker)
     else:
-        text_parts = text
-
-    sounds: typing.List[bytes] = []
-
-    _LOGGER.debug(f"Generating audio with {model_configuration}")
+        text_parts = iter(text)
 
-    for phrase_type, content in text_parts:
-        audio_buffer = io.BytesIO()
-        arguments['file_path'] = audio_buffer
+    first_phrase = next(text_parts, None)
 
-        _LOGGER.debug('Generating %s audio for %s', phrase_type, content)
-        model.tts_to_file(text=content, **arguments)
-        audio_buffer.seek(0)
-        sounds.append(audio_buffer.read())
+    if first_phrase is None:
+        return
 
-    return sounds
+    cache = PhraseAudioCache.get_instance()
+    arguments: typing.Dict[str, typing.Any] = model_configuration.get_arguments()
 
+    _LOGGER.debug(f"Streaming audio with {model_configuration}")
+
+    spoken: typing.Dict[str, Waveform] = {}
+    reused_keys: typing.Set[str] = set()
+    synthesized_keys: typing.Set[str] = set()
+    completed = False
+
+    async def produce(phrase_type: PhraseType, content: str, phrase_priority: SchedulingPriority) -> Waveform:
+        cache_key = cache.create_key(content, model_configuration.name, arguments)
+        sound = session.recall(cache_key) if session is not None else None
+
+        if sound is not None:
+            reused_keys.add(cache_key)
+        else:
+            # Only memory is checked on the event loop; reading from and writing to disk happen on a thread
+            sound = cache.get_from_memory(cache_key)
+
+            if sound is None:
+                sound = await asyncio.to_thread(cache.get, cache_key)
+
+        if sound is None:
+            _LOGGER.debug('Generating %s audio for %s', phrase_type, content)
+            sound = await scheduler.synthesize(model_configuration, content, connection_id, phrase_priority)
+            await asyncio.to_thread(cache.put, cache_key, sound)
+            synthesized_keys.add(cache_key)
+
+        spoken[cache_key] = sound
+        return sound
+
+    # The first phrase is started before the rest of the text is scanned so that audio begins as soon as possible
+    next_sound = asyncio.ensure_future(produce(*first_phrase, SchedulingPriority.INTERACTIVE))
+
+    try:
+        phrase_count = await asyncio.to_thread(count_phrases, text, chunker) if isinstance(text, str) else len(text)
+
+        if priority is None:
+            priority = SchedulingPriority.for_phrase_count(phrase_count)
+
+        phrase_index = 0
+
+        # The phrases themselves decide when the narration ends; the count is only used to report progress
+        while next_sound is not None:
+            sound = await next_sound
+            following_phrase = next(text_parts, None)
+
+            if following_phrase is None:
+                next_sound = None
+                phrase_count = phrase_index + 1
+            else:
+                next_sound = asyncio.ensure_future(produce(*following_phrase, priority))
+                phrase_count = max(phrase_count, phrase_index + 2)
+
+            yield phrase_index, phrase_count, sound
+            phrase_index += 1
+
+        completed = True
+    finally:
+        if next_sound is not None:
+            next_sound.cancel()
+
+        if session is not None:
+            session.record(
+                spoken,
+                reused=len(reused_keys),
+                synthesized=len(synthesized_keys - reused_keys),
+                complete=completed
+            )
+            _LOGGER.debug(f"Reused {len(reused_keys)} of {len(spoken)} phrases from the previous narration")
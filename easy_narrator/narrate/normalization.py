@@ -0,0 +1,261 @@
+"""
+Rewrites text into the form that models should speak, applying every lexicon entry and spelling out acronyms in
+a single pass over the text
+"""
+from __future__ import annotations
+
+import functools
+import json
+import re
+import string
+import typing
+
+from pathlib import Path
+
+from easy_narrator.application_details import LEXICON_PATH
+from easy_narrator.application_logging import get_logger
+
+if typing.TYPE_CHECKING:
+    from easy_narrator.models import NarratorConfiguration
+
+_LOGGER = get_logger()
+
+ACRONYM_PATTERN = re.compile(r"(?P<letter>([A-Z](?=[A-Z.])|(?<=[A-Z])[.A-Z\d]))")
+
+SIMPLE_REPLACEMENTS = {
+    " m ": " meters ",
+    "CONUS": "Cone us",
+    "~": " around ",
+    "hydrologic": "hydro logic"
+}
+"""Replacements that are always made, regardless of which lexicons are loaded"""
+
+DEFAULT_LEXICON_NAME = "default"
+LEXICON_SUFFIX = ".json"
+
+_TERMINAL = ""
+"""The key marking that the path to a node in a trie spells out a complete term"""
+
+
+def build_trie(terms: typing.Iterable[str]) -> typing.Dict[str, typing.Any]:
+    """
+    Arrange terms into a character trie
+
+    :param terms: The terms to arrange
+    :return: Nested dictionaries keyed on characters, with an empty key wherever a term ends
+    """
+    trie: typing.Dict[str, typing.Any] = {}
+
+    for term in terms:
+        node = trie
+        for character in term:
+            node = node.setdefault(character, {})
+        node[_TERMINAL] = True
+
+    return trie
+
+
+def trie_to_pattern(trie: typing.Dict[str, typing.Any]) -> str:
+    """
+    Convert a trie into a regular expression that matches the longest term in it
+
+    Terms sharing a prefix share a branch, so the regex engine only ever follows one path through the trie rather
+    than trying every term at every position.
+
+    :param trie: A trie created by `build_trie`
+    :return: A regular expression that matches any term in the trie
+    """
+    is_terminal = _TERMINAL in trie
+    leaves: typing.List[str] = []
+    branches: typing.List[str] = []
+
+    for character in sorted(key for key in trie if key != _TERMINAL):
+        child = trie[character]
+
+        if list(child) == [_TERMINAL]:
+            leaves.append(character)
+        else:
+            branches.append(re.escape(character) + trie_to_pattern(child))
+
+    if len(leaves) == 1:
+        branches.append(re.escape(leaves[0]))
+    elif leaves:
+        branches.append("[" + "".join(
+            "\\" + leaf if leaf in "\\]^-" else leaf
+            for leaf in leaves
+        ) + "]")
+
+    if not branches:
+        return ""
+
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    if is_terminal:
+        pattern = f"(?:{pattern})?"
+
+    return pattern
+
+
+class TextNormalizer:
+    """
+    Applies a fixed set of replacements and acronym spellings to text in one pass
+
+    Every replacement is compiled into a single trie-shaped regular expression, so the cost of normalizing text
+    grows with the length of the text rather than with the length of the text times the number of replacements.
+    Where terms overlap, the longest one wins. Replacements are not applied to the output of other replacements.
+    """
+    def __init__(self, replacements: typing.Mapping[str, str] = None, spell_acronyms: bool = True):
+        """
+        :param replacements: Text to find mapped to what should be spoken in its place
+        :param spell_acronyms: Whether runs of capital letters should be read letter by letter
+        """
+        self.__replacements: typing.Dict[str, str] = {
+            term: spoken_form
+            for term, spoken_form in (replacements or {}).items()
+            if term
+        }
+        self.__spell_acronyms = spell_acronyms
+
+        alternatives = []
+
+        if self.__replacements:
+            alternatives.append(trie_to_pattern(build_trie(self.__replacements)))
+
+        if spell_acronyms:
+            alternatives.append(ACRONYM_PATTERN.pattern)
+
+        self.__pattern: typing.Optional[re.Pattern] = re.compile("|".join(alternatives)) if alternatives else None
+
+    @property
+    def replacements(self) -> typing.Mapping[str, str]:
+        return self.__replacements
+
+    def __replace(self, match: re.Match) -> str:
+        matched_text = match.group()
+
+        # Lexicon terms come first in the pattern, so anything that is a term was matched as one
+        replacement = self.__replacements.get(matched_text)
+
+        if replacement is not None:
+            return replacement
+
+        return f'"{matched_text}" ' if matched_text not in string.punctuation else ""
+
+    def normalize(self, text: str) -> str:
+        """
+        Rewrite text into the form that should be spoken
+
+        :param text: The text to rewrite
+        :return: The text with every replacement made and every acronym spelled out
+        """
+        if self.__pattern is None:
+            return text
+        return self.__pattern.sub(self.__replace, text)
+
+    def __len__(self):
+        return len(self.__replacements)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(replacements={len(self)}, spell_acronyms={self.__spell_acronyms})"
+
+
+def get_model_language(model_name: str) -> typing.Optional[str]:
+    """
+    Get the language of a model from its name, such as 'en' for 'tts_models/en/ljspeech/vits'
+
+    :param model_name: The name of the model
+    :return: The language of the model if it is only meant for one
+    """
+    parts = model_name.split("/")
+
+    if len(parts) > 1 and parts[1] != "multilingual":
+        return parts[1]
+
+    return None
+
+
+def get_lexicon_names(configuration: NarratorConfiguration = None) -> typing.Sequence[str]:
+    """
+    Get the names of the lexicons that apply to a configuration, from most general to most specific
+
+    :param configuration: How text will be narrated
+    :return: The names of lexicon files that should be layered on top of one another
+    """
+    names = [DEFAULT_LEXICON_NAME]
+
+    if configuration is None:
+        return names
+
+    language = getattr(configuration, "language", None) or get_model_language(configuration.name)
+
+    if language:
+        names.append(language)
+
+    names.append(configuration.name.replace("/", "--"))
+
+    return names
+
+
+def load_lexicon(path: Path) -> typing.Dict[str, str]:
+    """
+    Read a lexicon file
+
+    :param path: A JSON file mapping terms to how they should be spoken
+    :return: The entries in the lexicon
+    """
+    with path.open("r") as lexicon_file:
+        entries = json.load(lexicon_file)
+
+    if not isinstance(entries, typing.Mapping):
+        raise ValueError(f"The lexicon at {path} must be a JSON object mapping terms to how they should be spoken")
+
+    return {
+        str(term): str(spoken_form)
+        for term, spoken_form in entries.items()
+    }
+
+
+@functools.lru_cache(maxsize=32)
+def compile_normalizer(sources: typing.Tuple[typing.Tuple[str, int], ...]) -> TextNormalizer:
+    """
+    Build a normalizer from the built-in replacements and a series of lexicon files
+
+    Sources include the modification time of each file so that edited lexicons are compiled again rather than
+    served from the cache.
+
+    :param sources: The path and modification time of every lexicon file to load, from most general to most specific
+    :return: A normalizer applying every replacement, with more specific lexicons overriding more general ones
+    """
+    replacements = dict(SIMPLE_REPLACEMENTS)
+
+    for path, _ in sources:
+        try:
+            replacements.update(load_lexicon(Path(path)))
+        except (OSError, ValueError) as error:
+            _LOGGER.error(f"Could not load the lexicon at {path}: {error}")
+
+    normalizer = TextNormalizer(replacements)
+    _LOGGER.debug(f"Compiled {normalizer} from {len(sources)} lexicon(s)")
+    return normalizer
+
+
+def get_normalizer(configuration: NarratorConfiguration = None, directory: Path = None) -> TextNormalizer:
+    """
+    Get the normalizer for text narrated with the given configuration
+
+    :param configuration: How text will be narrated
+    :param directory: Where lexicons are kept. LEXICON_PATH if not given
+    :return: A compiled normalizer that is shared with every other request using the same lexicons
+    """
+    directory = Path(directory or LEXICON_PATH)
+    sources = []
+
+    for name in get_lexicon_names(configuration):
+        path = directory / f"{name}{LEXICON_SUFFIX}"
+
+        try:
+            sources.append((str(path), path.stat().st_mtime_ns))
+        except OSError:
+            continue
+
+    return compile_normalizer(tuple(sources))
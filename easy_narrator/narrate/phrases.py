@@ -0,0 +1,150 @@
+"""
+Splits text into the phrases that are spoken one at a time
+
+Phrases are found lazily and described by their offsets into the original text, so that a large document is never
+copied as a whole and the first phrase may be spoken before the rest of the document has been scanned.
+"""
+from __future__ import annotations
+
+import enum
+import itertools
+import os
+import re
+import typing
+
+from .normalization import TextNormalizer
+from .normalization import get_normalizer
+
+if typing.TYPE_CHECKING:
+    from easy_narrator.models import NarratorConfiguration
+    from .chunking import PhraseChunker
+
+NEWLINE_SEPARATOR = "$$NEWLINE$$"
+
+HEADER_PATTERN = re.compile(r"^\d+\. .+(?=\n)", re.MULTILINE)
+BULLET_PATTERN = re.compile(r"^([*-]|[a-zA-Z][.)]|\d+[.)]) ([^\n]|\n {4,})+")
+
+PARAGRAPH_BREAK_PATTERN = re.compile(r"\n{2,}")
+"""Blank lines that separate paragraphs"""
+
+HEADER_SPAN_PATTERN = re.compile(r"\d+\. [^\n]+(?=\n)")
+"""A numbered header line, matched from wherever a paragraph or the text after a previous header begins"""
+
+
+class PhraseType(enum.Enum):
+    HEADER = "Header"
+    CONTENT = "Content"
+    SUBHEADER = "Subheader"
+    BULLET = "Bullet"
+
+
+class PhraseSpan(typing.NamedTuple):
+    """
+    Where a phrase lies within the text it came from
+    """
+    phrase_type: PhraseType
+    start: int
+    end: int
+
+    def read(self, text: str, normalizer: TextNormalizer = None) -> str:
+        """
+        Get the words that should be spoken for this phrase
+
+        :param text: The text that this span was found in
+        :param normalizer: What rewrites the phrase into the form that should be spoken
+        :return: The phrase as it should be spoken
+        """
+        content = text[self.start:self.end]
+
+        if normalizer is not None:
+            content = normalizer.normalize(content).strip()
+
+        if self.phrase_type == PhraseType.CONTENT:
+            content = content.replace(os.linesep, ' ')
+
+        return content
+
+
+def strip_span(text: str, start: int, end: int) -> typing.Tuple[int, int]:
+    """
+    Narrow a span of text so that it neither starts nor ends with whitespace
+    """
+    while start < end and text[start].isspace():
+        start += 1
+
+    while end > start and text[end - 1].isspace():
+        end -= 1
+
+    return start, end
+
+
+def split_phrases(text: str) -> typing.Iterator[PhraseSpan]:
+    """
+    Find each phrase in the text, one at a time
+
+    Paragraphs are separated by blank lines and each numbered header at the start of a paragraph is its own phrase.
+
+    :param text: The text to split
+    :return: The location of each phrase in the text, in order
+    """
+    paragraph_start = 0
+
+    for paragraph_break in itertools.chain(PARAGRAPH_BREAK_PATTERN.finditer(text), [None]):
+        paragraph_end = len(text) if paragraph_break is None else paragraph_break.start()
+        start, end = strip_span(text, paragraph_start, paragraph_end)
+
+        while start < end and (header := HEADER_SPAN_PATTERN.match(text, start, end)):
+            yield PhraseSpan(PhraseType.HEADER, *strip_span(text, *header.span()))
+            start, end = strip_span(text, header.end(), end)
+
+        if start < end:
+            yield PhraseSpan(PhraseType.CONTENT, start, end)
+
+        if paragraph_break is not None:
+            paragraph_start = paragraph_break.end()
+
+
+def get_spans(text: str, chunker: PhraseChunker = None) -> typing.Iterator[PhraseSpan]:
+    """
+    Find each phrase in the text, reshaped by the chunker if one is given
+    """
+    spans = split_phrases(text)
+    return chunker.chunk(text, spans) if chunker is not None else spans
+
+
+def count_phrases(text: str, chunker: PhraseChunker = None) -> int:
+    """
+    Count the phrases in the text without reading any of them
+
+    :param text: The text to split
+    :param chunker: What reshapes phrases into lengths that suit the model. The same chunker must be used when
+        reading the phrases for the count to match
+    """
+    return sum(1 for _ in get_spans(text, chunker))
+
+
+def iterate_sentences(
+    text: str,
+    configuration: NarratorConfiguration = None,
+    chunker: PhraseChunker = None
+) -> typing.Iterator[typing.Tuple[PhraseType, str]]:
+    """
+    Read each phrase in the text, one at a time
+
+    :param text: The text to split
+    :param configuration: How the text will be narrated, which decides the lexicons used to rewrite each phrase
+    :param chunker: What reshapes phrases into lengths that suit the model. Phrases are left as they are if not given
+    :return: The type of each phrase and what should be spoken for it, in order
+    """
+    normalizer = get_normalizer(configuration)
+
+    for span in get_spans(text, chunker):
+        yield span.phrase_type, span.read(text, normalizer)
+
+
+def break_down_sentences(
+    text: str,
+    configuration: NarratorConfiguration = None,
+    chunker: PhraseChunker = None
+) -> typing.Sequence[typing.Tuple[PhraseType, str]]:
+    return list(iterate_sentences(text, configuration, chunker))
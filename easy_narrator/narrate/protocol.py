@@ -0,0 +1,160 @@
+"""
+The binary protocol spoken between the server and remote synthesis workers
+
+Every message is a frame: a four byte big-endian payload length, a one byte message type, then the payload. Phrases
+go to a worker as JSON and come back as 16-bit PCM, so audio is never re-encoded on its way through.
+"""
+from __future__ import annotations
+
+import asyncio
+import enum
+import json
+import struct
+import typing
+
+from .audio import Waveform
+
+FRAME_HEADER = struct.Struct("!IB")
+"""The length of a frame's payload followed by the type of message it holds"""
+
+RESULT_HEADER = struct.Struct("!I")
+"""The length of the JSON description at the start of a synthesis result"""
+
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+"""The largest payload either side will accept"""
+
+TCP_SCHEME = "tcp://"
+UNIX_SCHEME = "unix://"
+
+
+class MessageType(enum.IntEnum):
+    HEALTH = 1
+    """Asks a worker how busy it is"""
+    STATUS = 2
+    """A worker describing how busy it is"""
+    SYNTHESIZE = 3
+    """Asks a worker to speak a phrase"""
+    RESULT = 4
+    """The audio for a phrase"""
+    ERROR = 5
+    """A worker explaining why it could not do what was asked"""
+
+
+class RemoteSynthesisError(Exception):
+    """
+    Raised when a worker was reached but could not do what was asked of it
+    """
+
+
+async def read_frame(reader: asyncio.StreamReader) -> typing.Tuple[MessageType, bytes]:
+    """
+    Read the next message from a connection
+
+    :raises asyncio.IncompleteReadError: If the connection closed
+    :return: The type of the message and its payload
+    """
+    payload_size, message_type = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+
+    if payload_size > MAX_FRAME_SIZE:
+        raise ValueError(f"Refusing to read a {payload_size} byte message - the most that may be sent is {MAX_FRAME_SIZE}")
+
+    return MessageType(message_type), await reader.readexactly(payload_size)
+
+
+async def write_frame(writer: asyncio.StreamWriter, message_type: MessageType, *parts: bytes):
+    """
+    Send a message over a connection
+
+    :param writer: The connection to write to
+    :param message_type: The type of message being sent
+    :param parts: Pieces of the payload, sent one after another without being joined first
+    """
+    writer.write(FRAME_HEADER.pack(sum(len(part) for part in parts), message_type))
+    writer.writelines(parts)
+    await writer.drain()
+
+
+def encode_json(data: typing.Any) -> bytes:
+    return json.dumps(data, default=str).encode()
+
+
+def decode_json(payload: typing.Union[bytes, memoryview]) -> typing.Any:
+    return json.loads(bytes(payload))
+
+
+def encode_result(
+    sound: Waveform,
+    measurements: typing.Sequence[typing.Tuple[str, int, float]] = None
+) -> typing.List[bytes]:
+    """
+    Describe spoken audio as the parts of a RESULT payload
+
+    :param sound: The audio for the phrase
+    :param measurements: How long the worker took to speak phrases, so that the server may tune chunk lengths
+    """
+    description = encode_json({"measurements": list(measurements or [])})
+    return [RESULT_HEADER.pack(len(description)), description, sound.to_bytes()]
+
+
+def decode_result(payload: bytes) -> typing.Tuple[Waveform, typing.List[typing.Tuple[str, int, float]]]:
+    """
+    Read the audio and measurements from a RESULT payload
+    """
+    view = memoryview(payload)
+    description_size, = RESULT_HEADER.unpack_from(view)
+    offset = RESULT_HEADER.size + description_size
+    description = decode_json(view[RESULT_HEADER.size:offset])
+
+    sound = Waveform.from_bytes(view[offset:])
+    return sound, [tuple(measurement) for measurement in description.get("measurements", [])]
+
+
+def parse_address(address: str) -> typing.Tuple[str, typing.Union[str, typing.Tuple[str, int]]]:
+    """
+    Interpret a worker address
+
+    Addresses look like 'tcp://host:port', 'host:port', or 'unix:///path/to/socket'
+
+    :return: Either 'tcp' with a host and port or 'unix' with the path to a socket
+    """
+    if address.startswith(UNIX_SCHEME):
+        return "unix", address[len(UNIX_SCHEME):]
+
+    if address.startswith(TCP_SCHEME):
+        address = address[len(TCP_SCHEME):]
+
+    host, separator, port = address.rpartition(":")
+
+    if not separator or not port.isdigit():
+        raise ValueError(f"'{address}' is not a valid worker address - expected 'host:port' or 'unix:///path'")
+
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+async def open_connection(address: str) -> typing.Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Connect to the worker at the given address
+    """
+    kind, location = parse_address(address)
+
+    if kind == "unix":
+        return await asyncio.open_unix_connection(location)
+
+    host, port = location
+    return await asyncio.open_connection(host, port)
+
+
+async def start_server(
+    address: str,
+    handler: typing.Callable[[asyncio.StreamReader, asyncio.StreamWriter], typing.Awaitable[None]]
+) -> asyncio.AbstractServer:
+    """
+    Listen for connections at the given address
+    """
+    kind, location = parse_address(address)
+
+    if kind == "unix":
+        return await asyncio.start_unix_server(handler, location)
+
+    host, port = location
+    return await asyncio.start_server(handler, host, port)
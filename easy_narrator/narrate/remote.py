@@ -0,0 +1,288 @@
+"""
+Sends phrases to synthesis workers running in other processes or on other hosts
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import typing
+
+from easy_narrator.application_details import WORKER_HEALTH_INTERVAL
+from easy_narrator.application_details import WORKER_REQUEST_TIMEOUT
+from easy_narrator.application_logging import get_logger
+
+from .audio import Waveform
+from .protocol import MessageType
+from .protocol import RemoteSynthesisError
+from .protocol import decode_json
+from .protocol import decode_result
+from .protocol import encode_json
+from .protocol import open_connection
+from .protocol import read_frame
+from .protocol import write_frame
+
+if typing.TYPE_CHECKING:
+    from easy_narrator.models import NarratorConfiguration
+
+_LOGGER = get_logger()
+
+HEALTH_CHECK_TIMEOUT = 5.0
+"""The most seconds a worker has to answer a health check before it is considered unavailable"""
+
+_Connection = typing.Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class RemoteWorker:
+    """
+    A single synthesis worker and the idle connections kept open to it
+
+    Each connection carries one request at a time
+    """
+    def __init__(self, address: str):
+        self.__address = address
+        self.__idle_connections: typing.List[_Connection] = []
+        self.__in_flight = 0
+        self.__healthy = True
+        self.__reported_load = 0
+        self.__capacity = 1
+        self.__completed = 0
+        self.__failures = 0
+        self.__last_checked: typing.Optional[float] = None
+
+    @property
+    def address(self) -> str:
+        return self.__address
+
+    @property
+    def healthy(self) -> bool:
+        return self.__healthy
+
+    @property
+    def load(self) -> float:
+        """
+        How busy the worker is relative to how much it can do at once
+
+        The worker's own count covers requests from every server while the local count is always up to date, so
+        whichever is higher is used
+        """
+        return max(self.__in_flight, self.__reported_load) / self.__capacity
+
+    def mark_unhealthy(self, reason: typing.Union[str, BaseException]):
+        if self.__healthy:
+            _LOGGER.warning(f"The synthesis worker at {self.__address} is unavailable: {reason}")
+        self.__healthy = False
+        self.__failures += 1
+        self.close()
+
+    async def __acquire(self) -> _Connection:
+        while self.__idle_connections:
+            reader, writer = self.__idle_connections.pop()
+
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+
+        return await open_connection(self.__address)
+
+    async def request(
+        self,
+        message_type: MessageType,
+        *parts: bytes,
+        timeout: float = None
+    ) -> typing.Tuple[MessageType, bytes]:
+        """
+        Send a message to the worker and wait for its answer
+
+        :param message_type: The type of message to send
+        :param parts: The pieces of the message's payload
+        :param timeout: The most seconds to wait for an answer. Waits forever if not given
+        :return: The type and payload of the answer
+        """
+        reader, writer = await self.__acquire()
+
+        try:
+            await write_frame(writer, message_type, *parts)
+            response_type, payload = await asyncio.wait_for(read_frame(reader), timeout)
+        except BaseException:
+            # The connection may be partway through a message, so it can't be trusted with another
+            writer.close()
+            raise
+
+        self.__idle_connections.append((reader, writer))
+
+        if response_type == MessageType.ERROR:
+            raise RemoteSynthesisError(f"{self.__address}: {decode_json(payload).get('message')}")
+
+        return response_type, payload
+
+    async def check_health(self) -> bool:
+        """
+        Ask the worker how busy it is
+
+        :return: Whether the worker answered
+        """
+        self.__last_checked = time.time()
+
+        try:
+            _, payload = await self.request(MessageType.HEALTH, timeout=HEALTH_CHECK_TIMEOUT)
+            status = decode_json(payload)
+        except (OSError, EOFError, ValueError, asyncio.TimeoutError, RemoteSynthesisError) as error:
+            self.mark_unhealthy(error)
+            return False
+
+        if not self.__healthy:
+            _LOGGER.info(f"The synthesis worker at {self.__address} is available again")
+
+        self.__healthy = True
+        self.__reported_load = status.get("load", 0)
+        self.__capacity = max(1, status.get("capacity", 1))
+        return True
+
+    async def synthesize(
+        self,
+        model_configuration: NarratorConfiguration,
+        content: str,
+        timeout: float = None
+    ) -> typing.Tuple[Waveform, typing.List[typing.Tuple[str, int, float]]]:
+        """
+        Have the worker speak a phrase
+
+        :return: The audio for the phrase and how long the worker took to speak it
+        """
+        request = encode_json({
+            "configuration": model_configuration.model_dump(),
+            "content": content
+        })
+
+        self.__in_flight += 1
+
+        try:
+            _, payload = await self.request(MessageType.SYNTHESIZE, request, timeout=timeout)
+        finally:
+            self.__in_flight -= 1
+
+        self.__completed += 1
+        return decode_result(payload)
+
+    def close(self):
+        for _, writer in self.__idle_connections:
+            writer.close()
+        self.__idle_connections.clear()
+
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "address": self.__address,
+            "healthy": self.__healthy,
+            "in_flight": self.__in_flight,
+            "reported_load": self.__reported_load,
+            "capacity": self.__capacity,
+            "completed": self.__completed,
+            "failures": self.__failures,
+            "last_checked": self.__last_checked
+        }
+
+
+class RemoteWorkerPool:
+    """
+    Spreads phrases across a set of synthesis workers
+
+    Each phrase goes to the least loaded worker that is answering health checks. A phrase whose worker can't be
+    reached is sent to the next worker instead. Workers may be on other hosts or on this one.
+    """
+    def __init__(self, addresses: typing.Sequence[str], health_interval: float = None, request_timeout: float = None):
+        """
+        :param addresses: Where each worker listens, like 'tcp://host:port' or 'unix:///path/to/socket'
+        :param health_interval: Seconds between health checks. WORKER_HEALTH_INTERVAL if not given
+        :param request_timeout: The most seconds to wait on a phrase. WORKER_REQUEST_TIMEOUT if not given
+        """
+        if not addresses:
+            raise ValueError("Cannot create a pool of remote synthesis workers - no addresses were given")
+
+        self.__workers = [RemoteWorker(address) for address in addresses]
+        self.__health_interval = WORKER_HEALTH_INTERVAL if health_interval is None else health_interval
+        self.__request_timeout = request_timeout or WORKER_REQUEST_TIMEOUT
+        self.__health_task: typing.Optional[asyncio.Task] = None
+
+    @property
+    def worker_count(self) -> int:
+        return len(self.__workers)
+
+    @property
+    def workers(self) -> typing.Sequence[RemoteWorker]:
+        return self.__workers
+
+    async def check_health(self):
+        await asyncio.gather(*[worker.check_health() for worker in self.__workers])
+
+    async def __monitor_health(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.__health_interval)
+
+    def __ensure_monitoring(self):
+        if self.__health_interval > 0 and (self.__health_task is None or self.__health_task.done()):
+            self.__health_task = asyncio.ensure_future(self.__monitor_health())
+
+    def __choose_worker(self, excluded: typing.Collection[RemoteWorker]) -> typing.Optional[RemoteWorker]:
+        candidates = [worker for worker in self.__workers if worker not in excluded]
+
+        # Workers that failed their last check are still worth a try if nothing else is left
+        healthy_candidates = [worker for worker in candidates if worker.healthy] or candidates
+
+        if not healthy_candidates:
+            return None
+
+        return min(healthy_candidates, key=lambda worker: worker.load)
+
+    async def synthesize(
+        self,
+        model_configuration: NarratorConfiguration,
+        content: str
+    ) -> Waveform:
+        """
+        Have the least busy worker speak a phrase
+
+        :param model_configuration: Details on HOW the phrase should be turned into speech
+        :param content: The text of the phrase
+        :raises ConnectionError: If no worker could be reached
+        :raises RemoteSynthesisError: If a worker was reached but could not speak the phrase
+        :return: The audio for the phrase
+        """
+        from .chunking import SynthesisCostModel
+
+        self.__ensure_monitoring()
+        attempted: typing.List[RemoteWorker] = []
+
+        while (worker := self.__choose_worker(attempted)) is not None:
+            attempted.append(worker)
+
+            try:
+                sound, measurements = await worker.synthesize(
+                    model_configuration,
+                    content,
+                    timeout=self.__request_timeout
+                )
+            except (OSError, EOFError, asyncio.TimeoutError) as error:
+                worker.mark_unhealthy(error)
+                continue
+
+            SynthesisCostModel.get_instance().merge(measurements)
+            return sound
+
+        raise ConnectionError(
+            f"Could not synthesize a phrase - none of the {len(self.__workers)} synthesis workers "
+            f"could be reached"
+        )
+
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "mode": "remote",
+            "worker_count": len(self.__workers),
+            "workers": [worker.dict() for worker in self.__workers]
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self.__health_task is not None:
+            self.__health_task.cancel()
+
+        for worker in self.__workers:
+            worker.close()
@@ -0,0 +1,295 @@
+"""
+Shares synthesis fairly between every connection so that one large document can't starve everyone else
+"""
+from __future__ import annotations
+
+import asyncio
+import enum
+import time
+import typing
+
+from collections import OrderedDict
+from collections import defaultdict
+from collections import deque
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+
+from easy_narrator.application_details import INTERACTIVE_PHRASE_LIMIT
+from easy_narrator.application_details import INTERACTIVE_WEIGHT
+from easy_narrator.application_details import MAX_INFERENCES_PER_MODEL
+from easy_narrator.application_logging import get_logger
+from easy_narrator.models import NarratorConfiguration
+
+from .audio import Waveform
+from .dispatch import PhraseDispatcher
+
+_LOGGER = get_logger()
+
+
+class SchedulingPriority(enum.IntEnum):
+    """
+    How urgently a phrase is needed. Lower values are served first
+    """
+    INTERACTIVE = 0
+    BULK = 1
+
+    @classmethod
+    def for_phrase_count(cls, phrase_count: int) -> SchedulingPriority:
+        """
+        Decide how urgent a request is based on how much there is to say
+        """
+        return cls.INTERACTIVE if phrase_count <= INTERACTIVE_PHRASE_LIMIT else cls.BULK
+
+
+@dataclass(eq=False)
+class ScheduledPhrase:
+    """
+    A phrase waiting for its turn to be synthesized
+    """
+    connection_id: str
+    model_configuration: NarratorConfiguration
+    content: str
+    priority: SchedulingPriority
+    result: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class SchedulerStatistics:
+    """
+    Counts describing how long phrases wait for their turn
+    """
+    scheduled: int = field(default=0)
+    dispatched: int = field(default=0)
+    total_wait: float = field(default=0.0)
+    longest_wait: float = field(default=0.0)
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.dispatched if self.dispatched else 0.0
+
+    def record_wait(self, wait: float):
+        self.dispatched += 1
+        self.total_wait += wait
+        self.longest_wait = max(self.longest_wait, wait)
+
+    def dict(self) -> typing.Dict[str, typing.Union[int, float]]:
+        statistics = asdict(self)
+        statistics.update(average_wait=self.average_wait)
+        return statistics
+
+
+class SynthesisScheduler:
+    """
+    Holds a queue of phrases for each connection and releases them to the dispatcher one phrase at a time
+
+    Connections take turns in round-robin order. Interactive phrases are preferred over bulk phrases, but a bulk
+    phrase is still released after every `interactive_weight` interactive phrases so that bulk work always advances.
+    Phrases are only released while their model has room, so any excess stays queued where it may be reordered.
+    This is the only place that limits how many phrases a model works on at once.
+    """
+    __instance: SynthesisScheduler = None
+
+    @classmethod
+    def get_instance(cls) -> SynthesisScheduler:
+        if cls.__instance is None:
+            cls.__instance = cls()
+        return cls.__instance
+
+    @classmethod
+    def configure(
+        cls,
+        interactive_weight: int = None,
+        max_inferences_per_model: int = None,
+        dispatcher: PhraseDispatcher = None
+    ) -> SynthesisScheduler:
+        cls.__instance = cls(
+            interactive_weight=interactive_weight,
+            max_inferences_per_model=max_inferences_per_model,
+            dispatcher=dispatcher
+        )
+        return cls.__instance
+
+    def __init__(
+        self,
+        interactive_weight: int = None,
+        max_inferences_per_model: int = None,
+        dispatcher: PhraseDispatcher = None
+    ):
+        """
+        :param interactive_weight: How many interactive phrases to release for each bulk phrase.
+            INTERACTIVE_WEIGHT if not given
+        :param max_inferences_per_model: The most phrases that may be released to a single model at once.
+            MAX_INFERENCES_PER_MODEL if not given
+        :param dispatcher: What released phrases are handed to. The shared PhraseDispatcher if not given
+        """
+        self.__interactive_weight = max(1, interactive_weight or INTERACTIVE_WEIGHT)
+        self.__max_inferences_per_model = max(1, max_inferences_per_model or MAX_INFERENCES_PER_MODEL)
+        self.__dispatcher = dispatcher
+        self.__queues: typing.Dict[SchedulingPriority, typing.OrderedDict[str, typing.Deque[ScheduledPhrase]]] = {
+            priority: OrderedDict()
+            for priority in SchedulingPriority
+        }
+        self.__in_flight: typing.DefaultDict[str, int] = defaultdict(int)
+        self.__interactive_streak = 0
+        self.__statistics = SchedulerStatistics()
+
+    @property
+    def dispatcher(self) -> PhraseDispatcher:
+        return self.__dispatcher or PhraseDispatcher.get_instance()
+
+    @property
+    def max_inferences_per_model(self) -> int:
+        return self.__max_inferences_per_model
+
+    @property
+    def statistics(self) -> SchedulerStatistics:
+        return self.__statistics
+
+    async def synthesize(
+        self,
+        model_configuration: NarratorConfiguration,
+        content: str,
+        connection_id: str,
+        priority: SchedulingPriority = SchedulingPriority.INTERACTIVE
+    ) -> Waveform:
+        """
+        Wait for a phrase's turn and synthesize it
+
+        :param model_configuration: Details on HOW the phrase should be turned into speech
+        :param content: The text of the phrase
+        :param connection_id: The identifier of whoever asked for the phrase
+        :param priority: How urgently the phrase is needed
+        :return: The audio for the phrase
+        """
+        phrase = ScheduledPhrase(
+            connection_id=connection_id,
+            model_configuration=model_configuration,
+            content=content,
+            priority=priority,
+            result=asyncio.get_running_loop().create_future()
+        )
+
+        queues = self.__queues[priority]
+
+        if connection_id not in queues:
+            queues[connection_id] = deque()
+
+        queues[connection_id].append(phrase)
+        self.__statistics.scheduled += 1
+        self.__dispatch()
+
+        try:
+            return await phrase.result
+        except asyncio.CancelledError:
+            self.__discard(phrase)
+            raise
+
+    def __discard(self, phrase: ScheduledPhrase):
+        """
+        Remove a phrase that nobody is waiting on from its queue so that it never reaches a model
+        """
+        queue = self.__queues[phrase.priority].get(phrase.connection_id)
+
+        if queue is None or phrase not in queue:
+            return
+
+        queue.remove(phrase)
+
+        if not queue:
+            del self.__queues[phrase.priority][phrase.connection_id]
+
+    def __has_capacity(self, model_name: str) -> bool:
+        return self.__in_flight[model_name] < self.__max_inferences_per_model
+
+    def __take_from(self, priority: SchedulingPriority) -> typing.Optional[ScheduledPhrase]:
+        queues = self.__queues[priority]
+
+        for connection_id in list(queues):
+            queue = queues[connection_id]
+
+            # Drop phrases that nobody is waiting for anymore
+            while queue and queue[0].result.done():
+                queue.popleft()
+
+            if not queue:
+                del queues[connection_id]
+                continue
+
+            if not self.__has_capacity(queue[0].model_configuration.name):
+                continue
+
+            phrase = queue.popleft()
+
+            # Send this connection to the back of the line
+            if queue:
+                queues.move_to_end(connection_id)
+            else:
+                del queues[connection_id]
+
+            return phrase
+
+        return None
+
+    def __next_phrase(self) -> typing.Optional[ScheduledPhrase]:
+        if self.__interactive_streak >= self.__interactive_weight:
+            order = (SchedulingPriority.BULK, SchedulingPriority.INTERACTIVE)
+        else:
+            order = (SchedulingPriority.INTERACTIVE, SchedulingPriority.BULK)
+
+        for priority in order:
+            phrase = self.__take_from(priority)
+
+            if phrase is not None:
+                if priority == SchedulingPriority.INTERACTIVE:
+                    self.__interactive_streak += 1
+                else:
+                    self.__interactive_streak = 0
+                return phrase
+
+        return None
+
+    def __dispatch(self):
+        while (phrase := self.__next_phrase()) is not None:
+            self.__in_flight[phrase.model_configuration.name] += 1
+            self.__statistics.record_wait(time.perf_counter() - phrase.enqueued_at)
+            asyncio.ensure_future(self.__run(phrase))
+
+    async def __run(self, phrase: ScheduledPhrase):
+        try:
+            sound = await self.dispatcher.synthesize(phrase.model_configuration, phrase.content)
+
+            if not phrase.result.done():
+                phrase.result.set_result(sound)
+        except Exception as error:
+            if not phrase.result.done():
+                phrase.result.set_exception(error)
+        finally:
+            self.__in_flight[phrase.model_configuration.name] -= 1
+            self.__dispatch()
+
+    def get_queue_depths(self) -> typing.Dict[str, typing.Dict[str, int]]:
+        """
+        Get the number of phrases waiting for each connection, by priority
+        """
+        depths: typing.Dict[str, typing.Dict[str, int]] = defaultdict(dict)
+
+        for priority, queues in self.__queues.items():
+            for connection_id, queue in queues.items():
+                depths[connection_id][priority.name.lower()] = len(queue)
+
+        return dict(depths)
+
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "interactive_weight": self.__interactive_weight,
+            "max_inferences_per_model": self.__max_inferences_per_model,
+            "queue_depths": self.get_queue_depths(),
+            "in_flight": {
+                model_name: count
+                for model_name, count in self.__in_flight.items()
+                if count
+            },
+            "statistics": self.__statistics.dict()
+        }
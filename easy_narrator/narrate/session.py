@@ -0,0 +1,90 @@
+"""
+Remembers the audio of a connection's previous narration so that re-reading edited text only speaks what changed
+"""
+from __future__ import annotations
+
+import typing
+
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+
+from .audio import Waveform
+
+
+@dataclass
+class SessionStatistics:
+    """
+    Counts of how much audio has been reused between a connection's narrations
+    """
+    narrations: int = field(default=0)
+    reused_phrases: int = field(default=0)
+    """Phrases recalled from the connection's previous narration"""
+    cached_phrases: int = field(default=0)
+    """Phrases found in the phrase cache"""
+    synthesized_phrases: int = field(default=0)
+    """Phrases that had to be spoken by a model"""
+
+    def dict(self) -> typing.Dict[str, int]:
+        return asdict(self)
+
+
+class NarrationSession:
+    """
+    The phrases and audio of the most recent narration for a single connection
+
+    Phrases are matched on the same key as the phrase cache, which covers the text, model, and voice, so an edited
+    document lines up with its previous version phrase by phrase regardless of where phrases were added or removed.
+    Unlike the phrase cache, nothing here is evicted to make room for other connections' audio, so at most the
+    phrases of the last two narrations are held.
+    """
+    def __init__(self):
+        self.__previous: typing.Dict[str, Waveform] = {}
+        self.__last_spoken: typing.Dict[str, Waveform] = {}
+        self.__statistics = SessionStatistics()
+
+    def recall(self, key: str) -> typing.Optional[Waveform]:
+        """
+        Get the audio for a phrase if it was spoken in the previous narration
+
+        :param key: The phrase cache key for the phrase
+        :return: The audio spoken for the phrase last time, if there was any
+        """
+        return self.__previous.get(key)
+
+    def record(self, spoken: typing.Mapping[str, Waveform], reused: int, synthesized: int, complete: bool = True):
+        """
+        Remember the audio of a narration so that the next one may reuse it
+
+        :param spoken: The audio for every phrase in the narration, keyed by phrase cache key
+        :param reused: How many of those phrases were recalled from the previous narration
+        :param synthesized: How many of those phrases were spoken by a model. The rest came from the phrase cache
+        :param complete: Whether every phrase was spoken. An incomplete narration is remembered alongside the
+            narration before it, rather than replacing it, so that an interrupted read does not lose the rest of the
+            previous one. Anything older than that is forgotten.
+        """
+        if complete:
+            self.__previous = dict(spoken)
+        else:
+            self.__previous = {**self.__last_spoken, **spoken}
+
+        self.__last_spoken = dict(spoken)
+
+        self.__statistics.narrations += 1
+        self.__statistics.reused_phrases += reused
+        self.__statistics.synthesized_phrases += synthesized
+        self.__statistics.cached_phrases += len(spoken) - reused - synthesized
+
+    @property
+    def statistics(self) -> SessionStatistics:
+        return self.__statistics
+
+    def clear(self):
+        self.__previous.clear()
+        self.__last_spoken.clear()
+
+    def __len__(self):
+        return len(self.__previous)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__previous
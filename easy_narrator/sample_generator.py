@@ -99,6 +99,12 @@ def generate_samples():
     if written_samples:
         _LOGGER.info(f"{written_samples} samples were written")
 
+    statistics = ModelCache.get_statistics()
+    _LOGGER.info(
+        f"Loaded {statistics.loads} models in {statistics.load_seconds:.2f} seconds "
+        f"and reused warm models {statistics.hits} times"
+    )
+
 
 if __name__ == "__main__":
     generate_samples()
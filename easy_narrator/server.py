@@ -18,9 +18,15 @@ from easy_narrator.application_details import MODEL_CATALOG_PATH
 
 from easy_narrator.handlers import navigate
 from easy_narrator.handlers.http import get_model_parameters
+from easy_narrator.handlers.http import get_model_cache_statistics
+from easy_narrator.handlers.http import get_narration_statistics
 from easy_narrator.handlers.http import get_parameters_for_all_models
 from easy_narrator.handlers.http import view_sample_gallery
 from easy_narrator.launch_parameters import ApplicationArguments
+from easy_narrator.narrate import SynthesisExecutor
+from easy_narrator.narrate import PhraseDispatcher
+from easy_narrator.narrate import RemoteWorkerPool
+from easy_narrator.narrate import SynthesisScheduler
 from easy_narrator.sample_generator import generate_samples
 from easy_narrator.utilities import common
 from easy_narrator.handlers import handle_index
@@ -52,30 +58,44 @@ class LocalApplication(web.Application):
         return super().add_routes(routes)
 
 
-def save_model_catalog():
-    from easy_narrator.utilities.model_cache import ModelCache
-    import json
+def save_model_catalog(rebuild: bool = False, process_count: int = None):
+    from easy_narrator.utilities.model_catalog import update_model_catalog
+    update = update_model_catalog(MODEL_CATALOG_PATH, process_count=process_count, rebuild=rebuild)
+    print(f"Model catalog written to {MODEL_CATALOG_PATH}: {update}")
 
-    model_information = {
-        model.fullname: model.dict()
-        for model in ModelCache.get_available_models()
-    }
 
-    with MODEL_CATALOG_PATH.open("w") as model_catalog:
-        json.dump(model_information, model_catalog, indent=4)
+async def shutdown_synthesis(application: web.Application):
+    PhraseDispatcher.get_instance().executor.shutdown(wait=False)
 
 
 def serve(arguments: ApplicationArguments) -> typing.NoReturn:
     application = LocalApplication()
 
     if arguments.generate_model_catalog:
-        save_model_catalog()
+        save_model_catalog(rebuild=arguments.rebuild_model_catalog, process_count=arguments.catalog_processes)
         return
 
     if arguments.generate_samples:
         generate_samples()
         return
 
+    if arguments.remote_workers:
+        executor = RemoteWorkerPool(arguments.remote_workers)
+        parallel_inferences = executor.worker_count
+    else:
+        executor = SynthesisExecutor.configure(
+            worker_count=arguments.synthesis_workers,
+            process_count=arguments.synthesis_processes,
+            torch_threads=arguments.torch_threads
+        )
+        parallel_inferences = executor.worker_count if executor.uses_processes else None
+
+    PhraseDispatcher.configure(executor=executor)
+
+    # Each synthesis process or remote worker has its own copy of every model, so each may speak a phrase at the same time
+    SynthesisScheduler.configure(max_inferences_per_model=parallel_inferences)
+    application.on_cleanup.append(shutdown_synthesis)
+
     register_resource_handlers(application)
 
     application.add_routes([
@@ -84,6 +104,8 @@ def serve(arguments: ApplicationArguments) -> typing.NoReturn:
         web.get(f"/models/list", handler=get_models),
         web.get(f"/models/parameters", handler=get_parameters_for_all_models),
         web.get("/models/parameters/{model_name}", get_model_parameters),
+        web.get("/models/cache", handler=get_model_cache_statistics),
+        web.get("/narration/statistics", handler=get_narration_statistics),
         web.get("/navigate", handler=navigate),
         web.get("/ws", handler=socket_handler)
     ])
@@ -0,0 +1,243 @@
+"""
+Reports how long the server takes to start and which imports that time goes to
+
+Run with `python -m easy_narrator.startup_report`. The server is imported in a fresh interpreter so that nothing is
+already cached, and the report exits with a failure if that takes longer than STARTUP_TIME_BUDGET.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+import typing
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+from easy_narrator import application_details
+
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|(?P<indent> *)(?P<module>\S+)")
+"""Matches a line written by `python -X importtime`, which reports microseconds"""
+
+DEFERRED_MODULES: typing.Sequence[str] = ("torch", "TTS", "pandas")
+"""Packages that are expensive to import and should wait until speech is first generated"""
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    """
+    How long a single module took to import
+    """
+    module: str
+    own_seconds: float
+    """Time spent running the module itself"""
+    cumulative_seconds: float
+    """Time spent running the module and everything that it imported for the first time"""
+    depth: int
+    """How many imports deep the module was first imported"""
+    importer: typing.Optional[str] = None
+    """The module that first imported this one. None if it was imported directly"""
+
+    @property
+    def package(self) -> str:
+        return self.module.split(".")[0]
+
+
+@dataclass
+class StartupReport:
+    """
+    How long it took to import a module in a fresh interpreter, broken down by what was imported
+    """
+    module: str
+    seconds: float
+    timings: typing.Sequence[ImportTiming]
+    budget: float
+
+    @property
+    def within_budget(self) -> bool:
+        return self.seconds <= self.budget
+
+    @property
+    def deferred_modules_imported(self) -> typing.List[str]:
+        """
+        Expensive packages that were imported even though nothing was spoken
+        """
+        imported_packages = {timing.package for timing in self.timings}
+        return [module for module in DEFERRED_MODULES if module in imported_packages]
+
+    def get_package_costs(self) -> typing.List[typing.Tuple[str, float]]:
+        """
+        How long each package took to import, including what it imported, from the slowest to the fastest
+
+        A package is charged for every place that something outside of it first imported one of its modules
+        """
+        costs: typing.Dict[str, float] = defaultdict(float)
+
+        for timing in self.timings:
+            if timing.importer is None or timing.importer.split(".")[0] != timing.package:
+                costs[timing.package] += timing.cumulative_seconds
+
+        return sorted(costs.items(), key=lambda cost: cost[1], reverse=True)
+
+    def get_application_costs(self) -> typing.List[ImportTiming]:
+        """
+        How long each of this application's own modules took to import, from the slowest to the fastest
+        """
+        return sorted(
+            [timing for timing in self.timings if timing.package == "easy_narrator"],
+            key=lambda timing: timing.cumulative_seconds,
+            reverse=True
+        )
+
+    def format(self, limit: int = 15) -> str:
+        lines = [
+            f"Importing {self.module} took {self.seconds:.3f}s "
+            f"({'within' if self.within_budget else 'over'} the {self.budget:.3f}s budget)",
+            "",
+            f"{'Package':<48} {'Cumulative':>12}",
+        ]
+        lines.extend(
+            f"{package:<48} {seconds * 1000:>10.1f}ms"
+            for package, seconds in self.get_package_costs()[:limit]
+        )
+        lines.extend(["", f"{'Module':<48} {'Cumulative':>12} {'Own':>10}"])
+        lines.extend(
+            f"{timing.module:<48} {timing.cumulative_seconds * 1000:>10.1f}ms {timing.own_seconds * 1000:>8.1f}ms"
+            for timing in self.get_application_costs()[:limit]
+        )
+
+        if self.deferred_modules_imported:
+            lines.extend([
+                "",
+                f"Imported before any speech was generated: {', '.join(self.deferred_modules_imported)}"
+            ])
+
+        return "\n".join(lines)
+
+
+def parse_import_times(output: str) -> typing.List[ImportTiming]:
+    """
+    Read the timings that `python -X importtime` writes to stderr
+    """
+    matches = [
+        match
+        for match in map(IMPORT_TIME_PATTERN.match, output.splitlines())
+        if match is not None
+    ]
+
+    timings = []
+    importers: typing.List[typing.Tuple[int, str]] = []
+
+    # Modules are listed after everything they import, so reading backwards meets each importer before its imports
+    for match in reversed(matches):
+        depth = max(0, (len(match.group("indent")) - 1) // 2)
+
+        while importers and importers[-1][0] >= depth:
+            importers.pop()
+
+        timings.append(
+            ImportTiming(
+                module=match.group("module"),
+                own_seconds=int(match.group("self")) / 1_000_000,
+                cumulative_seconds=int(match.group("cumulative")) / 1_000_000,
+                depth=depth,
+                importer=importers[-1][1] if importers else None
+            )
+        )
+        importers.append((depth, match.group("module")))
+
+    timings.reverse()
+    return timings
+
+
+def measure_startup(module: str = "easy_narrator.server", budget: float = None) -> StartupReport:
+    """
+    Import a module in a fresh interpreter and record where the time went
+
+    :param module: The module to import
+    :param budget: The most seconds the import should take. STARTUP_TIME_BUDGET if not given
+    :raises RuntimeError: If the module could not be imported
+    """
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+
+    start = time.perf_counter()
+    completed_process = subprocess.run(command, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+
+    if completed_process.returncode != 0:
+        raise RuntimeError(f"Could not import {module}:\n{completed_process.stderr[-2000:]}")
+
+    return StartupReport(
+        module=module,
+        seconds=seconds,
+        timings=parse_import_times(completed_process.stderr),
+        budget=application_details.STARTUP_TIME_BUDGET if budget is None else budget
+    )
+
+
+class ReportArguments:
+    def __init__(self, *argv):
+        self.__module: str = "easy_narrator.server"
+        self.__limit: int = 15
+        self.__budget: float = application_details.STARTUP_TIME_BUDGET
+
+        self.__parse_arguments(*argv)
+
+    @property
+    def module(self) -> str:
+        return self.__module
+
+    @property
+    def limit(self) -> int:
+        return self.__limit
+
+    @property
+    def budget(self) -> float:
+        return self.__budget
+
+    def __parse_arguments(self, *argv):
+        parser = argparse.ArgumentParser(
+            prog=f"{application_details.APPLICATION_NAME} Startup Report",
+            description="Reports how long the server takes to start and which imports that time goes to"
+        )
+
+        parser.add_argument(
+            "--module",
+            dest="module",
+            default="easy_narrator.server",
+            help="The module whose import should be measured"
+        )
+
+        parser.add_argument(
+            "--limit",
+            dest="limit",
+            type=int,
+            default=15,
+            help="The most packages and modules to list"
+        )
+
+        parser.add_argument(
+            "--budget",
+            dest="budget",
+            type=float,
+            default=application_details.STARTUP_TIME_BUDGET,
+            help="The most seconds that the import should take"
+        )
+
+        parameters = parser.parse_args(argv)
+
+        self.__module = parameters.module
+        self.__limit = parameters.limit
+        self.__budget = parameters.budget
+
+
+def main(arguments: ReportArguments) -> int:
+    report = measure_startup(arguments.module, budget=arguments.budget)
+    print(report.format(limit=arguments.limit))
+    return 0 if report.within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(ReportArguments(*sys.argv[1:])))
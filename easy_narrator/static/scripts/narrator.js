@@ -60,6 +60,20 @@ function initializeApplication() {
             enumerable: true
         }
     )
+
+    Object.defineProperty(
+        narrator,
+        "replacedReads",
+        {
+            /**
+             * IDs of cancelled reads that the server hasn't finished with yet
+             * @type {Set<string>}
+             **/
+            value: new Set(),
+            writable: false,
+            enumerable: true
+        }
+    )
 }
 
 function initializeEditor() {
@@ -108,6 +122,7 @@ async function initializeClient() {
     client.addHandler("error", handleError);
     client.addHandler("kill", closeApplication);
     client.addHandler("transfer_complete", completeLoading);
+    client.addHandler("cancelled", cancelLoading);
     client.addHandler(
         "load",
         openLoadModal
@@ -118,7 +133,17 @@ async function initializeClient() {
     )
     
     client.addBinaryHandler((data) => {
+        if (narrator.replacedReads.size) {
+            // The server finishes one read before starting the next, so this track belongs to a cancelled read
+            return;
+        }
+
         narrator.app.addTrack(data);
+
+        if (narrator.awaitingFirstTrack) {
+            narrator.awaitingFirstTrack = false;
+            textRead();
+        }
     })
 
     client.registerPayloadType("connection_opened", OpenResponse);
@@ -126,6 +151,7 @@ async function initializeClient() {
     client.registerPayloadType("kill", KillResponse)
     client.registerPayloadType("read", AudioResponse)
     client.registerPayloadType("transfer_complete", DataTransferCompleteResponse);
+    client.registerPayloadType("cancelled", DataTransferCompleteResponse);
     client.registerPayloadType("load", LoadResponse);
 
     Object.defineProperty(
@@ -150,6 +176,7 @@ function toggleContentLoadStatus() {
 }
 
 async function handleError(payload) {
+    narrator.replacedReads.delete(payload['message_id']);
     $("#failed_message_type").text(Boolean(payload['message_type']) ? payload["message_type"] : "Unknown")
     $("#failed-message-id").text(payload['message_id']);
     $("#error-message").text(payload['error_message']);
@@ -259,10 +286,16 @@ async function loadDataClicked() {
 
 function textRead() {
     closeAllDialogs();
-    console.log("Text read, now loading audio...");
-    narrator.app.trackIndex = 0;
     /** @type {HTMLAudioElement} **/
     const audio = narrator.app.audio;
+
+    if (!audio.paused) {
+        // Audio is streamed, so playback may have already started with the first track
+        return;
+    }
+
+    console.log("Text read, now loading audio...");
+    narrator.app.trackIndex = 0;
     audio.play().then();
 }
 
@@ -280,14 +313,23 @@ async function readTextClicked() {
         configuration['speaker'] = narrator.app.selectedSpeaker;
     }
 
+    if (narrator.currentRead && narrator.currentlyLoading.includes(narrator.currentRead)) {
+        // Only the newest narration is worth finishing
+        narrator.replacedReads.add(narrator.currentRead);
+        await narrator.client.send(new narrator.CancelRequest({targetMessageID: narrator.currentRead}));
+    }
+
     const request = new narrator.ReadRequest({
         text: narrator.app.text,
         configuration: configuration
     });
 
+    narrator.currentRead = request.message_id;
+
     narrator.currentlyLoading.push(request.message_id);
     narrator.onLoadComplete[request.message_id] = textRead;
     narrator.app.clearTracks();
+    narrator.awaitingFirstTrack = true;
     await narrator.client.send(request, true);
 }
 /**
@@ -296,6 +338,18 @@ async function readTextClicked() {
  * @returns {Promise<void>}
  */
 async function completeLoading(response) {
+    narrator.replacedReads.delete(response.messageID);
+    narrator.currentlyLoading.remove(response.messageID);
+}
+
+/**
+ *
+ * @param {DataTransferCompleteResponse} response
+ * @returns {Promise<void>}
+ */
+async function cancelLoading(response) {
+    narrator.replacedReads.delete(response.messageID);
+    delete narrator.onLoadComplete[response.messageID];
     narrator.currentlyLoading.remove(response.messageID);
 }
 
@@ -69,28 +69,60 @@ export class KillRequest extends Request {
     }
 }
 
+export class CancelRequest extends Request {
+    operation = "cancel"
+    /** @type {string} **/
+    targetMessageID
+
+    constructor({targetMessageID}) {
+        super();
+        this.targetMessageID = targetMessageID;
+    }
+
+    get payload() {
+        return {
+            "message_id": this.message_id,
+            "operation": this.operation,
+            "target_message_id": this.targetMessageID
+        }
+    }
+
+    get operation() {
+        return "cancel";
+    }
+}
+
 export class ReadRequest extends Request {
     operation = "read"
     text
     /** @type {object} **/
     configuration
+    /** @type {string|undefined} **/
+    audioFormat
 
-    constructor({text, configuration}) {
+    constructor({text, configuration, audioFormat}) {
         super();
         this.text = text;
         this.configuration = typeof configuration !== 'undefined' ? configuration : {};
+        this.audioFormat = audioFormat;
         this.onSend(function() {
             openDialog("#loading-modal");
         })
     }
 
     get payload() {
-        return {
+        const payload = {
             "message_id": this.message_id,
             "operation": this.operation,
             "text": this.text,
             configuration: this.configuration
         }
+
+        if (this.audioFormat) {
+            payload["audio_format"] = this.audioFormat;
+        }
+
+        return payload;
     }
 
     get operation() {
@@ -100,4 +132,5 @@ export class ReadRequest extends Request {
 
 window.narrator.FileSelectionRequest = FileSelectionRequest;
 window.narrator.KillRequest = KillRequest;
+window.narrator.CancelRequest = CancelRequest;
 window.narrator.ReadRequest = ReadRequest;
\ No newline at end of file
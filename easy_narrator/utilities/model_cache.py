@@ -1,78 +1,446 @@
 """
-@TODO: Put a module wide description here
+A process-wide pool of warm text-to-speech models, keyed by model name and device
 """
 from __future__ import annotations
 
+import asyncio
+import ctypes
+import ctypes.util
+import gc
+import threading
 import typing
 import os
 import sys
+import time
 
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import asdict
 from pathlib import Path
 
-from TTS.api import TTS
-from torch import cuda
-
 from ..models import ModelInfo
+from ..models.model_metadata import ModelMetadata
+from ..models.model_metadata import get_model_metadata
+from ..models.model_metadata import list_known_models
+from ..application_details import MODEL_CACHE_MAX_MODELS
+from ..application_details import MODEL_CACHE_MEMORY_BUDGET
+from ..application_details import MODEL_LOAD_TIMEOUT
+from ..application_details import MODEL_INDEX_REFRESH_INTERVAL
+from ..application_details import PINNED_MODELS
+from ..application_logging import get_logger
+
+if typing.TYPE_CHECKING:
+    from TTS.api import TTS
+
+_LOGGER = get_logger()
+
+ModelKey = typing.Tuple[str, str]
+"""The name of a model paired with the name of the device it was loaded on"""
+
+
+def get_device() -> str:
+    """
+    Get the name of the device that models should be loaded onto
+    """
+    from torch import cuda
+    return "cuda" if cuda.is_available() else "cpu"
+
+
+def estimate_model_size(model: TTS) -> int:
+    """
+    Estimate how many bytes the weights and buffers of a model occupy
+
+    :param model: The model to measure
+    :return: The estimated number of bytes held by the model. 0 if it could not be measured
+    """
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except Exception as error:
+        _LOGGER.warning(f"Could not estimate the size of {type(model).__name__}: {error}")
+        return 0
+
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def release_memory():
+    """
+    Collect garbage and hand freed memory back to the operating system and GPU driver where possible
+    """
+    gc.collect()
+
+    # Nothing can be held on the GPU if torch was never imported, so there's no reason to import it here
+    torch = sys.modules.get("torch")
+
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
 
+    if sys.platform.startswith("linux"):
+        library_path = ctypes.util.find_library("c")
+
+        if library_path:
+            try:
+                ctypes.CDLL(library_path).malloc_trim(0)
+            except (OSError, AttributeError) as error:
+                _LOGGER.debug(f"Could not trim the heap after releasing models: {error}")
+
+
+@dataclass
+class ResidentModel:
+    """
+    A model held in the model cache along with what is known about its footprint
+    """
+    name: str
+    device: str
+    model: TTS
+    size: int = field(default=0)
+
+    def dict(self, pinned: bool = False) -> typing.Dict[str, typing.Union[str, int, bool]]:
+        return {
+            "name": self.name,
+            "device": self.device,
+            "bytes": self.size,
+            "pinned": pinned
+        }
+
+
+@dataclass
+class ModelCacheStatistics:
+    """
+    Counts describing how well the model cache is serving requests
+    """
+    loads: int = field(default=0)
+    hits: int = field(default=0)
+    evictions: int = field(default=0)
+    shared_loads: int = field(default=0)
+    load_seconds: float = field(default=0.0)
+
+    @property
+    def requests(self) -> int:
+        return self.loads + self.hits + self.shared_loads
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    def dict(self) -> typing.Dict[str, typing.Union[int, float]]:
+        statistics = asdict(self)
+        statistics.update(requests=self.requests, hit_rate=self.hit_rate)
+        return statistics
 
 
 class ModelCache:
+    """
+    A least-recently-used pool of loaded models that stays within a configured model count and memory budget
+
+    Pinned models are never evicted
+    """
     __instance: ModelCache = None
 
     @classmethod
-    def get_model(cls, model_name: str) -> TTS:
+    def get_instance(cls) -> ModelCache:
         if cls.__instance is None:
-            cls.__instance = cls()
+            with cls.__instance_lock:
+                if cls.__instance is None:
+                    cls.__instance = cls()
+        return cls.__instance
+
+    @classmethod
+    def get_model(cls, model_name: str, device: str = None, timeout: float = None) -> TTS:
+        return cls.get_instance().get(model_name, device=device, timeout=timeout)
 
-        return cls.__instance.get(model_name)
+    @classmethod
+    async def get_model_async(cls, model_name: str, device: str = None, timeout: float = None) -> TTS:
+        return await cls.get_instance().get_async(model_name, device=device, timeout=timeout)
 
     @classmethod
     def get_available_models(cls) -> typing.Sequence[ModelInfo]:
-        if cls.__instance is None:
-            cls.__instance = cls()
-        return cls.__instance.available_models
+        return cls.get_instance().available_models
 
     @classmethod
     def is_available(cls, model: typing.Union[ModelInfo, str]) -> bool:
-        if cls.__instance is None:
-            cls.__instance = cls()
-        return model in cls.__instance
+        return model in cls.get_instance()
+
+    @classmethod
+    def get_model_metadata(cls, model_name: str) -> typing.Optional[ModelMetadata]:
+        return cls.get_instance().get_metadata(model_name)
+
+    @classmethod
+    def get_statistics(cls) -> ModelCacheStatistics:
+        return cls.get_instance().statistics
+
+    __instance_lock: threading.Lock = threading.Lock()
 
-    def __init__(self):
-        self._cache = {}
+    def __init__(
+        self,
+        max_models: int = None,
+        memory_budget: int = None,
+        pinned_models: typing.Iterable[str] = None
+    ):
+        """
+        :param max_models: The most models that may be resident at once. 0 means no limit
+        :param memory_budget: The most bytes that resident models may occupy. 0 means no limit
+        :param pinned_models: The names of models that may never be evicted
+        """
+        self._cache: typing.OrderedDict[ModelKey, ResidentModel] = OrderedDict()
         self._tts_directory = get_tts_data_dir()
+        self._statistics = ModelCacheStatistics()
+        self._max_models = MODEL_CACHE_MAX_MODELS if max_models is None else max_models
+        self._memory_budget = MODEL_CACHE_MEMORY_BUDGET if memory_budget is None else memory_budget
+        self._pinned_models: typing.Set[str] = set(PINNED_MODELS if pinned_models is None else pinned_models)
+        self._lock = threading.RLock()
+        self._loading: typing.Dict[ModelKey, Future] = {}
+        self._model_index = DownloadedModelIndex(self._tts_directory, model_cache=self)
+
+    def get(self, model_name: str, device: str = None, timeout: float = None) -> TTS:
+        """
+        Get a loaded model, loading it if no one else already is
+
+        Callers asking for a model that is already being loaded wait on that load rather than starting their own
+
+        :param model_name: The name of the model to get
+        :param device: The device the model should live on. The best available device if not given
+        :param timeout: The most seconds to wait on another caller's load. MODEL_LOAD_TIMEOUT if not given
+        :return: The loaded model
+        """
+        key: ModelKey = (model_name, device or get_device())
+        model, pending_load = self._claim(key)
+
+        if model is not None:
+            return model
+
+        if pending_load is not None:
+            return pending_load.result(timeout=self._get_timeout(timeout))
+
+        return self._load(key)
+
+    async def get_async(self, model_name: str, device: str = None, timeout: float = None) -> TTS:
+        """
+        Get a loaded model without blocking the event loop, loading it if no one else already is
+
+        :param model_name: The name of the model to get
+        :param device: The device the model should live on. The best available device if not given
+        :param timeout: The most seconds to wait on another caller's load. MODEL_LOAD_TIMEOUT if not given
+        :return: The loaded model
+        """
+        key: ModelKey = (model_name, device or get_device())
+        model, pending_load = self._claim(key)
+
+        if model is not None:
+            return model
+
+        if pending_load is None:
+            pending_load = asyncio.get_running_loop().run_in_executor(None, self._load, key)
+        else:
+            pending_load = asyncio.wrap_future(pending_load)
+
+        # Shield the load so that a waiter timing out doesn't cancel the load for everyone else
+        return await asyncio.wait_for(asyncio.shield(pending_load), timeout=self._get_timeout(timeout))
+
+    @staticmethod
+    def _get_timeout(timeout: typing.Optional[float]) -> typing.Optional[float]:
+        if timeout is None:
+            timeout = MODEL_LOAD_TIMEOUT
+        return timeout or None
+
+    def _claim(self, key: ModelKey) -> typing.Tuple[typing.Optional[TTS], typing.Optional[Future]]:
+        """
+        Find a model that is already loaded or being loaded, or mark the caller as responsible for loading it
+
+        :param key: The name and device of the model to claim
+        :return: The model if it is loaded and the load to wait on if someone else is loading it.
+            Both are None if the caller is now responsible for loading the model.
+        """
+        with self._lock:
+            if key in self._cache:
+                self._statistics.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key].model, None
+
+            if key in self._loading:
+                self._statistics.shared_loads += 1
+                return None, self._loading[key]
+
+            self._loading[key] = Future()
+            return None, None
+
+    def _load(self, key: ModelKey) -> TTS:
+        # TTS brings torch with it, so neither is imported until a model is first needed
+        from TTS.api import TTS
+
+        model_name, device = key
+        pending_load = self._loading[key]
 
-    def get(self, model_name: str) -> TTS:
-        if model_name not in self._cache:
-            device = "cuda" if cuda.is_available() else "cpu"
+        try:
+            was_downloaded = model_name in self._model_index
+
+            _LOGGER.info(f"Loading the {model_name} model onto {device}")
+            load_start = time.perf_counter()
             model: TTS = TTS(model_name).to(device=device)
-            self._cache[model_name] = model
-        return self._cache[model_name]
+            load_duration = time.perf_counter() - load_start
+            _LOGGER.info(f"Loaded the {model_name} model onto {device} in {load_duration:.2f} seconds")
+
+            # TTS downloads models that it doesn't have yet, so the index has to look at the directory again
+            if not was_downloaded:
+                self._model_index.invalidate()
+
+            with self._lock:
+                self._statistics.loads += 1
+                self._statistics.load_seconds += load_duration
+                self._cache[key] = ResidentModel(
+                    name=model_name,
+                    device=device,
+                    model=model,
+                    size=estimate_model_size(model)
+                )
+                self._enforce_limits(protected_key=key)
+        except BaseException as error:
+            with self._lock:
+                del self._loading[key]
+            pending_load.set_exception(error)
+            raise
+
+        with self._lock:
+            del self._loading[key]
+
+        pending_load.set_result(model)
+        return model
+
+    def pin(self, model_name: str):
+        """
+        Keep every copy of the given model resident regardless of how long it has been since it was used
+        """
+        with self._lock:
+            self._pinned_models.add(model_name)
+
+    def unpin(self, model_name: str):
+        """
+        Allow the given model to be evicted again
+        """
+        with self._lock:
+            self._pinned_models.discard(model_name)
+            self._enforce_limits()
+
+    def is_pinned(self, model_name: str) -> bool:
+        return model_name in self._pinned_models
+
+    def evict(self, model_name: str, device: str = None) -> bool:
+        """
+        Remove a model from the cache and release its memory, even if it is pinned
+
+        :param model_name: The name of the model to remove
+        :param device: The device to remove the model from. Every device if not given
+        :return: Whether anything was removed
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._cache
+                if key[0] == model_name and (device is None or key[1] == device)
+            ]
+
+            for key in keys:
+                self._remove(key)
+
+        if keys:
+            release_memory()
+
+        return len(keys) > 0
+
+    @property
+    def resident_size(self) -> int:
+        """
+        The estimated number of bytes occupied by every resident model
+        """
+        with self._lock:
+            return sum(resident_model.size for resident_model in self._cache.values())
+
+    @property
+    def resident_models(self) -> typing.Sequence[ResidentModel]:
+        """
+        Every resident model, ordered from least to most recently used
+        """
+        with self._lock:
+            return list(self._cache.values())
+
+    def _is_over_limit(self) -> bool:
+        if self._max_models and len(self._cache) > self._max_models:
+            return True
+        return bool(self._memory_budget) and self.resident_size > self._memory_budget
+
+    def _remove(self, key: ModelKey):
+        resident_model = self._cache.pop(key)
+        self._statistics.evictions += 1
+        _LOGGER.info(
+            f"Evicted the {resident_model.name} model from {resident_model.device}, "
+            f"freeing roughly {resident_model.size} bytes"
+        )
+
+    def _enforce_limits(self, protected_key: ModelKey = None):
+        evicted_model = False
+
+        while self._is_over_limit():
+            candidates = [
+                key
+                for key in self._cache
+                if key != protected_key and not self.is_pinned(key[0])
+            ]
+
+            if not candidates:
+                _LOGGER.warning(
+                    f"The model cache holds {len(self._cache)} models occupying roughly {self.resident_size} bytes, "
+                    f"which exceeds its limits, but every remaining model is pinned or in use"
+                )
+                break
+
+            self._remove(candidates[0])
+            evicted_model = True
+
+        if evicted_model:
+            release_memory()
+
+    @property
+    def statistics(self) -> ModelCacheStatistics:
+        return self._statistics
+
+    @property
+    def loaded_models(self) -> typing.Sequence[ModelKey]:
+        with self._lock:
+            return list(self._cache.keys())
 
     @property
     def models(self) -> typing.List[ModelInfo]:
         return [
             ModelInfo(fullname=model_name)
-            for model_name in TTS.list_models()
+            for model_name in list_known_models()
             if model_name.startswith("tts_model")
         ]
 
+    @property
+    def model_index(self) -> DownloadedModelIndex:
+        return self._model_index
+
     @property
     def available_models(self) -> typing.List[ModelInfo]:
-        models = [
-            ModelInfo(fullname=full_model_name)
-            for full_model_name in get_downloaded_models()
-        ]
+        return self._model_index.models
+
+    def get_metadata(self, model_name: str) -> typing.Optional[ModelMetadata]:
+        """
+        Describe a downloaded model without loading it
+
+        :param model_name: The name of the model to describe
+        :return: What the model can do. None if it has not been downloaded or could not be described
+        """
+        model_name = model_name.strip().replace("--", "/")
 
-        for model in models:
-            model.model_cache = self
+        if model_name not in self._model_index:
+            return None
 
-        return models
+        return get_model_metadata(model_name, self._tts_directory / model_name.replace("/", "--"))
 
     def __contains__(self, model_name: typing.Union[str, ModelInfo]) -> bool:
-        if isinstance(model_name, str):
-            return model_name in [model.fullname for model in self.available_models]
-        return model_name in self.available_models
+        return model_name in self._model_index
 
 
 def get_tts_data_dir() -> Path:
@@ -97,9 +465,100 @@ def get_tts_data_dir() -> Path:
     return ans.joinpath("tts")
 
 
-def get_downloaded_models() -> typing.List[str]:
+def get_downloaded_models(tts_directory: Path = None) -> typing.List[str]:
     return [
         directory.stem.replace("--", "/")
-        for directory in get_tts_data_dir().iterdir()
+        for directory in (tts_directory or get_tts_data_dir()).iterdir()
         if directory.stem.startswith("tts_model")
-    ]
\ No newline at end of file
+    ]
+
+
+class DownloadedModelIndex:
+    """
+    The models that have been downloaded into the TTS data directory, keyed by their full names
+
+    The directory is only read again when its modification time changes, which happens whenever a model's directory
+    is added or removed, and its modification time is checked no more often than the refresh interval. Lookups in
+    between never touch the filesystem.
+    """
+    def __init__(self, tts_directory: Path = None, model_cache: ModelCache = None, refresh_interval: float = None):
+        """
+        :param tts_directory: Where models are downloaded to. The TTS data directory if not given
+        :param model_cache: The cache that listed models should load through
+        :param refresh_interval: The fewest seconds between checks of the directory. MODEL_INDEX_REFRESH_INTERVAL
+            if not given
+        """
+        self.__tts_directory = Path(tts_directory or get_tts_data_dir())
+        self.__model_cache = model_cache
+        self.__refresh_interval = MODEL_INDEX_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        self.__lock = threading.Lock()
+        self.__models: typing.Dict[str, ModelInfo] = {}
+        self.__is_indexed = False
+        self.__modified_at: typing.Optional[int] = None
+        self.__checked_at = float("-inf")
+        self.__scans = 0
+
+    def __get_modification_time(self) -> typing.Optional[int]:
+        try:
+            return self.__tts_directory.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def __refresh(self):
+        if time.monotonic() - self.__checked_at < self.__refresh_interval:
+            return
+
+        with self.__lock:
+            if time.monotonic() - self.__checked_at < self.__refresh_interval:
+                return
+
+            modified_at = self.__get_modification_time()
+            self.__checked_at = time.monotonic()
+
+            if self.__is_indexed and modified_at == self.__modified_at:
+                return
+
+            model_names = get_downloaded_models(self.__tts_directory) if modified_at is not None else []
+            models: typing.Dict[str, ModelInfo] = {}
+
+            for model_name in model_names:
+                model = self.__models.get(model_name) or ModelInfo(fullname=model_name)
+                model.model_cache = self.__model_cache
+                models[model.fullname] = model
+
+            self.__models = models
+            self.__modified_at = modified_at
+            self.__is_indexed = True
+            self.__scans += 1
+            _LOGGER.debug(f"Found {len(models)} downloaded models in {self.__tts_directory}")
+
+    def invalidate(self):
+        """
+        Make the next lookup read the directory again, such as right after downloading a model
+        """
+        with self.__lock:
+            self.__is_indexed = False
+            self.__checked_at = float("-inf")
+
+    @property
+    def models(self) -> typing.List[ModelInfo]:
+        self.__refresh()
+        return list(self.__models.values())
+
+    @property
+    def scans(self) -> int:
+        """
+        The number of times that the directory has been read
+        """
+        return self.__scans
+
+    def get(self, model_name: str) -> typing.Optional[ModelInfo]:
+        self.__refresh()
+        return self.__models.get(model_name.strip().replace("--", "/"))
+
+    def __contains__(self, model: typing.Union[str, ModelInfo]) -> bool:
+        return self.get(model.fullname if isinstance(model, ModelInfo) else model) is not None
+
+    def __len__(self) -> int:
+        self.__refresh()
+        return len(self.__models)
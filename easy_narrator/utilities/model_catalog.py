@@ -0,0 +1,259 @@
+"""
+Builds the catalog of downloaded models, describing only the models that are new or changed since it was last built
+
+Models are described in worker processes. Most are described from the files downloaded with them; a model whose
+files can't be read is loaded in its worker just long enough to ask it what it can do, then released.
+"""
+from __future__ import annotations
+
+import gc
+import hashlib
+import json
+import multiprocessing
+import os
+import typing
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import asdict
+from pathlib import Path
+
+from easy_narrator.application_details import CATALOG_PROCESS_COUNT
+from easy_narrator.application_details import MODEL_CATALOG_PATH
+from easy_narrator.application_logging import get_logger
+from easy_narrator.models import ModelInfo
+from easy_narrator.models.model_metadata import ModelMetadata
+from easy_narrator.models.model_metadata import get_model_metadata
+from easy_narrator.models.registry import MODEL_NAMES
+
+_LOGGER = get_logger()
+
+CATALOG_FORMAT_VERSION = 1
+"""Part of every fingerprint so that changing how entries are built describes every model again"""
+
+FINGERPRINT_KEY = "fingerprint"
+"""The key within each catalog entry that records the state of the files it was built from"""
+
+CatalogEntry = typing.Dict[str, typing.Any]
+
+
+def fingerprint_model(directory: Path) -> typing.Optional[str]:
+    """
+    Summarize the files that a model was downloaded with
+
+    The fingerprint changes whenever a file is added, removed, resized, or modified, which is everything that could
+    change what the model can do
+
+    :param directory: The directory that the model was downloaded into
+    :return: A digest of the name, size, and modification time of every file. None if the directory can't be read
+    """
+    digest = hashlib.sha1(str(CATALOG_FORMAT_VERSION).encode())
+
+    try:
+        files = sorted(path for path in directory.iterdir() if path.is_file())
+
+        for path in files:
+            details = path.stat()
+            digest.update(f"{path.name}:{details.st_size}:{details.st_mtime_ns};".encode())
+    except OSError:
+        return None
+
+    return digest.hexdigest()
+
+
+def inspect_loaded_model(fullname: str) -> ModelMetadata:
+    """
+    Describe a model by loading it, for models whose downloaded files couldn't describe them
+
+    The model is released as soon as it has been asked what it can do
+    """
+    from TTS.api import TTS
+
+    model = TTS(fullname)
+
+    try:
+        speakers = list(model.speakers or []) if model.is_multi_speaker else []
+        synthesizer = getattr(model, "synthesizer", None)
+        return ModelMetadata(
+            fullname=fullname,
+            architecture=type(getattr(synthesizer, "tts_model", model)).__name__.lower(),
+            sample_rate=getattr(synthesizer, "output_sample_rate", None),
+            speakers=speakers,
+            languages=list(model.languages or []) if model.is_multi_lingual else [],
+            speaker_count=max(len(speakers), 2 if model.is_multi_speaker else 0)
+        )
+    finally:
+        del model
+        gc.collect()
+
+
+class _CatalogSource:
+    """
+    Stands in for the model cache while describing a single model in a catalog worker
+    """
+    def __init__(self, metadata: ModelMetadata):
+        self.__metadata = metadata
+
+    def get_metadata(self, model_name: str) -> typing.Optional[ModelMetadata]:
+        return self.__metadata
+
+    def __contains__(self, model: typing.Union[str, ModelInfo]) -> bool:
+        return True
+
+
+def describe_model(fullname: str, directory: str) -> CatalogEntry:
+    """
+    Build the catalog entry for a single downloaded model
+
+    :param fullname: The full name of the model, like 'tts_models/en/vctk/vits'
+    :param directory: The directory that the model was downloaded into
+    :return: The model's entry in the catalog
+    """
+    metadata = get_model_metadata(fullname, Path(directory))
+
+    if metadata is None:
+        _LOGGER.info(f"Loading {fullname} to describe it since its downloaded files could not")
+        metadata = inspect_loaded_model(fullname)
+
+    model = ModelInfo(fullname=fullname)
+    model.model_cache = _CatalogSource(metadata)
+    return model.dict()
+
+
+@dataclass
+class CatalogUpdate:
+    """
+    What changed while updating the model catalog
+    """
+    described: typing.List[str] = field(default_factory=list)
+    reused: typing.List[str] = field(default_factory=list)
+    removed: typing.List[str] = field(default_factory=list)
+    failed: typing.List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.described or self.removed)
+
+    def dict(self) -> typing.Dict[str, typing.List[str]]:
+        return asdict(self)
+
+    def __str__(self):
+        return (
+            f"{len(self.described)} model(s) described, {len(self.reused)} unchanged, "
+            f"{len(self.removed)} removed, {len(self.failed)} failed"
+        )
+
+
+def read_model_catalog(catalog_path: Path = None) -> typing.Dict[str, CatalogEntry]:
+    """
+    Read a previously generated catalog
+
+    :return: Each model's entry keyed by its full name. Empty if there is no catalog or it can't be read
+    """
+    catalog_path = catalog_path or MODEL_CATALOG_PATH
+
+    try:
+        with catalog_path.open() as catalog_file:
+            return json.load(catalog_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as error:
+        _LOGGER.warning(f"Could not read the model catalog at {catalog_path} - every model will be described again: {error}")
+        return {}
+
+
+def write_model_catalog(catalog: typing.Mapping[str, CatalogEntry], catalog_path: Path = None):
+    """
+    Replace the catalog on disk without ever leaving a partially written catalog behind
+    """
+    catalog_path = catalog_path or MODEL_CATALOG_PATH
+    catalog_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = catalog_path.with_name(f".{catalog_path.name}.{os.getpid()}.tmp")
+
+    with temporary_path.open("w") as catalog_file:
+        json.dump(catalog, catalog_file, indent=4)
+
+    os.replace(temporary_path, catalog_path)
+
+    if catalog_path == MODEL_CATALOG_PATH:
+        MODEL_NAMES.reload()
+
+
+def update_model_catalog(
+    catalog_path: Path = None,
+    process_count: int = None,
+    rebuild: bool = False
+) -> CatalogUpdate:
+    """
+    Bring the model catalog up to date with the models that have been downloaded
+
+    Models whose files haven't changed since the catalog was last written keep their entries. Everything else is
+    described in parallel, and entries for models that are no longer downloaded are dropped.
+
+    :param catalog_path: Where the catalog is kept. MODEL_CATALOG_PATH if not given
+    :param process_count: The number of processes that describe models. CATALOG_PROCESS_COUNT if not given and one
+        per CPU core if that is 0
+    :param rebuild: Whether to describe every model again, even those that haven't changed
+    :return: What was changed
+    """
+    from easy_narrator.utilities.model_cache import get_downloaded_models
+    from easy_narrator.utilities.model_cache import get_tts_data_dir
+
+    catalog_path = catalog_path or MODEL_CATALOG_PATH
+    tts_directory = get_tts_data_dir()
+    previous_catalog = {} if rebuild else read_model_catalog(catalog_path)
+
+    catalog: typing.Dict[str, CatalogEntry] = {}
+    pending: typing.Dict[str, typing.Tuple[Path, typing.Optional[str]]] = {}
+    update = CatalogUpdate()
+
+    for fullname in sorted(get_downloaded_models(tts_directory)):
+        directory = tts_directory / fullname.replace("/", "--")
+        fingerprint = fingerprint_model(directory)
+        previous_entry = previous_catalog.get(fullname)
+
+        if fingerprint is not None and previous_entry and previous_entry.get(FINGERPRINT_KEY) == fingerprint:
+            catalog[fullname] = previous_entry
+            update.reused.append(fullname)
+        else:
+            pending[fullname] = (directory, fingerprint)
+
+    update.removed = sorted(set(previous_catalog).difference(catalog).difference(pending))
+
+    if pending:
+        process_count = CATALOG_PROCESS_COUNT if process_count is None else process_count
+        process_count = min(len(pending), process_count or os.cpu_count() or 1)
+        _LOGGER.info(f"Describing {len(pending)} model(s) on {process_count} process(es)")
+
+        # Workers are spawned rather than forked so that none inherit this process's models or torch threads
+        with ProcessPoolExecutor(max_workers=process_count, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {
+                executor.submit(describe_model, fullname, str(directory)): fullname
+                for fullname, (directory, _) in pending.items()
+            }
+
+            for future in as_completed(futures):
+                fullname = futures[future]
+
+                try:
+                    entry = future.result()
+                except Exception as error:
+                    _LOGGER.error(f"Could not describe {fullname}", exc_info=error)
+                    update.failed.append(fullname)
+
+                    # A stale description is more useful than none at all
+                    if fullname in previous_catalog:
+                        catalog[fullname] = previous_catalog[fullname]
+                    continue
+
+                entry[FINGERPRINT_KEY] = pending[fullname][1]
+                catalog[fullname] = entry
+                update.described.append(fullname)
+
+    if update.changed or not catalog_path.exists():
+        write_model_catalog(dict(sorted(catalog.items())), catalog_path)
+
+    _LOGGER.info(f"Updated the model catalog at {catalog_path}: {update}")
+    return update
@@ -0,0 +1,379 @@
+"""
+Keeps the files served from the static directory in memory, along with compressed copies of them
+
+Each file is read and compressed once and then served from memory until its modification time or size changes.
+Files larger than STATIC_ASSET_MAX_CACHED_SIZE are never held in memory and are streamed straight from disk instead.
+"""
+from __future__ import annotations
+
+import functools
+import gzip
+import hashlib
+import os
+import stat
+import threading
+import typing
+
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timezone
+from mimetypes import guess_type
+from pathlib import Path
+
+from easy_narrator.application_details import STATIC_ASSET_MAX_CACHED_SIZE
+from easy_narrator.application_logging import get_logger
+
+from . import mimetypes
+
+_LOGGER = get_logger()
+
+COMPRESSION_MINIMUM_SIZE = 1024
+"""Files smaller than this many bytes are sent as they are since compressing them saves next to nothing"""
+
+GZIP_LEVEL = 9
+"""How hard gzip works on each file. Files are only compressed once, so the slowest, smallest setting is used"""
+
+BROTLI_QUALITY = 11
+"""How hard brotli works on each file. Files are only compressed once, so the slowest, smallest setting is used"""
+
+COMPRESSIBLE_CONTENT_TYPES: typing.Sequence[str] = (
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+"""Content types outside of 'text/*' that shrink when compressed. Most images and audio are already compressed"""
+
+
+def compress_gzip(content: bytes) -> bytes:
+    # mtime is fixed so that compressing the same file always gives the same bytes
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_brotli(content: bytes) -> bytes:
+    import brotli
+    return brotli.compress(content, quality=BROTLI_QUALITY)
+
+
+CONTENT_ENCODINGS: typing.Mapping[str, typing.Callable[[bytes], bytes]] = {
+    "br": compress_brotli,
+    "gzip": compress_gzip,
+}
+"""Ways that files may be compressed, from the most to the least preferred"""
+
+
+@functools.lru_cache(maxsize=1)
+def get_supported_encodings() -> typing.Sequence[str]:
+    """
+    Get the names of every content encoding that files may be compressed with
+    """
+    supported_encodings = []
+
+    try:
+        import brotli
+        supported_encodings.append("br")
+    except ImportError:
+        _LOGGER.info("The brotli package is not installed; static files may only be compressed with gzip")
+
+    supported_encodings.append("gzip")
+    return supported_encodings
+
+
+def get_content_type(path: Path) -> typing.Optional[str]:
+    return mimetypes.get(path.suffix) or guess_type(path.name, strict=False)[0]
+
+
+def is_compressible(content_type: typing.Optional[str]) -> bool:
+    return content_type is not None and (
+        content_type.startswith("text/") or content_type in COMPRESSIBLE_CONTENT_TYPES
+    )
+
+
+def parse_accepted_encodings(accept_encoding: typing.Optional[str]) -> typing.Set[str]:
+    """
+    Read the content encodings that a client will accept from its Accept-Encoding header
+
+    :param accept_encoding: The value of the header
+    :return: The name of every encoding that wasn't refused with a quality of 0
+    """
+    accepted_encodings = set()
+
+    for entry in (accept_encoding or "").lower().split(","):
+        name, _, parameters = entry.partition(";")
+        name = name.strip()
+        quality = parameters.strip()
+
+        if not name or quality.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+
+        accepted_encodings.add(name)
+
+    return accepted_encodings
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    """
+    A single static file along with everything needed to answer a request for it
+    """
+    path: Path
+    content_type: typing.Optional[str]
+    size: int
+    modified_at: int
+    """The file's modification time in nanoseconds"""
+    etag: str
+    """An identifier for this version of the file, quoted as it is sent in the ETag header"""
+    content: typing.Optional[bytes] = field(default=None, repr=False)
+    """The contents of the file. None if the file is too large to hold in memory"""
+    encodings: typing.Mapping[str, bytes] = field(default_factory=dict, repr=False)
+    """Compressed copies of the contents, keyed by their content encoding"""
+
+    @property
+    def in_memory(self) -> bool:
+        return self.content is not None
+
+    @property
+    def last_modified(self) -> datetime:
+        # HTTP dates only go down to the second, so anything finer would make If-Modified-Since never match
+        return datetime.fromtimestamp(self.modified_at // 1_000_000_000, tz=timezone.utc)
+
+    @property
+    def memory_size(self) -> int:
+        return len(self.content or b"") + sum(len(encoded_content) for encoded_content in self.encodings.values())
+
+    def is_current(self, status: os.stat_result) -> bool:
+        return status.st_mtime_ns == self.modified_at and status.st_size == self.size
+
+    def select_encoding(self, accept_encoding: typing.Optional[str]) -> typing.Tuple[typing.Optional[str], bytes]:
+        """
+        Pick the smallest version of the file that the client will accept
+
+        :param accept_encoding: The client's Accept-Encoding header
+        :return: The content encoding, None if the file is sent as it is, and the bytes to send
+        """
+        if self.encodings:
+            accepted_encodings = parse_accepted_encodings(accept_encoding)
+
+            for encoding, encoded_content in self.encodings.items():
+                if encoding in accepted_encodings:
+                    return encoding, encoded_content
+
+        return None, self.content
+
+    def matches(self, if_none_match: typing.Optional[str]) -> bool:
+        """
+        Whether a client's If-None-Match header names this version of the file
+        """
+        if not if_none_match:
+            return False
+
+        if if_none_match.strip() == "*":
+            return True
+
+        # Compressed copies are sent under the same tag, so weak comparison is correct here
+        return any(
+            candidate.strip().removeprefix("W/") == self.etag
+            for candidate in if_none_match.split(",")
+        )
+
+    def is_unmodified_since(self, if_modified_since: typing.Optional[datetime]) -> bool:
+        return if_modified_since is not None and self.last_modified <= if_modified_since
+
+
+@dataclass
+class StaticAssetStatistics:
+    """
+    Counts describing how well the static asset cache is serving requests
+    """
+    hits: int = field(default=0)
+    misses: int = field(default=0)
+    """Requests that had to read a file from disk, either for the first time or since it changed"""
+    not_modified: int = field(default=0)
+    """Requests answered with a 304 since the client already had the file"""
+    streamed: int = field(default=0)
+    """Requests for files that were too large to hold in memory"""
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    def dict(self) -> typing.Dict[str, typing.Union[int, float]]:
+        statistics = asdict(self)
+        statistics.update(requests=self.requests, hit_rate=self.hit_rate)
+        return statistics
+
+
+def read_static_asset(path: Path, status: os.stat_result, max_cached_size: int) -> StaticAsset:
+    """
+    Read a file and compress it in every supported encoding
+
+    :param path: The file to read
+    :param status: The result of calling stat on the file
+    :param max_cached_size: Files larger than this many bytes are described but not read
+    :return: The file and its compressed copies
+    """
+    content_type = get_content_type(path)
+    etag = f'"{status.st_mtime_ns:x}-{status.st_size:x}"'
+
+    if status.st_size > max_cached_size:
+        return StaticAsset(
+            path=path,
+            content_type=content_type,
+            size=status.st_size,
+            modified_at=status.st_mtime_ns,
+            etag=etag
+        )
+
+    content = path.read_bytes()
+    encodings: typing.Dict[str, bytes] = {}
+
+    if len(content) >= COMPRESSION_MINIMUM_SIZE and is_compressible(content_type):
+        for encoding in get_supported_encodings():
+            encoded_content = CONTENT_ENCODINGS[encoding](content)
+
+            # A compressed copy that isn't smaller isn't worth the client's time to decompress
+            if len(encoded_content) < len(content):
+                encodings[encoding] = encoded_content
+
+    return StaticAsset(
+        path=path,
+        content_type=content_type,
+        size=len(content),
+        modified_at=status.st_mtime_ns,
+        etag=f'"{hashlib.sha1(content).hexdigest()[:20]}"',
+        content=content,
+        encodings=encodings
+    )
+
+
+class StaticAssetCache:
+    """
+    Static files held in memory, each checked against the file on disk before it is served
+    """
+    __instance: StaticAssetCache = None
+    __instance_lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> StaticAssetCache:
+        if cls.__instance is None:
+            with cls.__instance_lock:
+                if cls.__instance is None:
+                    cls.__instance = cls()
+        return cls.__instance
+
+    def __init__(self, max_cached_size: int = None):
+        """
+        :param max_cached_size: The largest file, in bytes, that will be held in memory.
+            STATIC_ASSET_MAX_CACHED_SIZE if not given
+        """
+        self.__max_cached_size = STATIC_ASSET_MAX_CACHED_SIZE if max_cached_size is None else max_cached_size
+        self.__assets: typing.Dict[Path, StaticAsset] = {}
+        self.__lock = threading.Lock()
+        self.__statistics = StaticAssetStatistics()
+
+    @property
+    def statistics(self) -> StaticAssetStatistics:
+        return self.__statistics
+
+    @property
+    def memory_size(self) -> int:
+        return sum(asset.memory_size for asset in list(self.__assets.values()))
+
+    def get_current(self, path: Path) -> typing.Tuple[typing.Optional[StaticAsset], typing.Optional[os.stat_result]]:
+        """
+        Find the cached copy of a file if it still matches the file on disk
+
+        This only calls stat on the file, so it is cheap enough to call from the event loop
+
+        :param path: The file to look for
+        :return: The cached copy, if it is current, and the file's status. Both are None if the file doesn't exist
+        """
+        try:
+            status = path.stat()
+        except OSError:
+            self.__assets.pop(path, None)
+            return None, None
+
+        asset = self.__assets.get(path)
+
+        if asset is not None and asset.is_current(status):
+            self.__statistics.hits += 1
+            return asset, status
+
+        self.__statistics.misses += 1
+        return None, status
+
+    def load(self, path: Path, status: os.stat_result = None) -> typing.Optional[StaticAsset]:
+        """
+        Read a file into the cache, replacing any older copy of it
+
+        Reading and compressing a large file may take a moment, so this is best called from a thread
+
+        :param path: The file to read
+        :param status: The file's status, if it was already checked
+        :return: The file. None if it doesn't exist or isn't a regular file
+        """
+        try:
+            status = status or path.stat()
+
+            if not stat.S_ISREG(status.st_mode):
+                return None
+
+            asset = read_static_asset(path, status, self.__max_cached_size)
+        except OSError:
+            self.__assets.pop(path, None)
+            return None
+
+        with self.__lock:
+            self.__assets[path] = asset
+
+        if asset.encodings:
+            _LOGGER.debug(
+                f"Cached {path.name} ({asset.size} bytes) with "
+                + ", ".join(f"{encoding}: {len(content)} bytes" for encoding, content in asset.encodings.items())
+            )
+
+        return asset
+
+    def warm(self, directory: Path) -> int:
+        """
+        Load every file within a directory so that none of them are read while a client waits on them
+
+        :param directory: The directory to load
+        :return: The number of files that were loaded
+        """
+        loaded = 0
+
+        for path in directory.rglob("*"):
+            try:
+                status = path.stat()
+            except OSError:
+                continue
+
+            asset = self.__assets.get(path)
+
+            if (asset is None or not asset.is_current(status)) and self.load(path, status) is not None:
+                loaded += 1
+
+        return loaded
+
+    def clear(self):
+        with self.__lock:
+            self.__assets.clear()
+
+    def __len__(self) -> int:
+        return len(self.__assets)
+
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "statistics": self.__statistics.dict(),
+            "files": len(self),
+            "bytes": self.memory_size,
+            "encodings": list(get_supported_encodings())
+        }
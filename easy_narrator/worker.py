@@ -0,0 +1,195 @@
+"""
+A standalone synthesis worker that hosts models and speaks phrases on behalf of one or more servers
+
+Start one with `python -m easy_narrator.worker --listen tcp://127.0.0.1:9700` and point a server at it with
+`--remote-worker tcp://127.0.0.1:9700`, or use a Unix socket such as `unix:///tmp/narrator.sock` for both.
+
+Workers do not authenticate the servers that call them, so only listen on an address that untrusted hosts can't reach
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import typing
+
+import pydantic
+
+from easy_narrator import application_details
+from easy_narrator.application_logging import get_logger
+from easy_narrator.models import get_narration_config_types
+from easy_narrator.narrate import SynthesisExecutor
+from easy_narrator.narrate import SynthesisCostModel
+from easy_narrator.narrate.protocol import MessageType
+from easy_narrator.narrate.protocol import decode_json
+from easy_narrator.narrate.protocol import encode_json
+from easy_narrator.narrate.protocol import encode_result
+from easy_narrator.narrate.protocol import read_frame
+from easy_narrator.narrate.protocol import start_server
+from easy_narrator.narrate.protocol import write_frame
+
+_LOGGER = get_logger()
+
+
+class WorkerArguments:
+    def __init__(self, *argv):
+        self.__listen: str = application_details.WORKER_ADDRESS
+        self.__synthesis_workers: int = application_details.SYNTHESIS_WORKER_COUNT
+        self.__synthesis_processes: int = application_details.SYNTHESIS_PROCESS_COUNT
+        self.__torch_threads: int = application_details.TORCH_THREADS_PER_WORKER
+
+        self.__parse_arguments(*argv)
+
+    @property
+    def listen(self) -> str:
+        return self.__listen
+
+    @property
+    def synthesis_workers(self) -> int:
+        return self.__synthesis_workers
+
+    @property
+    def synthesis_processes(self) -> int:
+        return self.__synthesis_processes
+
+    @property
+    def torch_threads(self) -> int:
+        return self.__torch_threads
+
+    def __parse_arguments(self, *argv):
+        parser = argparse.ArgumentParser(
+            prog=f"{application_details.APPLICATION_NAME} Worker",
+            description="Generates speech on behalf of one or more narration servers"
+        )
+
+        parser.add_argument(
+            "--listen",
+            dest="listen",
+            default=application_details.WORKER_ADDRESS,
+            help="Where to listen for requests, like 'tcp://127.0.0.1:9700' or 'unix:///tmp/narrator.sock'"
+        )
+
+        parser.add_argument(
+            "--synthesis-workers",
+            dest="synthesis_workers",
+            type=int,
+            default=application_details.SYNTHESIS_WORKER_COUNT,
+            help="The number of threads that may generate speech at the same time"
+        )
+
+        parser.add_argument(
+            "--synthesis-processes",
+            dest="synthesis_processes",
+            type=int,
+            default=application_details.SYNTHESIS_PROCESS_COUNT,
+            help="The number of processes that generate speech. 0 generates speech in the worker process"
+        )
+
+        parser.add_argument(
+            "--torch-threads",
+            dest="torch_threads",
+            type=int,
+            default=application_details.TORCH_THREADS_PER_WORKER,
+            help="The number of threads torch may use in each synthesis process. 0 divides the cores between them"
+        )
+
+        parameters = parser.parse_args(argv)
+
+        self.__listen = parameters.listen
+        self.__synthesis_workers = parameters.synthesis_workers
+        self.__synthesis_processes = parameters.synthesis_processes
+        self.__torch_threads = parameters.torch_threads
+
+
+class SynthesisWorker:
+    """
+    Answers health checks and synthesis requests from servers over the worker protocol
+    """
+    def __init__(self, executor: SynthesisExecutor):
+        self.__executor = executor
+        self.__in_flight = 0
+        self.__configuration_adapter = pydantic.TypeAdapter(get_narration_config_types())
+
+    def get_status(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "pid": os.getpid(),
+            "load": self.__in_flight,
+            "capacity": self.__executor.worker_count
+        }
+
+    async def synthesize(self, payload: bytes) -> typing.List[bytes]:
+        request = decode_json(payload)
+        model_configuration = self.__configuration_adapter.validate_python(request["configuration"])
+
+        self.__in_flight += 1
+
+        try:
+            sound = await self.__executor.synthesize(model_configuration, request["content"])
+        finally:
+            self.__in_flight -= 1
+
+        return encode_result(sound, SynthesisCostModel.get_instance().take_measurements())
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername") or "a local socket"
+        _LOGGER.debug(f"Accepted a connection from {peer}")
+
+        try:
+            while True:
+                try:
+                    message_type, payload = await read_frame(reader)
+                except ValueError as error:
+                    # Nothing after a malformed frame can be trusted to line up, so the connection is dropped
+                    _LOGGER.warning(f"Closing the connection from {peer} after a malformed message: {error}")
+
+                    with contextlib.suppress(OSError):
+                        await write_frame(writer, MessageType.ERROR, encode_json({"message": str(error)}))
+                    return
+
+                try:
+                    if message_type == MessageType.HEALTH:
+                        await write_frame(writer, MessageType.STATUS, encode_json(self.get_status()))
+                    elif message_type == MessageType.SYNTHESIZE:
+                        await write_frame(writer, MessageType.RESULT, *(await self.synthesize(payload)))
+                    else:
+                        raise ValueError(f"Workers cannot handle '{message_type.name}' messages")
+                except (ConnectionError, asyncio.CancelledError):
+                    raise
+                except Exception as error:
+                    _LOGGER.error(f"Could not handle a '{message_type.name}' message from {peer}", exc_info=error)
+                    await write_frame(writer, MessageType.ERROR, encode_json({"message": str(error)}))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_worker(arguments: WorkerArguments):
+    executor = SynthesisExecutor.configure(
+        worker_count=arguments.synthesis_workers,
+        process_count=arguments.synthesis_processes,
+        torch_threads=arguments.torch_threads
+    )
+    worker = SynthesisWorker(executor)
+    server = await start_server(arguments.listen, worker.handle_connection)
+
+    print(f"{application_details.APPLICATION_NAME} worker listening on {arguments.listen}")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(wait=False)
+
+
+def serve_worker(arguments: WorkerArguments) -> typing.NoReturn:
+    try:
+        asyncio.run(run_worker(arguments))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    serve_worker(WorkerArguments(*sys.argv[1:]))
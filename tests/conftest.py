@@ -0,0 +1,75 @@
+"""
+Fixtures shared by tests that narrate text without loading any models
+"""
+from __future__ import annotations
+
+import asyncio
+import typing
+
+import numpy
+import pytest
+
+from easy_narrator.narrate import PhraseAudioCache
+from easy_narrator.narrate import SchedulingPriority
+from easy_narrator.narrate import SynthesisScheduler
+from easy_narrator.narrate import Waveform
+from easy_narrator.models.narration_config import NarrationConfig
+
+SAMPLE_RATE = 22050
+
+
+def speak(content: str) -> Waveform:
+    """
+    Create stand-in audio for a phrase with one sample for every character so that tests may tell phrases apart
+    """
+    return Waveform.from_float(numpy.ones(len(content)), sample_rate=SAMPLE_RATE)
+
+
+class FakeScheduler:
+    """
+    Stands in for the SynthesisScheduler, speaking each phrase as soon as it is allowed to
+    """
+    def __init__(self):
+        self.phrases: typing.List[str] = []
+        """The text of every phrase that was synthesized, in the order they were asked for"""
+        self.permits: typing.Optional[asyncio.Semaphore] = None
+        """Each phrase waits for a permit before it is spoken, if given, so that tests may hold narrations partway"""
+
+    async def synthesize(
+        self,
+        model_configuration: NarrationConfig,
+        content: str,
+        connection_id: str,
+        priority: SchedulingPriority = SchedulingPriority.INTERACTIVE
+    ) -> Waveform:
+        self.phrases.append(content)
+
+        if self.permits is not None:
+            await self.permits.acquire()
+
+        return speak(content)
+
+
+@pytest.fixture
+def phrase_cache(monkeypatch, tmp_path) -> PhraseAudioCache:
+    """
+    Replace the shared phrase cache with an empty one that writes to a temporary directory
+    """
+    cache = PhraseAudioCache(directory=tmp_path / "phrases")
+    monkeypatch.setattr(PhraseAudioCache, "_PhraseAudioCache__instance", cache)
+    return cache
+
+
+@pytest.fixture
+def scheduler(monkeypatch, phrase_cache) -> FakeScheduler:
+    """
+    Replace the shared synthesis scheduler with one that never loads a model
+    """
+    fake_scheduler = FakeScheduler()
+    monkeypatch.setattr(SynthesisScheduler, "_SynthesisScheduler__instance", fake_scheduler)
+    return fake_scheduler
+
+
+@pytest.fixture
+def configuration() -> NarrationConfig:
+    return NarrationConfig()
@@ -0,0 +1,75 @@
+"""
+Tests for the in-memory representation of generated speech
+"""
+from __future__ import annotations
+
+import io
+import wave
+
+import numpy
+import pytest
+
+from easy_narrator.narrate import Waveform
+from easy_narrator.narrate.audio import PCM_DTYPE
+
+SAMPLE_RATE = 16000
+
+
+def create_waveform(*samples: int, sample_rate: int = SAMPLE_RATE) -> Waveform:
+    return Waveform(samples=numpy.array(samples, dtype=PCM_DTYPE), sample_rate=sample_rate)
+
+
+def test_floating_point_output_is_scaled_to_full_volume():
+    waveform = Waveform.from_float([0.0, 0.25, -0.5], sample_rate=SAMPLE_RATE)
+
+    assert waveform.samples.dtype == PCM_DTYPE
+    assert waveform.samples.tolist() == [0, 16383, -32767]
+
+
+def test_waveforms_survive_serialization():
+    waveform = create_waveform(-32768, -1, 0, 1, 32767)
+
+    restored = Waveform.from_bytes(waveform.to_bytes())
+
+    assert restored.sample_rate == SAMPLE_RATE
+    assert restored.samples.tolist() == waveform.samples.tolist()
+
+
+@pytest.mark.parametrize("data", [b"", b"\x80\x3e", create_waveform(1, 2).to_bytes()[:-1]])
+def test_truncated_data_is_refused(data):
+    with pytest.raises(ValueError):
+        Waveform.from_bytes(data)
+
+
+def test_waveforms_are_concatenated_with_pauses():
+    waveform = Waveform.concatenate([create_waveform(1, 2), create_waveform(3)], pause=2 / SAMPLE_RATE)
+
+    assert waveform.samples.tolist() == [1, 2, 0, 0, 3]
+
+
+def test_waveforms_of_different_rates_cannot_be_concatenated():
+    with pytest.raises(ValueError):
+        Waveform.concatenate([create_waveform(1), create_waveform(1, sample_rate=SAMPLE_RATE * 2)])
+
+
+def test_resampling_changes_the_length_but_not_the_duration():
+    waveform = create_waveform(*range(0, 1000, 10))
+
+    resampled = waveform.resample(SAMPLE_RATE * 2)
+
+    assert resampled.sample_rate == SAMPLE_RATE * 2
+    assert resampled.samples.shape[0] == waveform.samples.shape[0] * 2
+    assert resampled.duration == pytest.approx(waveform.duration)
+    assert waveform.resample(SAMPLE_RATE) is waveform
+
+
+def test_wav_files_hold_the_samples():
+    waveform = create_waveform(-5, 0, 5, 10)
+
+    with wave.open(io.BytesIO(waveform.to_wav())) as wav_file:
+        assert wav_file.getnchannels() == 1
+        assert wav_file.getsampwidth() == PCM_DTYPE.itemsize
+        assert wav_file.getframerate() == SAMPLE_RATE
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    assert numpy.frombuffer(frames, dtype=PCM_DTYPE).tolist() == waveform.samples.tolist()
@@ -0,0 +1,116 @@
+"""
+Tests for the two tier cache of phrase audio
+"""
+from __future__ import annotations
+
+import numpy
+
+from easy_narrator.narrate import PhraseAudioCache
+from easy_narrator.narrate import Waveform
+from easy_narrator.narrate.audio import PCM_DTYPE
+from easy_narrator.narrate.audio_cache import AUDIO_SUFFIX
+
+SAMPLE_COUNT = 100
+AUDIO_SIZE = SAMPLE_COUNT * PCM_DTYPE.itemsize
+"""The number of bytes that each piece of test audio occupies in memory"""
+
+FILE_SIZE = AUDIO_SIZE + 4
+"""The number of bytes that each piece of test audio occupies on disk, including its sample rate"""
+
+MODEL_NAME = "tts_models/en/ljspeech/vits"
+
+
+def create_audio(value: int) -> Waveform:
+    return Waveform(samples=numpy.full(SAMPLE_COUNT, value, dtype=PCM_DTYPE), sample_rate=22050)
+
+
+def create_key(content: str) -> str:
+    return PhraseAudioCache.create_key(content, MODEL_NAME)
+
+
+def get_cached_files(directory) -> set:
+    return {path.stem for path in directory.glob(f"*{AUDIO_SUFFIX}")}
+
+
+def test_keys_ignore_spacing_but_not_how_the_phrase_is_spoken():
+    key = PhraseAudioCache.create_key("Hello there.", MODEL_NAME, {"speaker": "p225", "language": None})
+
+    assert key == PhraseAudioCache.create_key("  Hello\n there. ", MODEL_NAME, {"speaker": "p225"})
+    assert key != PhraseAudioCache.create_key("Hello there.", MODEL_NAME, {"speaker": "p226"})
+    assert key != PhraseAudioCache.create_key("Hello there.", "tts_models/en/vctk/vits", {"speaker": "p225"})
+
+
+def test_least_recently_used_audio_is_evicted_from_memory(tmp_path):
+    cache = PhraseAudioCache(directory=tmp_path, memory_limit=2 * AUDIO_SIZE, disk_limit=0)
+
+    cache.put(create_key("first"), create_audio(1))
+    cache.put(create_key("second"), create_audio(2))
+    cache.get(create_key("first"))
+    cache.put(create_key("third"), create_audio(3))
+
+    assert cache.get(create_key("second")) is None
+    assert cache.get(create_key("first")).samples[0] == 1
+    assert cache.get(create_key("third")).samples[0] == 3
+    assert cache.memory_size == 2 * AUDIO_SIZE
+    assert cache.statistics.memory_evictions == 1
+    assert get_cached_files(tmp_path) == set()
+
+
+def test_audio_survives_on_disk_for_a_new_cache(tmp_path):
+    key = create_key("Hello there.")
+    PhraseAudioCache(directory=tmp_path, memory_limit=0, disk_limit=10 * FILE_SIZE).put(key, create_audio(7))
+
+    cache = PhraseAudioCache(directory=tmp_path, memory_limit=10 * AUDIO_SIZE, disk_limit=10 * FILE_SIZE)
+    audio = cache.get(key)
+
+    assert audio.samples.tolist() == create_audio(7).samples.tolist()
+    assert cache.statistics.disk_hits == 1
+    assert cache.get_from_memory(key) is not None
+    assert cache.statistics.memory_hits == 1
+
+
+def test_least_recently_used_audio_is_removed_from_disk(tmp_path):
+    cache = PhraseAudioCache(directory=tmp_path, memory_limit=0, disk_limit=2 * FILE_SIZE)
+
+    for index, content in enumerate(("first", "second", "third")):
+        cache.put(create_key(content), create_audio(index))
+
+    assert get_cached_files(tmp_path) == {create_key("second"), create_key("third")}
+    assert cache.disk_size == 2 * FILE_SIZE
+    assert cache.statistics.disk_evictions == 1
+
+
+def test_disk_tier_is_trimmed_to_its_limit_when_indexed(tmp_path):
+    writer = PhraseAudioCache(directory=tmp_path, memory_limit=0, disk_limit=10 * FILE_SIZE)
+
+    for index, content in enumerate(("first", "second", "third")):
+        writer.put(create_key(content), create_audio(index))
+
+    cache = PhraseAudioCache(directory=tmp_path, memory_limit=0, disk_limit=FILE_SIZE)
+
+    assert cache.disk_size == FILE_SIZE
+    assert len(get_cached_files(tmp_path)) == 1
+
+
+def test_damaged_audio_is_treated_as_a_miss_and_removed(tmp_path):
+    key = create_key("Hello there.")
+    (tmp_path / f"{key}{AUDIO_SUFFIX}").write_bytes(b"\x00\x01\x02")
+
+    cache = PhraseAudioCache(directory=tmp_path, memory_limit=0, disk_limit=10 * FILE_SIZE)
+
+    assert cache.get(key) is None
+    assert cache.statistics.misses == 1
+    assert get_cached_files(tmp_path) == set()
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    cache = PhraseAudioCache(directory=tmp_path, memory_limit=10 * AUDIO_SIZE, disk_limit=10 * FILE_SIZE)
+    key = create_key("Hello there.")
+    cache.put(key, create_audio(1))
+
+    cache.clear()
+
+    assert cache.get(key) is None
+    assert cache.memory_size == 0
+    assert cache.disk_size == 0
+    assert get_cached_files(tmp_path) == set()
@@ -0,0 +1,140 @@
+"""
+Tests for shaping phrases into chunks of the length that each model speaks most efficiently
+"""
+from __future__ import annotations
+
+from easy_narrator.narrate import PhraseChunker
+from easy_narrator.narrate import PhraseType
+from easy_narrator.narrate import SynthesisCostModel
+from easy_narrator.narrate import split_phrases
+from easy_narrator.narrate.chunking import ChunkLengths
+from easy_narrator.narrate.chunking import MINIMUM_SAMPLES
+
+MODEL_NAME = "tts_models/en/ljspeech/vits"
+
+DEFAULT_LENGTHS = ChunkLengths(target=250, minimum=20, maximum=400, first=40)
+
+OVERHEAD = 2.0
+"""Seconds that the fake model spends on every phrase regardless of its length"""
+
+LINEAR_COST = 0.001
+QUADRATIC_COST = 0.0002
+
+BEST_LENGTH = 100
+"""
+The length at which the fake model spends the least time per character, sqrt(OVERHEAD / QUADRATIC_COST).
+Fitted targets are rounded down, so they may land a character short of it
+"""
+
+TEXT = " ".join(
+    f"Sentence number {index} is long enough to matter, though not by much." for index in range(30)
+)
+
+
+def get_duration(characters: int) -> float:
+    return OVERHEAD + LINEAR_COST * characters + QUADRATIC_COST * characters ** 2
+
+
+def measure(cost_model: SynthesisCostModel, lengths):
+    for length in lengths:
+        cost_model.record(MODEL_NAME, length, get_duration(length))
+
+
+def get_chunks(text: str, chunker: PhraseChunker):
+    return [
+        (span.phrase_type, text[span.start:span.end])
+        for span in chunker.chunk(text, split_phrases(text))
+    ]
+
+
+def test_target_is_fit_to_the_measured_cost():
+    cost_model = SynthesisCostModel(DEFAULT_LENGTHS)
+
+    measure(cost_model, range(20, 20 + 20 * MINIMUM_SAMPLES, 20))
+
+    assert abs(cost_model.get_target_length(MODEL_NAME) - BEST_LENGTH) <= 1
+    assert cost_model.dict()[MODEL_NAME]["tuned"]
+
+
+def test_target_waits_for_varied_measurements():
+    cost_model = SynthesisCostModel(DEFAULT_LENGTHS)
+
+    measure(cost_model, [150] * MINIMUM_SAMPLES * 2)
+    measure(cost_model, range(20, 20 + 20 * (MINIMUM_SAMPLES - 2), 20))
+
+    assert cost_model.get_target_length(MODEL_NAME) == DEFAULT_LENGTHS.target
+    assert not cost_model.dict()[MODEL_NAME]["tuned"]
+
+
+def test_target_is_kept_once_tuned():
+    cost_model = SynthesisCostModel(DEFAULT_LENGTHS)
+    measure(cost_model, range(20, 20 + 20 * MINIMUM_SAMPLES, 20))
+
+    for length in range(25, 400, 5):
+        cost_model.record(MODEL_NAME, length, OVERHEAD + LINEAR_COST * length)
+
+    assert abs(cost_model.get_target_length(MODEL_NAME) - BEST_LENGTH) <= 1
+
+
+def test_target_is_the_maximum_when_cost_does_not_grow_faster_than_length():
+    cost_model = SynthesisCostModel(DEFAULT_LENGTHS)
+
+    for length in range(20, 20 + 20 * MINIMUM_SAMPLES, 20):
+        cost_model.record(MODEL_NAME, length, OVERHEAD + LINEAR_COST * length)
+
+    assert cost_model.get_target_length(MODEL_NAME) == DEFAULT_LENGTHS.maximum
+
+
+def test_measurements_are_handed_over_once_and_may_be_merged():
+    worker_cost_model = SynthesisCostModel(DEFAULT_LENGTHS)
+    measure(worker_cost_model, range(20, 20 + 20 * MINIMUM_SAMPLES, 20))
+
+    measurements = worker_cost_model.take_measurements()
+
+    assert len(measurements) == MINIMUM_SAMPLES
+    assert worker_cost_model.take_measurements() == []
+
+    server_cost_model = SynthesisCostModel(DEFAULT_LENGTHS)
+    server_cost_model.merge(measurements)
+
+    assert abs(server_cost_model.get_target_length(MODEL_NAME) - BEST_LENGTH) <= 1
+
+
+def test_chunks_cover_the_text_within_the_maximum_length():
+    lengths = ChunkLengths(target=100, minimum=20, maximum=160, first=40)
+
+    chunks = get_chunks(TEXT, PhraseChunker(lengths))
+
+    assert " ".join(content for _, content in chunks).split() == TEXT.split()
+    assert all(len(content) <= lengths.maximum for _, content in chunks)
+    assert all(content == content.strip() for _, content in chunks)
+    assert len(chunks) > 1
+
+
+def test_first_chunk_is_cut_short_so_that_audio_starts_quickly():
+    lengths = ChunkLengths(target=150, minimum=20, maximum=200, first=40)
+
+    short_start = get_chunks(TEXT, PhraseChunker(lengths))
+    even_start = get_chunks(TEXT, PhraseChunker(lengths, short_start=False))
+
+    assert len(short_start[0][1]) < len(even_start[0][1])
+
+
+def test_short_phrases_are_merged():
+    lengths = ChunkLengths(target=60, minimum=30, maximum=120, first=60)
+    text = "\n\n".join(["Yes.", "No.", "Maybe.", "Perhaps.", "Certainly.", "Never."])
+
+    chunks = get_chunks(text, PhraseChunker(lengths))
+
+    assert len(chunks) < len(list(split_phrases(text)))
+    assert " ".join(content for _, content in chunks).split() == text.split()
+
+
+def test_headers_are_left_alone():
+    lengths = ChunkLengths(target=60, minimum=30, maximum=120, first=60)
+    text = "1. Header\nShort.\n\nAlso short."
+
+    chunks = get_chunks(text, PhraseChunker(lengths))
+
+    assert chunks[0] == (PhraseType.HEADER, "1. Header")
+    assert all(phrase_type == PhraseType.CONTENT for phrase_type, _ in chunks[1:])
@@ -0,0 +1,119 @@
+"""
+Tests for encoding the messages sent over the websocket as JSON and MessagePack
+"""
+from __future__ import annotations
+
+import base64
+import json
+import pathlib
+
+import pytest
+
+from easy_narrator.messages.codec import DEFAULT_CODEC
+from easy_narrator.messages.codec import get_codec
+from easy_narrator.messages.codec import get_supported_codecs
+from easy_narrator.messages.requests import CancelRequest
+from easy_narrator.messages.requests import FileSelectionRequest
+from easy_narrator.messages.requests import KillRequest
+from easy_narrator.messages.responses import AcknowledgementResponse
+from easy_narrator.messages.responses import AudioResponse
+from easy_narrator.messages.responses.data import FileContentResponse
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+requires_msgpack = pytest.mark.skipif(msgpack is None, reason="MessagePack requires the optional msgpack package")
+
+CODEC_NAMES = ["json", pytest.param("msgpack", marks=requires_msgpack)]
+
+REQUESTS = [
+    CancelRequest(operation="cancel", message_id="cancel", target_message_id="read"),
+    FileSelectionRequest(operation="load", message_id="load", path=pathlib.Path("/tmp/document.txt")),
+    KillRequest(operation="kill", message_id="kill"),
+]
+
+BINARY_CONTENT = b"\x00\xffnot text\x80"
+
+
+@pytest.mark.parametrize("codec_name", CODEC_NAMES)
+@pytest.mark.parametrize("request_message", REQUESTS, ids=lambda request_message: request_message.operation)
+def test_requests_survive_a_round_trip(codec_name, request_message):
+    codec = get_codec(codec_name)
+
+    frames = codec.encode(request_message)
+
+    assert len(frames) == 1
+    assert codec.decode_request(frames[0]) == request_message
+
+
+@pytest.mark.parametrize("codec_name", CODEC_NAMES)
+def test_plain_data_survives_a_round_trip(codec_name):
+    codec = get_codec(codec_name)
+    data = {"operation": "statistics", "values": [1, 2.5, "three", None]}
+
+    assert codec.decode(codec.encode_data(data)) == data
+
+
+def test_json_messages_are_text():
+    frames = get_codec("json").encode(AcknowledgementResponse(message_id="message"))
+
+    assert json.loads(frames[0]) == {"operation": "acknowledgement", "message_id": "message"}
+
+
+def test_json_audio_is_sent_alone_as_binary():
+    frames = get_codec("json").encode(AudioResponse(audio=BINARY_CONTENT, audio_index=1, audio_count=3))
+
+    assert frames == [BINARY_CONTENT]
+
+
+def test_json_file_contents_are_base64_encoded():
+    response = FileContentResponse(data_id="document", size=len(BINARY_CONTENT), content=BINARY_CONTENT)
+
+    message = json.loads(get_codec("json").encode(response)[0])
+
+    assert base64.b64decode(message["content"]) == BINARY_CONTENT
+
+
+@requires_msgpack
+@pytest.mark.parametrize(
+    "response",
+    [
+        AudioResponse(audio=BINARY_CONTENT, audio_index=1, audio_count=3, message_id="read"),
+        FileContentResponse(data_id="document", size=len(BINARY_CONTENT), content=BINARY_CONTENT),
+    ],
+    ids=["audio", "file"]
+)
+def test_msgpack_keeps_payloads_as_raw_binary(response):
+    frames = get_codec("msgpack").encode(response)
+
+    assert len(frames) == 1
+    assert msgpack.unpackb(frames[0], raw=False) == {
+        **response.model_dump(mode="json", exclude={response.payload_field}),
+        response.payload_field: BINARY_CONTENT
+    }
+
+
+@requires_msgpack
+def test_msgpack_clients_may_still_send_json():
+    request_message = REQUESTS[0]
+
+    assert get_codec("msgpack").decode_request(request_message.model_dump_json()) == request_message
+
+
+def test_codecs_are_shared_and_json_is_the_default():
+    assert get_codec() is get_codec(DEFAULT_CODEC)
+    assert get_codec() is get_codec("json")
+    assert DEFAULT_CODEC in get_supported_codecs()
+
+
+@requires_msgpack
+def test_msgpack_is_supported_when_installed():
+    assert get_codec("msgpack") is get_codec("msgpack")
+    assert get_supported_codecs() == ["json", "msgpack"]
+
+
+def test_unknown_codecs_are_refused():
+    with pytest.raises(ValueError):
+        get_codec("xml")
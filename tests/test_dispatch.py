@@ -0,0 +1,119 @@
+"""
+Tests for handing phrases to the synthesis executor
+"""
+from __future__ import annotations
+
+import asyncio
+import typing
+
+import numpy
+
+from easy_narrator.narrate import PhraseDispatcher
+from easy_narrator.narrate import Waveform
+from easy_narrator.models.narration_config import NarrationConfig
+
+
+class FakeExecutor:
+    """
+    Stands in for the SynthesisExecutor, holding every phrase until it is released
+    """
+    def __init__(self, error: Exception = None):
+        self.phrases: typing.List[str] = []
+        self.release = asyncio.Event()
+        self.error = error
+
+    async def synthesize(self, model_configuration: NarrationConfig, content: str) -> Waveform:
+        self.phrases.append(content)
+        await self.release.wait()
+
+        if self.error is not None:
+            raise self.error
+
+        return Waveform.from_float(numpy.ones(len(content)), sample_rate=22050)
+
+
+async def settle():
+    """
+    Let every task that is ready to run do so
+    """
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_identical_phrases_share_a_single_synthesis():
+    async def dispatch():
+        executor = FakeExecutor()
+        dispatcher = PhraseDispatcher(executor=executor)
+        configuration = NarrationConfig()
+
+        requests = [
+            asyncio.ensure_future(dispatcher.synthesize(configuration, "Hello there."))
+            for _ in range(3)
+        ]
+        await settle()
+        executor.release.set()
+        return executor, dispatcher, await asyncio.gather(*requests)
+
+    executor, dispatcher, sounds = asyncio.run(dispatch())
+
+    assert executor.phrases == ["Hello there."]
+    assert all(sound is sounds[0] for sound in sounds)
+    assert dispatcher.statistics.shared == 2
+    assert dispatcher.pending_phrase_count == 0
+
+
+def test_the_same_phrase_in_different_voices_is_synthesized_for_each():
+    async def dispatch():
+        executor = FakeExecutor()
+        executor.release.set()
+        dispatcher = PhraseDispatcher(executor=executor)
+
+        await asyncio.gather(
+            dispatcher.synthesize(NarrationConfig(), "Hello there."),
+            dispatcher.synthesize(NarrationConfig(speed=1.5), "Hello there."),
+        )
+        return executor
+
+    assert asyncio.run(dispatch()).phrases == ["Hello there.", "Hello there."]
+
+
+def test_errors_reach_everyone_waiting_on_the_phrase():
+    async def dispatch():
+        executor = FakeExecutor(error=RuntimeError("The model failed"))
+        dispatcher = PhraseDispatcher(executor=executor)
+        configuration = NarrationConfig()
+
+        requests = [
+            asyncio.ensure_future(dispatcher.synthesize(configuration, "Hello there."))
+            for _ in range(2)
+        ]
+        await settle()
+        executor.release.set()
+        return dispatcher, await asyncio.gather(*requests, return_exceptions=True)
+
+    dispatcher, results = asyncio.run(dispatch())
+
+    assert [str(result) for result in results] == ["The model failed", "The model failed"]
+    assert dispatcher.statistics.failures == 1
+
+
+def test_one_requester_giving_up_does_not_take_the_audio_from_another():
+    async def dispatch():
+        executor = FakeExecutor()
+        dispatcher = PhraseDispatcher(executor=executor)
+        configuration = NarrationConfig()
+
+        impatient_request = asyncio.ensure_future(dispatcher.synthesize(configuration, "Hello there."))
+        patient_request = asyncio.ensure_future(dispatcher.synthesize(configuration, "Hello there."))
+        await settle()
+
+        impatient_request.cancel()
+        await settle()
+        executor.release.set()
+        return impatient_request, await patient_request
+
+    impatient_request, sound = asyncio.run(dispatch())
+
+    assert impatient_request.cancelled()
+    assert sound.samples.shape[0] == len("Hello there.")
+
@@ -0,0 +1,73 @@
+"""
+Tests for encoding narrated audio in the format a client asked for
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+
+import numpy
+import pytest
+
+from easy_narrator.narrate import Waveform
+from easy_narrator.narrate import encode_async
+from easy_narrator.narrate import get_supported_formats
+from easy_narrator.narrate.audio import PCM_DTYPE
+from easy_narrator.narrate.encoding import AUDIO_ENCODINGS
+from easy_narrator.narrate.encoding import encode
+
+SAMPLE_RATE = 22050
+
+WAVEFORM = Waveform(
+    samples=(numpy.sin(numpy.linspace(0, 200 * numpy.pi, SAMPLE_RATE // 4)) * 10000).astype(PCM_DTYPE),
+    sample_rate=SAMPLE_RATE
+)
+
+
+def requires_format(audio_format: str):
+    return pytest.mark.skipif(
+        audio_format not in get_supported_formats(),
+        reason=f"libsndfile on this machine cannot write {audio_format}"
+    )
+
+
+def test_wav_is_always_supported_and_is_the_default():
+    assert "wav" in get_supported_formats()
+    assert encode(WAVEFORM) == WAVEFORM.to_wav()
+
+
+def test_unsupported_formats_are_refused():
+    with pytest.raises(ValueError):
+        encode(WAVEFORM, "mp3")
+
+
+@pytest.mark.parametrize(
+    "sample_rate, expected",
+    [(16000, 16000), (22050, 24000), (44100, 48000), (96000, 48000)]
+)
+def test_opus_uses_the_closest_rate_it_supports(sample_rate, expected):
+    assert AUDIO_ENCODINGS["opus"].get_sample_rate(sample_rate) == expected
+
+
+def test_formats_without_fixed_rates_keep_the_original_rate():
+    assert AUDIO_ENCODINGS["flac"].get_sample_rate(SAMPLE_RATE) == SAMPLE_RATE
+
+
+@requires_format("flac")
+def test_flac_is_lossless():
+    soundfile = pytest.importorskip("soundfile")
+
+    samples, sample_rate = soundfile.read(io.BytesIO(encode(WAVEFORM, "flac")), dtype="int16")
+
+    assert sample_rate == SAMPLE_RATE
+    assert samples.tolist() == WAVEFORM.samples.tolist()
+
+
+@requires_format("opus")
+def test_opus_is_resampled_and_compressed():
+    soundfile = pytest.importorskip("soundfile")
+
+    encoded = asyncio.run(encode_async(WAVEFORM, "opus"))
+
+    assert len(encoded) < len(WAVEFORM.to_wav())
+    assert soundfile.info(io.BytesIO(encoded)).samplerate == 24000
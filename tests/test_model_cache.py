@@ -0,0 +1,211 @@
+"""
+Tests for how the ModelCache loads models and decides which of them stay resident
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import types
+import typing
+
+import pytest
+
+from easy_narrator.utilities.model_cache import ModelCache
+
+DEVICE = "cpu"
+
+MODEL_SIZE = 100
+"""The number of bytes that every fake model claims to occupy"""
+
+FIRST_MODEL = "tts_models/en/first/vits"
+SECOND_MODEL = "tts_models/en/second/vits"
+THIRD_MODEL = "tts_models/en/third/vits"
+
+
+class FakeTensor:
+    def numel(self) -> int:
+        return MODEL_SIZE
+
+    def element_size(self) -> int:
+        return 1
+
+
+class FakeTTS:
+    """
+    Stands in for a TTS model so that the cache may be exercised without loading any weights
+    """
+    created: typing.List[str] = []
+    gate: typing.Optional[threading.Event] = None
+    """Held closed to keep loads in progress until a test is ready for them to finish"""
+    failures: int = 0
+    """The number of upcoming loads that should fail"""
+
+    def __init__(self, model_name: str):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+
+        if self.failures:
+            type(self).failures -= 1
+            raise RuntimeError(f"Could not load {model_name}")
+
+        self.model_name = model_name
+        self.created.append(model_name)
+
+    def to(self, device: str) -> FakeTTS:
+        return self
+
+    def parameters(self) -> typing.List[FakeTensor]:
+        return [FakeTensor()]
+
+    def buffers(self) -> typing.List[FakeTensor]:
+        return []
+
+
+@pytest.fixture
+def fake_tts(monkeypatch, tmp_path) -> typing.Type[FakeTTS]:
+    """
+    Make the cache build fake models and look for downloaded models in an empty directory
+    """
+    monkeypatch.setenv("TTS_HOME", str(tmp_path))
+
+    model_type = type("FakeTTS", (FakeTTS,), {"created": [], "gate": threading.Event()})
+    model_type.gate.set()
+
+    package = types.ModuleType("TTS")
+    package.api = types.ModuleType("TTS.api")
+    package.api.TTS = model_type
+
+    monkeypatch.setitem(sys.modules, "TTS", package)
+    monkeypatch.setitem(sys.modules, "TTS.api", package.api)
+    return model_type
+
+
+def create_cache(max_models: int = 0, memory_budget: int = 0, pinned_models: typing.Iterable[str] = ()) -> ModelCache:
+    return ModelCache(max_models=max_models, memory_budget=memory_budget, pinned_models=pinned_models)
+
+
+def test_model_is_loaded_once_and_then_reused(fake_tts):
+    cache = create_cache()
+
+    first_model = cache.get(FIRST_MODEL, device=DEVICE)
+
+    assert cache.get(FIRST_MODEL, device=DEVICE) is first_model
+    assert fake_tts.created == [FIRST_MODEL]
+    assert cache.statistics.loads == 1
+    assert cache.statistics.hits == 1
+
+
+def test_least_recently_used_model_is_evicted(fake_tts):
+    cache = create_cache(max_models=2)
+
+    cache.get(FIRST_MODEL, device=DEVICE)
+    cache.get(SECOND_MODEL, device=DEVICE)
+    cache.get(FIRST_MODEL, device=DEVICE)
+    cache.get(THIRD_MODEL, device=DEVICE)
+
+    assert cache.loaded_models == [(FIRST_MODEL, DEVICE), (THIRD_MODEL, DEVICE)]
+    assert cache.statistics.evictions == 1
+
+
+def test_models_are_evicted_to_stay_within_the_memory_budget(fake_tts):
+    cache = create_cache(memory_budget=2 * MODEL_SIZE)
+
+    for model_name in (FIRST_MODEL, SECOND_MODEL, THIRD_MODEL):
+        cache.get(model_name, device=DEVICE)
+
+    assert cache.loaded_models == [(SECOND_MODEL, DEVICE), (THIRD_MODEL, DEVICE)]
+    assert cache.resident_size == 2 * MODEL_SIZE
+
+
+def test_pinned_models_are_never_evicted(fake_tts):
+    cache = create_cache(max_models=2, pinned_models=[FIRST_MODEL])
+
+    for model_name in (FIRST_MODEL, SECOND_MODEL, THIRD_MODEL):
+        cache.get(model_name, device=DEVICE)
+
+    assert cache.loaded_models == [(FIRST_MODEL, DEVICE), (THIRD_MODEL, DEVICE)]
+
+
+def test_pinned_models_may_be_evicted_explicitly(fake_tts):
+    cache = create_cache(pinned_models=[FIRST_MODEL])
+    cache.get(FIRST_MODEL, device=DEVICE)
+
+    assert cache.evict(FIRST_MODEL)
+    assert cache.loaded_models == []
+    assert not cache.evict(FIRST_MODEL)
+
+
+def wait_for(condition: typing.Callable[[], bool], timeout: float = 5):
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for the model cache"
+        time.sleep(0.01)
+
+
+def test_concurrent_callers_share_a_single_load(fake_tts):
+    cache = create_cache()
+    fake_tts.gate.clear()
+    caller_count = 4
+    models = []
+
+    callers = [
+        threading.Thread(target=lambda: models.append(cache.get(FIRST_MODEL, device=DEVICE)))
+        for _ in range(caller_count)
+    ]
+
+    for caller in callers:
+        caller.start()
+
+    wait_for(lambda: cache.statistics.shared_loads == caller_count - 1)
+    fake_tts.gate.set()
+
+    for caller in callers:
+        caller.join(timeout=5)
+
+    assert fake_tts.created == [FIRST_MODEL]
+    assert len(models) == caller_count
+    assert all(model is models[0] for model in models)
+    assert cache.statistics.loads == 1
+
+
+def test_waiters_on_a_failed_load_see_its_error_and_may_try_again(fake_tts):
+    cache = create_cache()
+    fake_tts.gate.clear()
+    fake_tts.failures = 1
+    errors = []
+
+    def get_model():
+        try:
+            cache.get(FIRST_MODEL, device=DEVICE)
+        except RuntimeError as error:
+            errors.append(error)
+
+    callers = [threading.Thread(target=get_model) for _ in range(2)]
+
+    for caller in callers:
+        caller.start()
+
+    wait_for(lambda: cache.statistics.shared_loads == 1)
+    fake_tts.gate.set()
+
+    for caller in callers:
+        caller.join(timeout=5)
+
+    assert len(errors) == 2
+    assert cache.get(FIRST_MODEL, device=DEVICE) is not None
+    assert fake_tts.created == [FIRST_MODEL]
+
+
+def test_asynchronous_callers_share_a_single_load(fake_tts):
+    cache = create_cache()
+
+    async def get_models():
+        return await asyncio.gather(*[cache.get_async(FIRST_MODEL, device=DEVICE) for _ in range(3)])
+
+    models = asyncio.run(get_models())
+
+    assert fake_tts.created == [FIRST_MODEL]
+    assert all(model is models[0] for model in models)
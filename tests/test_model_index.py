@@ -0,0 +1,69 @@
+"""
+Tests for the index of models downloaded into the TTS data directory
+"""
+from __future__ import annotations
+
+import os
+
+from pathlib import Path
+
+from easy_narrator.utilities.model_cache import DownloadedModelIndex
+
+MODEL_NAME = "tts_models/en/ljspeech/vits"
+OTHER_MODEL_NAME = "tts_models/de/thorsten/vits"
+
+
+def download(directory: Path, model_name: str):
+    """
+    Pretend to download a model, making sure that the directory looks modified even on coarse filesystem clocks
+    """
+    modification_time = directory.stat().st_mtime_ns
+    (directory / model_name.replace("/", "--")).mkdir()
+    os.utime(directory, ns=(modification_time + 1_000_000_000, modification_time + 1_000_000_000))
+
+
+def test_only_models_are_indexed(tmp_path):
+    download(tmp_path, MODEL_NAME)
+    (tmp_path / "vocoder_models--en--ljspeech--hifigan_v2").mkdir()
+
+    index = DownloadedModelIndex(tmp_path, refresh_interval=0)
+
+    assert [model.fullname for model in index.models] == [MODEL_NAME]
+    assert MODEL_NAME in index
+    assert "tts_models--en--ljspeech--vits" in index
+    assert OTHER_MODEL_NAME not in index
+
+
+def test_directory_is_only_read_again_when_it_changes(tmp_path):
+    download(tmp_path, MODEL_NAME)
+    index = DownloadedModelIndex(tmp_path, refresh_interval=0)
+
+    for _ in range(3):
+        assert MODEL_NAME in index
+
+    assert index.scans == 1
+
+    download(tmp_path, OTHER_MODEL_NAME)
+
+    assert OTHER_MODEL_NAME in index
+    assert index.scans == 2
+
+
+def test_directory_is_not_checked_again_until_the_refresh_interval_passes(tmp_path):
+    index = DownloadedModelIndex(tmp_path, refresh_interval=3600)
+    assert len(index) == 0
+
+    download(tmp_path, MODEL_NAME)
+
+    assert MODEL_NAME not in index
+
+    index.invalidate()
+
+    assert MODEL_NAME in index
+
+
+def test_missing_directories_have_no_models(tmp_path):
+    index = DownloadedModelIndex(tmp_path / "missing", refresh_interval=0)
+
+    assert index.models == []
+    assert MODEL_NAME not in index
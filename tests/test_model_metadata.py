@@ -0,0 +1,98 @@
+"""
+Tests for describing downloaded models from their files without loading them
+"""
+from __future__ import annotations
+
+import json
+import os
+import typing
+
+from pathlib import Path
+
+import pytest
+
+from easy_narrator.models.model_metadata import get_model_metadata
+from easy_narrator.models.model_metadata import read_model_metadata
+
+MODEL_NAME = "tts_models/en/vctk/vits"
+
+
+@pytest.fixture(autouse=True)
+def clear_metadata():
+    read_model_metadata.cache_clear()
+    yield
+    read_model_metadata.cache_clear()
+
+
+def write_json(path: Path, content: typing.Any) -> Path:
+    """
+    Write a file, making sure that it looks modified even on coarse filesystem clocks
+    """
+    modification_time = path.stat().st_mtime_ns + 1_000_000_000 if path.exists() else None
+    path.write_text(json.dumps(content))
+
+    if modification_time is not None:
+        os.utime(path, ns=(modification_time, modification_time))
+
+    return path
+
+
+def test_models_are_described_by_their_configuration(tmp_path):
+    write_json(tmp_path / "config.json", {"model": "vits", "audio": {"sample_rate": 22050}, "num_speakers": 1})
+
+    metadata = get_model_metadata(MODEL_NAME, tmp_path)
+
+    assert metadata.architecture == "vits"
+    assert metadata.sample_rate == 22050
+    assert not metadata.is_multi_speaker
+    assert not metadata.is_multi_lingual
+
+
+def test_speakers_and_languages_are_read_from_the_files_beside_the_model(tmp_path):
+    write_json(tmp_path / "config.json", {"model": "vits", "model_args": {"num_speakers": 2}})
+    write_json(tmp_path / "speaker_ids.json", {"p225": 0, "p226": 1})
+    write_json(tmp_path / "language_ids.json", {"en": 0, "fr-fr": 1})
+
+    metadata = get_model_metadata(MODEL_NAME, tmp_path)
+
+    assert metadata.speakers == ["p225", "p226"]
+    assert metadata.languages == ["en", "fr-fr"]
+    assert metadata.is_multi_speaker
+    assert metadata.is_multi_lingual
+
+
+def test_configured_files_are_found_by_name_within_the_model_directory(tmp_path):
+    write_json(tmp_path / "config.json", {"model_args": {"speakers_file": "/training/run/voices.json"}})
+    write_json(tmp_path / "voices.json", {"clip.wav": {"name": "narrator", "embedding": [0.1]}})
+
+    assert get_model_metadata(MODEL_NAME, tmp_path).speakers == ["narrator"]
+
+
+def test_unreadable_speaker_files_leave_the_rest_of_the_description(tmp_path):
+    write_json(tmp_path / "config.json", {"model": "vits"})
+    (tmp_path / "speaker_ids.json").write_text("{not json")
+
+    metadata = get_model_metadata(MODEL_NAME, tmp_path)
+
+    assert metadata.architecture == "vits"
+    assert metadata.speakers == []
+
+
+def test_models_without_a_readable_configuration_are_not_described(tmp_path):
+    assert get_model_metadata(MODEL_NAME, tmp_path) is None
+
+    (tmp_path / "config.json").write_text("{not json")
+
+    assert get_model_metadata(MODEL_NAME, tmp_path) is None
+
+
+def test_descriptions_are_only_read_again_when_the_configuration_changes(tmp_path):
+    configuration_path = write_json(tmp_path / "config.json", {"model": "vits"})
+
+    first = get_model_metadata(MODEL_NAME, tmp_path)
+
+    assert get_model_metadata(MODEL_NAME, tmp_path) is first
+
+    write_json(configuration_path, {"model": "glow_tts"})
+
+    assert get_model_metadata(MODEL_NAME, tmp_path).architecture == "glow_tts"
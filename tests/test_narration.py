@@ -0,0 +1,73 @@
+"""
+Tests for streaming narrated audio one phrase at a time
+"""
+from __future__ import annotations
+
+import asyncio
+import typing
+
+from easy_narrator.narrate import Waveform
+from easy_narrator.narrate import iterate_sentences
+from easy_narrator.narrate import stream_sound
+from easy_narrator.narrate.chunking import ChunkLengths
+from easy_narrator.narrate.chunking import PhraseChunker
+
+TEXT = "\n\n".join(
+    f"Paragraph number {index} says something short." for index in range(5)
+)
+
+UNCHANGED_LENGTHS = ChunkLengths(target=1000, minimum=0, maximum=1000, first=1000)
+"""Lengths that leave every phrase in TEXT as it is"""
+
+
+def create_chunker() -> PhraseChunker:
+    return PhraseChunker(UNCHANGED_LENGTHS)
+
+
+def narrate(text: str, configuration, **kwargs) -> typing.List[typing.Tuple[int, int, Waveform]]:
+    async def collect():
+        return [track async for track in stream_sound(text, configuration, chunker=create_chunker(), **kwargs)]
+
+    return asyncio.run(collect())
+
+
+def test_every_phrase_is_streamed_in_order(scheduler, configuration):
+    phrases = [content for _, content in iterate_sentences(TEXT, configuration, create_chunker())]
+
+    tracks = narrate(TEXT, configuration)
+
+    assert [index for index, _, _ in tracks] == list(range(len(phrases)))
+    assert [sound.samples.shape[0] for _, _, sound in tracks] == [len(phrase) for phrase in phrases]
+    assert scheduler.phrases == phrases
+
+
+def test_phrase_count_matches_the_phrases_streamed(scheduler, configuration):
+    tracks = narrate(TEXT, configuration)
+
+    # The text is counted before the first phrase is handed back, so every track reports the final count
+    assert [count for _, count, _ in tracks] == [len(tracks)] * len(tracks)
+
+
+def test_cached_phrases_are_not_synthesized_again(scheduler, configuration):
+    narrate(TEXT, configuration)
+    synthesized_phrases = list(scheduler.phrases)
+
+    tracks = narrate(TEXT, configuration)
+
+    assert scheduler.phrases == synthesized_phrases
+    assert [sound.samples.shape[0] for _, _, sound in tracks] == [len(phrase) for phrase in synthesized_phrases]
+
+
+def test_closing_the_stream_stops_synthesis(scheduler, configuration):
+    async def take_first_track():
+        sounds = stream_sound(TEXT, configuration, scheduler=scheduler, chunker=create_chunker())
+        track = await anext(sounds)
+        await sounds.aclose()
+        return track
+
+    index, _, sound = asyncio.run(take_first_track())
+
+    assert index == 0
+    assert sound.samples.shape[0] == len(scheduler.phrases[0])
+    # Only the phrase being prepared while the first was handled may have been started
+    assert len(scheduler.phrases) <= 2
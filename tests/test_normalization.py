@@ -0,0 +1,85 @@
+"""
+Tests for rewriting text into the form that should be spoken
+"""
+from __future__ import annotations
+
+import json
+import os
+
+from pathlib import Path
+
+from easy_narrator.narrate import TextNormalizer
+from easy_narrator.narrate import get_normalizer
+from easy_narrator.narrate.normalization import get_lexicon_names
+from easy_narrator.models.narration_config import NarrationConfig
+
+MODEL_LEXICON_NAME = "tts_models--en--ljspeech--tacotron2-DDC_ph"
+"""The name of the lexicon for the model that narrates by default"""
+
+
+def write_lexicon(directory: Path, name: str, entries) -> Path:
+    path = directory / f"{name}.json"
+    path.write_text(json.dumps(entries))
+    return path
+
+
+def test_longest_term_wins():
+    normalizer = TextNormalizer({"New": "Gnu", "New York": "Noo Yawk"}, spell_acronyms=False)
+
+    assert normalizer.normalize("New York is New") == "Noo Yawk is Gnu"
+
+
+def test_replacements_are_not_applied_to_other_replacements():
+    normalizer = TextNormalizer({"cat": "dog", "dog": "wolf"}, spell_acronyms=False)
+
+    assert normalizer.normalize("cat and dog") == "dog and wolf"
+
+
+def test_acronyms_are_spelled_out_unless_they_are_terms():
+    normalizer = TextNormalizer({"NASA": "nasa"})
+
+    assert normalizer.normalize("NASA and the ESA") == 'nasa and the "E" "S" "A" '
+
+
+def test_text_is_unchanged_without_replacements_or_acronyms():
+    normalizer = TextNormalizer(spell_acronyms=False)
+
+    assert normalizer.normalize("Nothing ABOUT this changes.") == "Nothing ABOUT this changes."
+
+
+def test_lexicons_are_layered_from_general_to_specific():
+    assert get_lexicon_names() == ["default"]
+    assert get_lexicon_names(NarrationConfig()) == ["default", "en", MODEL_LEXICON_NAME]
+
+
+def test_more_specific_lexicons_override_general_ones(tmp_path):
+    write_lexicon(tmp_path, "default", {"colour": "color", "tomato": "tomayto"})
+    write_lexicon(tmp_path, "en", {"tomato": "tomahto"})
+    write_lexicon(tmp_path, MODEL_LEXICON_NAME, {"colour": "culler"})
+
+    normalizer = get_normalizer(NarrationConfig(), directory=tmp_path)
+
+    assert normalizer.normalize("colour tomato") == "culler tomahto"
+    assert get_normalizer(directory=tmp_path).normalize("colour tomato") == "color tomayto"
+
+
+def test_normalizers_are_shared_until_a_lexicon_changes(tmp_path):
+    path = write_lexicon(tmp_path, "default", {"colour": "color"})
+    normalizer = get_normalizer(directory=tmp_path)
+
+    assert get_normalizer(directory=tmp_path) is normalizer
+
+    path.write_text(json.dumps({"colour": "culler"}))
+    modification_time = path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(modification_time, modification_time))
+
+    assert get_normalizer(directory=tmp_path).normalize("colour") == "culler"
+
+
+def test_invalid_lexicons_are_skipped(tmp_path):
+    write_lexicon(tmp_path, "default", ["not", "a", "mapping"])
+    write_lexicon(tmp_path, "en", {"colour": "color"})
+
+    normalizer = get_normalizer(NarrationConfig(), directory=tmp_path)
+
+    assert normalizer.normalize("colour") == "color"
@@ -0,0 +1,79 @@
+"""
+Tests for splitting text into the phrases that are spoken one at a time
+"""
+from __future__ import annotations
+
+import pytest
+
+from easy_narrator.narrate import PhraseType
+from easy_narrator.narrate import PhraseChunker
+from easy_narrator.narrate import count_phrases
+from easy_narrator.narrate import iterate_sentences
+from easy_narrator.narrate import split_phrases
+from easy_narrator.narrate.chunking import ChunkLengths
+
+DOCUMENT = """1. Introduction
+The first paragraph
+runs over two lines.
+
+2. Details
+The second paragraph follows its header.
+
+
+  The last paragraph is surrounded by whitespace.
+"""
+
+LONG_DOCUMENT = "\n\n".join(
+    " ".join(
+        f"Sentence {sentence} of paragraph {paragraph} carries on for a little while, then stops."
+        for sentence in range(paragraph + 1)
+    )
+    for paragraph in range(12)
+)
+
+SMALL_CHUNKS = ChunkLengths(target=60, minimum=20, maximum=120, first=30)
+
+
+def test_phrases_are_spans_over_the_original_text():
+    phrases = [
+        (span.phrase_type, DOCUMENT[span.start:span.end])
+        for span in split_phrases(DOCUMENT)
+    ]
+
+    assert phrases == [
+        (PhraseType.HEADER, "1. Introduction"),
+        (PhraseType.CONTENT, "The first paragraph\nruns over two lines."),
+        (PhraseType.HEADER, "2. Details"),
+        (PhraseType.CONTENT, "The second paragraph follows its header."),
+        (PhraseType.CONTENT, "The last paragraph is surrounded by whitespace."),
+    ]
+
+
+def test_content_is_read_as_a_single_line():
+    phrases = list(iterate_sentences(DOCUMENT))
+
+    assert phrases[1] == (PhraseType.CONTENT, "The first paragraph runs over two lines.")
+
+
+@pytest.mark.parametrize("text", ["", "   ", "\n\n\n  \n"])
+def test_blank_text_has_no_phrases(text):
+    assert list(split_phrases(text)) == []
+    assert count_phrases(text) == 0
+
+
+@pytest.mark.parametrize("text", [DOCUMENT, LONG_DOCUMENT, "A single phrase with no breaks at all"])
+@pytest.mark.parametrize("lengths", [None, SMALL_CHUNKS], ids=["unchunked", "chunked"])
+def test_phrase_count_matches_the_phrases_read(text, lengths):
+    chunker = PhraseChunker(lengths) if lengths is not None else None
+
+    assert count_phrases(text, chunker) == len(list(iterate_sentences(text, chunker=chunker)))
+
+
+def test_phrases_are_found_one_at_a_time():
+    phrases = split_phrases(LONG_DOCUMENT)
+
+    first_phrase = next(phrases)
+
+    assert first_phrase.start == 0
+    assert LONG_DOCUMENT[first_phrase.start:first_phrase.end].startswith("Sentence 0 of paragraph 0")
+    assert len(list(phrases)) == 11
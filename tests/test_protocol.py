@@ -0,0 +1,149 @@
+"""
+Tests for the binary protocol spoken between the server and remote synthesis workers
+"""
+from __future__ import annotations
+
+import asyncio
+
+import numpy
+import pytest
+
+from easy_narrator.narrate import Waveform
+from easy_narrator.narrate.audio import PCM_DTYPE
+from easy_narrator.narrate.protocol import FRAME_HEADER
+from easy_narrator.narrate.protocol import MAX_FRAME_SIZE
+from easy_narrator.narrate.protocol import MessageType
+from easy_narrator.narrate.protocol import decode_json
+from easy_narrator.narrate.protocol import decode_result
+from easy_narrator.narrate.protocol import encode_json
+from easy_narrator.narrate.protocol import encode_result
+from easy_narrator.narrate.protocol import open_connection
+from easy_narrator.narrate.protocol import parse_address
+from easy_narrator.narrate.protocol import read_frame
+from easy_narrator.narrate.protocol import start_server
+from easy_narrator.narrate.protocol import write_frame
+
+
+class BufferWriter:
+    """
+    Collects everything written to it in place of a connection
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data: bytes):
+        self.buffer.extend(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    async def drain(self):
+        pass
+
+
+def read_frames(data: bytes, count: int = 1):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [await read_frame(reader) for _ in range(count)]
+
+    return asyncio.run(read())
+
+
+def write_frames(*frames) -> bytes:
+    writer = BufferWriter()
+
+    async def write():
+        for message_type, *parts in frames:
+            await write_frame(writer, message_type, *parts)
+
+    asyncio.run(write())
+    return bytes(writer.buffer)
+
+
+def test_frames_are_read_as_they_were_written():
+    data = write_frames(
+        (MessageType.HEALTH,),
+        (MessageType.SYNTHESIZE, encode_json({"content": "Hello"}), b"", b"!"),
+    )
+
+    (health_type, health_payload), (synthesize_type, synthesize_payload) = read_frames(data, count=2)
+
+    assert (health_type, health_payload) == (MessageType.HEALTH, b"")
+    assert synthesize_type == MessageType.SYNTHESIZE
+    assert synthesize_payload == encode_json({"content": "Hello"}) + b"!"
+    assert decode_json(synthesize_payload[:-1]) == {"content": "Hello"}
+
+
+def test_oversized_frames_are_refused():
+    with pytest.raises(ValueError):
+        read_frames(FRAME_HEADER.pack(MAX_FRAME_SIZE + 1, MessageType.RESULT))
+
+
+def test_unknown_message_types_are_refused():
+    with pytest.raises(ValueError):
+        read_frames(FRAME_HEADER.pack(0, max(MessageType) + 1))
+
+
+def test_truncated_frames_are_incomplete():
+    data = write_frames((MessageType.RESULT, b"audio"))
+
+    with pytest.raises(asyncio.IncompleteReadError):
+        read_frames(data[:-1])
+
+
+def test_results_keep_their_audio_and_measurements():
+    sound = Waveform(samples=numpy.arange(-50, 50, dtype=PCM_DTYPE), sample_rate=16000)
+    measurements = [("tts_models/en/ljspeech/vits", 42, 0.5)]
+
+    (_, payload), = read_frames(write_frames((MessageType.RESULT, *encode_result(sound, measurements))))
+    decoded_sound, decoded_measurements = decode_result(payload)
+
+    assert decoded_sound.sample_rate == sound.sample_rate
+    assert decoded_sound.samples.tolist() == sound.samples.tolist()
+    assert decoded_measurements == [tuple(measurement) for measurement in measurements]
+
+
+@pytest.mark.parametrize(
+    "address, expected",
+    [
+        ("tcp://127.0.0.1:9000", ("tcp", ("127.0.0.1", 9000))),
+        ("localhost:9000", ("tcp", ("localhost", 9000))),
+        (":9000", ("tcp", ("127.0.0.1", 9000))),
+        ("unix:///tmp/narrator.sock", ("unix", "/tmp/narrator.sock")),
+    ]
+)
+def test_addresses_are_parsed(address, expected):
+    assert parse_address(address) == expected
+
+
+@pytest.mark.parametrize("address", ["localhost", "localhost:port", ""])
+def test_invalid_addresses_are_refused(address):
+    with pytest.raises(ValueError):
+        parse_address(address)
+
+
+def test_frames_cross_a_real_connection():
+    async def echo(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        message_type, payload = await read_frame(reader)
+        await write_frame(writer, message_type, payload)
+        writer.close()
+
+    async def converse():
+        server = await start_server("127.0.0.1:0", echo)
+
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await open_connection(f"tcp://127.0.0.1:{port}")
+            await write_frame(writer, MessageType.STATUS, encode_json({"busy": 0}))
+            response = await read_frame(reader)
+            writer.close()
+            await writer.wait_closed()
+            return response
+
+    message_type, payload = asyncio.run(converse())
+
+    assert message_type == MessageType.STATUS
+    assert decode_json(payload) == {"busy": 0}
@@ -0,0 +1,107 @@
+"""
+Tests for the sets of names that request fields are validated against
+"""
+from __future__ import annotations
+
+import json
+import os
+
+from pathlib import Path
+
+import pydantic
+import pytest
+
+from easy_narrator.models.registry import NameRegistry
+from easy_narrator.models.registry import VCTK_SPEAKERS
+from easy_narrator.models.registry import VCTKSpeaker
+
+
+class CountingLoader:
+    """
+    Reads names from a JSON file, counting how often it was asked to
+    """
+    def __init__(self, source: Path):
+        self.source = source
+        self.loads = 0
+
+    def __call__(self):
+        self.loads += 1
+        return json.loads(self.source.read_text())
+
+
+def write(path: Path, names):
+    """
+    Write names to a file, making sure that it looks modified even on coarse filesystem clocks
+    """
+    modification_time = path.stat().st_mtime_ns + 1_000_000_000 if path.exists() else None
+    path.write_text(json.dumps(names))
+
+    if modification_time is not None:
+        os.utime(path, ns=(modification_time, modification_time))
+
+
+@pytest.fixture
+def source(tmp_path) -> Path:
+    path = tmp_path / "names.json"
+    write(path, ["first", "second"])
+    return path
+
+
+def test_names_are_loaded_once_when_first_needed(source):
+    loader = CountingLoader(source)
+    registry = NameRegistry("name", loader)
+
+    assert loader.loads == 0
+
+    for _ in range(3):
+        assert "first" in registry
+
+    assert len(registry) == 2
+    assert loader.loads == 1
+
+
+def test_unknown_names_are_refused(source):
+    registry = NameRegistry("test name", CountingLoader(source))
+
+    assert registry.validate("second") == "second"
+    assert registry.validate(None) is None
+
+    with pytest.raises(ValueError, match="'third' is not a known test name"):
+        registry.validate("third")
+
+
+def test_names_are_loaded_again_when_their_source_changes(source):
+    loader = CountingLoader(source)
+    registry = NameRegistry("name", loader, source=source, refresh_interval=0)
+
+    assert "third" not in registry
+    assert "first" in registry
+    assert loader.loads == 1
+
+    write(source, ["first", "second", "third"])
+
+    assert "third" in registry
+    assert loader.loads == 2
+
+
+def test_the_source_is_not_checked_again_until_the_refresh_interval_passes(source):
+    registry = NameRegistry("name", CountingLoader(source), source=source, refresh_interval=3600)
+    assert "third" not in registry
+
+    write(source, ["third"])
+
+    assert "third" not in registry
+
+    registry.reload()
+
+    assert "third" in registry
+
+
+def test_fields_are_validated_against_their_registry():
+    speaker_type = pydantic.TypeAdapter(VCTKSpeaker)
+    speaker = next(iter(VCTK_SPEAKERS.names))
+
+    assert speaker_type.validate_python(speaker) == speaker
+
+    with pytest.raises(pydantic.ValidationError):
+        speaker_type.validate_python("not a speaker")
@@ -0,0 +1,63 @@
+"""
+Tests for decoding the requests that clients send over the websocket
+"""
+from __future__ import annotations
+
+import json
+
+import pydantic
+import pytest
+
+from easy_narrator.messages.requests import CancelRequest
+from easy_narrator.messages.requests import FileSelectionRequest
+from easy_narrator.messages.requests import KillRequest
+from easy_narrator.messages.requests import ReadRequest
+from easy_narrator.messages.requests import decode_request
+from easy_narrator.messages.requests.base import NarratorDataRequest
+
+MESSAGES = [
+    ({"operation": "load", "message_id": "load", "path": "/tmp/document.txt"}, FileSelectionRequest),
+    ({"operation": "read", "message_id": "read", "text": "Hello there.", "priority": "bulk"}, ReadRequest),
+    ({"operation": "kill", "message_id": "kill"}, KillRequest),
+    ({"operation": "cancel", "message_id": "cancel", "target_message_id": "read"}, CancelRequest),
+]
+
+
+@pytest.mark.parametrize(
+    "form",
+    [json.dumps, lambda message: json.dumps(message).encode(), dict],
+    ids=["text", "bytes", "data"]
+)
+@pytest.mark.parametrize("message, request_type", MESSAGES, ids=[message["operation"] for message, _ in MESSAGES])
+def test_each_operation_decodes_to_its_request(form, message, request_type):
+    request = decode_request(form(message))
+
+    assert type(request) is request_type
+    assert request.message_id == message["message_id"]
+
+
+def test_read_requests_fall_back_to_the_default_configuration():
+    request = decode_request({"operation": "read", "text": "Hello there."})
+
+    assert request.configuration.name == ReadRequest(operation="read", text="").configuration.name
+    assert request.priority is None
+
+
+def test_invalid_requests_are_only_checked_against_the_type_for_their_operation():
+    with pytest.raises(pydantic.ValidationError) as error:
+        decode_request({"operation": "cancel", "message_id": "cancel"})
+
+    assert [issue["loc"] for issue in error.value.errors()] == [("CancelRequest", "target_message_id")]
+
+
+def test_other_operations_are_decoded_as_data_requests():
+    request = decode_request({"operation": "describe", "data_id": "document"})
+
+    assert type(request) is NarratorDataRequest
+    assert request.operation == "describe"
+
+
+@pytest.mark.parametrize("message", ["not json", "[1, 2]", json.dumps({"operation": "describe"})])
+def test_malformed_messages_are_refused(message):
+    with pytest.raises(pydantic.ValidationError):
+        decode_request(message)
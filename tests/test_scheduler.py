@@ -0,0 +1,184 @@
+"""
+Tests for sharing synthesis fairly between connections
+"""
+from __future__ import annotations
+
+import asyncio
+import typing
+
+from collections import deque
+
+import numpy
+
+from easy_narrator.narrate import SchedulingPriority
+from easy_narrator.narrate import SynthesisScheduler
+from easy_narrator.narrate import Waveform
+from easy_narrator.models.narration_config import NarrationConfig
+
+INTERACTIVE = SchedulingPriority.INTERACTIVE
+BULK = SchedulingPriority.BULK
+
+OTHER_MODEL = NarrationConfig.model_construct(name="tts_models/en/other/vits", speed=1.0)
+"""A configuration for a second model, built without checking that the model exists"""
+
+
+class FakeDispatcher:
+    """
+    Stands in for the PhraseDispatcher, holding every phrase until the test lets it finish
+    """
+    def __init__(self):
+        self.started: typing.List[str] = []
+        """The text of each phrase in the order that the scheduler released them"""
+        self.running = 0
+        self.most_running = 0
+        self.__releases: typing.Deque[asyncio.Event] = deque()
+
+    async def synthesize(self, model_configuration: NarrationConfig, content: str) -> Waveform:
+        self.started.append(content)
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+
+        release = asyncio.Event()
+        self.__releases.append(release)
+
+        try:
+            await release.wait()
+        finally:
+            self.running -= 1
+
+        return Waveform.from_float(numpy.ones(len(content)), sample_rate=22050)
+
+    def finish_oldest(self) -> bool:
+        """
+        Let the phrase that has been running longest finish
+
+        :return: Whether there was anything to finish
+        """
+        if not self.__releases:
+            return False
+
+        self.__releases.popleft().set()
+        return True
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class SchedulingTest:
+    """
+    Queues phrases on a scheduler and finishes them one at a time, oldest first
+    """
+    def __init__(self, interactive_weight: int = 2, max_inferences_per_model: int = 1):
+        self.dispatcher = FakeDispatcher()
+        self.scheduler = SynthesisScheduler(
+            interactive_weight=interactive_weight,
+            max_inferences_per_model=max_inferences_per_model,
+            dispatcher=self.dispatcher
+        )
+        self.requests: typing.List[asyncio.Future] = []
+
+    def request(
+        self,
+        connection_id: str,
+        content: str,
+        priority: SchedulingPriority = INTERACTIVE,
+        model_configuration: NarrationConfig = None
+    ) -> asyncio.Future:
+        request = asyncio.ensure_future(
+            self.scheduler.synthesize(model_configuration or NarrationConfig(), content, connection_id, priority)
+        )
+        self.requests.append(request)
+        return request
+
+    async def finish(self):
+        await settle()
+
+        while self.dispatcher.finish_oldest():
+            await settle()
+
+        await asyncio.gather(*self.requests, return_exceptions=True)
+
+
+def run(scenario: typing.Callable[[SchedulingTest], typing.Awaitable[None]], **kwargs) -> SchedulingTest:
+    async def run_scenario():
+        test = SchedulingTest(**kwargs)
+        await scenario(test)
+        await test.finish()
+        return test
+
+    return asyncio.run(run_scenario())
+
+
+def test_connections_take_turns():
+    async def scenario(test: SchedulingTest):
+        test.request("blocker", "blocker")
+
+        for content in ("first 1", "first 2", "first 3"):
+            test.request("first", content)
+
+        for content in ("second 1", "second 2"):
+            test.request("second", content)
+
+    test = run(scenario)
+
+    assert test.dispatcher.started == ["blocker", "first 1", "second 1", "first 2", "second 2", "first 3"]
+
+
+def test_interactive_phrases_go_first_without_starving_bulk_phrases():
+    async def scenario(test: SchedulingTest):
+        test.request("blocker", "blocker", BULK)
+
+        for content in ("bulk 1", "bulk 2"):
+            test.request("bulk", content, BULK)
+
+        for content in ("interactive 1", "interactive 2", "interactive 3", "interactive 4"):
+            test.request("interactive", content, INTERACTIVE)
+
+    test = run(scenario, interactive_weight=2)
+
+    assert test.dispatcher.started == [
+        "blocker",
+        "interactive 1", "interactive 2", "bulk 1",
+        "interactive 3", "interactive 4", "bulk 2",
+    ]
+
+
+def test_each_model_works_on_no_more_than_its_limit():
+    async def scenario(test: SchedulingTest):
+        for index in range(6):
+            test.request(f"connection {index % 3}", f"phrase {index}")
+
+        await settle()
+        assert test.dispatcher.running == 2
+
+    test = run(scenario, max_inferences_per_model=2)
+
+    assert test.dispatcher.most_running == 2
+    assert len(test.dispatcher.started) == 6
+
+
+def test_models_are_limited_separately():
+    async def scenario(test: SchedulingTest):
+        test.request("first", "first model", model_configuration=NarrationConfig())
+        test.request("second", "second model", model_configuration=OTHER_MODEL)
+
+        await settle()
+        assert test.dispatcher.running == 2
+
+    run(scenario, max_inferences_per_model=1)
+
+
+def test_cancelled_phrases_never_reach_a_model():
+    async def scenario(test: SchedulingTest):
+        test.request("blocker", "blocker")
+        abandoned_request = test.request("impatient", "abandoned")
+        await settle()
+
+        abandoned_request.cancel()
+
+    test = run(scenario)
+
+    assert test.dispatcher.started == ["blocker"]
+    assert test.scheduler.get_queue_depths() == {}
@@ -0,0 +1,119 @@
+"""
+Tests for reusing a connection's previous narration when edited text is read again
+"""
+from __future__ import annotations
+
+import asyncio
+
+import numpy
+
+from easy_narrator.narrate import NarrationSession
+from easy_narrator.narrate import Waveform
+from easy_narrator.narrate import stream_sound
+from easy_narrator.narrate.chunking import ChunkLengths
+from easy_narrator.narrate.chunking import PhraseChunker
+
+PARAGRAPHS = [f"Paragraph number {index} says something worth hearing." for index in range(4)]
+
+UNCHANGED_LENGTHS = ChunkLengths(target=1000, minimum=0, maximum=1000, first=1000)
+
+
+def create_audio(value: int) -> Waveform:
+    return Waveform(samples=numpy.full(10, value, dtype=numpy.int16), sample_rate=22050)
+
+
+def narrate(paragraphs, configuration, session: NarrationSession, phrase_limit: int = None) -> int:
+    """
+    Read paragraphs aloud, stopping early if given a limit
+
+    :return: The number of phrases that were read
+    """
+    async def read() -> int:
+        sounds = stream_sound(
+            "\n\n".join(paragraphs),
+            configuration,
+            session=session,
+            chunker=PhraseChunker(UNCHANGED_LENGTHS)
+        )
+        phrase_count = 0
+
+        async for _ in sounds:
+            phrase_count += 1
+
+            if phrase_count == phrase_limit:
+                await sounds.aclose()
+                break
+
+        return phrase_count
+
+    return asyncio.run(read())
+
+
+def test_phrases_from_the_previous_narration_are_recalled():
+    session = NarrationSession()
+    session.record({"first": create_audio(1), "second": create_audio(2)}, reused=0, synthesized=2)
+
+    assert session.recall("first").samples[0] == 1
+    assert session.recall("third") is None
+    assert len(session) == 2
+
+
+def test_only_the_latest_complete_narration_is_kept():
+    session = NarrationSession()
+    session.record({"first": create_audio(1)}, reused=0, synthesized=1)
+    session.record({"second": create_audio(2)}, reused=0, synthesized=1)
+
+    assert "first" not in session
+    assert "second" in session
+
+
+def test_an_interrupted_narration_keeps_the_rest_of_the_one_before_it():
+    session = NarrationSession()
+    session.record({"first": create_audio(1), "second": create_audio(2)}, reused=0, synthesized=2)
+    session.record({"first": create_audio(1)}, reused=1, synthesized=0, complete=False)
+
+    assert "second" in session
+
+    session.record({"third": create_audio(3)}, reused=0, synthesized=1, complete=False)
+
+    assert "first" in session
+    assert "second" not in session
+    assert "third" in session
+
+
+def test_only_edited_phrases_are_synthesized_again(scheduler, phrase_cache, configuration):
+    session = NarrationSession()
+    narrate(PARAGRAPHS, configuration, session)
+    phrase_cache.clear()
+    scheduler.phrases.clear()
+
+    edited_paragraphs = [*PARAGRAPHS[:2], "This paragraph is new.", *PARAGRAPHS[2:]]
+    narrate(edited_paragraphs, configuration, session)
+
+    assert scheduler.phrases == ["This paragraph is new."]
+    assert session.statistics.narrations == 2
+    assert session.statistics.reused_phrases == len(PARAGRAPHS)
+    assert session.statistics.synthesized_phrases == len(PARAGRAPHS) + 1
+
+
+def test_phrases_found_in_the_cache_are_counted_separately(scheduler, configuration):
+    narrate(PARAGRAPHS, configuration, NarrationSession())
+
+    session = NarrationSession()
+    narrate(PARAGRAPHS, configuration, session)
+
+    assert session.statistics.cached_phrases == len(PARAGRAPHS)
+    assert session.statistics.synthesized_phrases == 0
+
+
+def test_an_interrupted_read_does_not_lose_the_previous_narration(scheduler, phrase_cache, configuration):
+    session = NarrationSession()
+    narrate(PARAGRAPHS, configuration, session)
+
+    assert narrate(PARAGRAPHS, configuration, session, phrase_limit=1) == 1
+
+    phrase_cache.clear()
+    scheduler.phrases.clear()
+    narrate(PARAGRAPHS, configuration, session)
+
+    assert scheduler.phrases == []
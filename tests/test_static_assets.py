@@ -0,0 +1,157 @@
+"""
+Tests for holding static files in memory along with compressed copies of them
+"""
+from __future__ import annotations
+
+import gzip
+import os
+
+from pathlib import Path
+
+import pytest
+
+from aiohttp import hdrs
+from aiohttp.test_utils import make_mocked_request
+
+from easy_narrator.handlers.resources import get_static_asset_response
+from easy_narrator.utilities.static_assets import COMPRESSION_MINIMUM_SIZE
+from easy_narrator.utilities.static_assets import StaticAssetCache
+from easy_narrator.utilities.static_assets import get_supported_encodings
+from easy_narrator.utilities.static_assets import parse_accepted_encodings
+
+SCRIPT = b"console.log('Hello there');\n" * (COMPRESSION_MINIMUM_SIZE // 10)
+
+
+def write(path: Path, content: bytes) -> Path:
+    """
+    Write a file, making sure that it looks modified even on coarse filesystem clocks
+    """
+    modification_time = path.stat().st_mtime_ns + 1_000_000_000 if path.exists() else None
+    path.write_bytes(content)
+
+    if modification_time is not None:
+        os.utime(path, ns=(modification_time, modification_time))
+
+    return path
+
+
+@pytest.fixture
+def asset_cache(monkeypatch) -> StaticAssetCache:
+    cache = StaticAssetCache(max_cached_size=COMPRESSION_MINIMUM_SIZE * 10)
+    monkeypatch.setattr(StaticAssetCache, "_StaticAssetCache__instance", cache)
+    return cache
+
+
+def test_refused_encodings_are_not_accepted():
+    assert parse_accepted_encodings("gzip, deflate;q=0.5, br;q=0") == {"gzip", "deflate"}
+    assert parse_accepted_encodings(None) == set()
+
+
+def test_files_are_compressed_once_and_served_from_memory(tmp_path, asset_cache):
+    path = write(tmp_path / "script.js", SCRIPT)
+    asset = asset_cache.load(path)
+
+    assert asset.in_memory
+    assert list(asset.encodings) == list(get_supported_encodings())
+    assert gzip.decompress(asset.encodings["gzip"]) == SCRIPT
+
+    for _ in range(3):
+        assert asset_cache.get_current(path)[0] is asset
+
+    assert asset_cache.statistics.hits == 3
+
+
+def test_the_smallest_accepted_copy_is_chosen(tmp_path, asset_cache):
+    asset = asset_cache.load(write(tmp_path / "script.js", SCRIPT))
+
+    assert asset.select_encoding("gzip") == ("gzip", asset.encodings["gzip"])
+    assert asset.select_encoding("gzip;q=0") == (None, SCRIPT)
+    assert asset.select_encoding(None) == (None, SCRIPT)
+
+    if "br" in get_supported_encodings():
+        assert asset.select_encoding("gzip, br")[0] == "br"
+
+
+def test_small_and_incompressible_files_are_sent_as_they_are(tmp_path, asset_cache):
+    assert asset_cache.load(write(tmp_path / "small.js", b"console.log('Hi');")).encodings == {}
+    assert asset_cache.load(write(tmp_path / "image.png", SCRIPT)).encodings == {}
+
+
+def test_changed_files_are_read_again(tmp_path, asset_cache):
+    path = write(tmp_path / "script.js", SCRIPT)
+    original = asset_cache.load(path)
+
+    write(path, SCRIPT + b"console.log('Goodbye');\n")
+
+    assert asset_cache.get_current(path)[0] is None
+    assert asset_cache.statistics.misses == 1
+
+    changed = asset_cache.load(path)
+
+    assert changed.etag != original.etag
+    assert asset_cache.get_current(path)[0] is changed
+
+
+def test_removed_files_are_dropped(tmp_path, asset_cache):
+    path = write(tmp_path / "script.js", SCRIPT)
+    asset_cache.load(path)
+    path.unlink()
+
+    assert asset_cache.get_current(path) == (None, None)
+    assert len(asset_cache) == 0
+
+
+def test_large_files_are_not_held_in_memory(tmp_path, asset_cache):
+    asset = asset_cache.load(write(tmp_path / "large.js", SCRIPT * 20))
+
+    assert not asset.in_memory
+    assert asset_cache.memory_size == 0
+
+
+def test_warming_loads_every_file_once(tmp_path, asset_cache):
+    write(tmp_path / "script.js", SCRIPT)
+    (tmp_path / "styles").mkdir()
+    write(tmp_path / "styles" / "page.css", b"body { margin: 0; }")
+
+    assert asset_cache.warm(tmp_path) == 2
+    assert asset_cache.warm(tmp_path) == 0
+    assert len(asset_cache) == 2
+
+
+def test_clients_with_the_current_version_are_not_sent_it_again(tmp_path, asset_cache):
+    asset = asset_cache.load(write(tmp_path / "script.js", SCRIPT))
+
+    matching = make_mocked_request("GET", "/script.js", headers={hdrs.IF_NONE_MATCH: f"W/{asset.etag}"})
+    outdated = make_mocked_request("GET", "/script.js", headers={hdrs.IF_NONE_MATCH: '"outdated"'})
+
+    assert get_static_asset_response(matching, asset).status == 304
+    assert get_static_asset_response(outdated, asset).status == 200
+    assert asset_cache.statistics.not_modified == 1
+
+
+def test_modification_dates_are_only_checked_without_an_etag(tmp_path, asset_cache):
+    asset = asset_cache.load(write(tmp_path / "script.js", SCRIPT))
+    last_modified = asset.last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+    unmodified = make_mocked_request("GET", "/script.js", headers={hdrs.IF_MODIFIED_SINCE: last_modified})
+    mismatched = make_mocked_request(
+        "GET",
+        "/script.js",
+        headers={hdrs.IF_MODIFIED_SINCE: last_modified, hdrs.IF_NONE_MATCH: '"outdated"'}
+    )
+
+    assert get_static_asset_response(unmodified, asset).status == 304
+    assert get_static_asset_response(mismatched, asset).status == 200
+
+
+def test_compressed_responses_name_their_encoding(tmp_path, asset_cache):
+    asset = asset_cache.load(write(tmp_path / "script.js", SCRIPT))
+
+    response = get_static_asset_response(
+        make_mocked_request("GET", "/script.js", headers={hdrs.ACCEPT_ENCODING: "gzip"}),
+        asset
+    )
+
+    assert response.headers[hdrs.CONTENT_ENCODING] == "gzip"
+    assert response.headers[hdrs.VARY] == hdrs.ACCEPT_ENCODING
+    assert gzip.decompress(response.body) == SCRIPT
@@ -0,0 +1,170 @@
+"""
+Tests for narrating and cancelling narrations over the websocket
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import typing
+
+from aiohttp import WSMsgType
+from aiohttp import web
+from aiohttp.test_utils import TestClient
+from aiohttp.test_utils import TestServer
+
+from easy_narrator.handlers.websocket import socket_handler
+from easy_narrator.narrate import get_supported_formats
+
+TEXT = "\n\n".join(
+    f"Paragraph number {index} goes on for long enough that it is spoken as a phrase of its own." for index in range(8)
+)
+
+TIMEOUT = 5
+
+
+class NarrationClient:
+    """
+    Reads everything a narration sends over a socket, keeping audio apart from every other message
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.audio_count = 0
+        self.messages: typing.List[typing.Dict[str, typing.Any]] = []
+
+    async def send(self, **message):
+        await self.connection.send_json(message)
+
+    async def receive(self) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """
+        Read the next frame, counting it if it is audio
+
+        :return: The message if the frame was not audio
+        """
+        frame = await asyncio.wait_for(self.connection.receive(), timeout=TIMEOUT)
+
+        if frame.type == WSMsgType.BINARY:
+            self.audio_count += 1
+            return None
+
+        message = json.loads(frame.data)
+        self.messages.append(message)
+        return message
+
+    async def receive_audio(self, count: int):
+        while self.audio_count < count:
+            await self.receive()
+
+    async def receive_operation(self, operation: str, message_id: str) -> typing.Dict[str, typing.Any]:
+        for message in self.messages:
+            if message["operation"] == operation and message.get("message_id") == message_id:
+                return message
+
+        while True:
+            message = await self.receive()
+
+            if message is not None and message["operation"] == operation and message.get("message_id") == message_id:
+                return message
+
+
+def converse(
+    conversation: typing.Callable[[NarrationClient], typing.Awaitable[typing.Any]],
+    query: typing.Mapping[str, str] = None
+) -> typing.Any:
+    """
+    Connect to a narrator's websocket and hold a conversation with it
+
+    :param conversation: What to say to the narrator once connected
+    :param query: The parameters that the connection is opened with
+    """
+    async def connect():
+        application = web.Application()
+        application.router.add_get("/ws", socket_handler)
+
+        async with TestClient(TestServer(application)) as client:
+            connection = await client.ws_connect("/ws", params=query)
+            narration_client = NarrationClient(connection)
+            assert (await narration_client.receive())["operation"] == "connection_opened"
+
+            try:
+                return await conversation(narration_client)
+            finally:
+                await connection.close()
+
+    return asyncio.run(connect())
+
+
+def test_narration_sends_every_phrase(scheduler):
+    async def conversation(client: NarrationClient):
+        await client.send(operation="read", message_id="read", text=TEXT)
+        return await client.receive_operation("transfer_complete", "read")
+
+    completion = converse(conversation)
+
+    assert completion["item_count"] == len(scheduler.phrases)
+
+
+def test_audio_format_is_chosen_when_connecting(scheduler):
+    async def conversation(client: NarrationClient):
+        return client.messages[0]
+
+    # Without libsndfile support for FLAC, the connection falls back to wav like any other unsupported format
+    expected_format = "flac" if "flac" in get_supported_formats() else "wav"
+
+    assert converse(conversation, query={"audio_format": "flac"})["audio_format"] == expected_format
+    assert converse(conversation, query={"audio_format": "mp3"})["audio_format"] == "wav"
+
+
+def test_cancel_is_acknowledged_and_stops_at_a_phrase_boundary(scheduler):
+    spoken_count = 2
+
+    async def conversation(client: NarrationClient):
+        scheduler.permits = asyncio.Semaphore(spoken_count)
+
+        await client.send(operation="read", message_id="read", text=TEXT)
+        await client.receive_audio(spoken_count)
+        await client.send(operation="cancel", message_id="cancel", target_message_id="read")
+
+        acknowledgement = await client.receive_operation("acknowledgement", "cancel")
+        cancellation = await client.receive_operation("cancelled", "read")
+
+        # Nothing else should arrive for the cancelled narration, so a second cancellation finds nothing to stop
+        await client.send(operation="cancel", message_id="late cancel", target_message_id="read")
+        error = await client.receive_operation("error", "late cancel")
+        return acknowledgement, cancellation, error, client.audio_count
+
+    acknowledgement, cancellation, error, audio_count = converse(conversation)
+
+    assert acknowledgement["operation"] == "acknowledgement"
+    assert cancellation["item_count"] == spoken_count
+    assert audio_count == spoken_count
+    assert "not being processed" in error["error_message"]
+
+
+def test_queued_narration_may_be_cancelled_before_it_starts(scheduler):
+    skipped_text = "This is never read."
+
+    async def conversation(client: NarrationClient):
+        permits = asyncio.Semaphore(0)
+        scheduler.permits = permits
+
+        await client.send(operation="read", message_id="first", text=TEXT)
+        await client.send(operation="read", message_id="second", text=skipped_text)
+        await client.send(operation="cancel", message_id="cancel", target_message_id="second")
+        acknowledgement = await client.receive_operation("acknowledgement", "cancel")
+
+        # Let the first narration finish so that the second one gets its turn
+        scheduler.permits = None
+
+        for _ in scheduler.phrases:
+            permits.release()
+
+        completion = await client.receive_operation("transfer_complete", "first")
+        cancellation = await client.receive_operation("cancelled", "second")
+        return acknowledgement, completion, cancellation, client.audio_count
+
+    acknowledgement, completion, cancellation, audio_count = converse(conversation)
+
+    assert acknowledgement["operation"] == "acknowledgement"
+    assert completion["item_count"] == audio_count
+    assert cancellation["item_count"] == 0
+    assert skipped_text not in scheduler.phrases
@@ -0,0 +1,113 @@
+"""
+Tests for how a remote synthesis worker answers the servers that connect to it
+"""
+from __future__ import annotations
+
+import asyncio
+import typing
+
+import numpy
+import pytest
+
+from easy_narrator.narrate import Waveform
+from easy_narrator.narrate.audio import PCM_DTYPE
+from easy_narrator.narrate.protocol import FRAME_HEADER
+from easy_narrator.narrate.protocol import MAX_FRAME_SIZE
+from easy_narrator.narrate.protocol import MessageType
+from easy_narrator.narrate.protocol import decode_json
+from easy_narrator.narrate.protocol import decode_result
+from easy_narrator.narrate.protocol import encode_json
+from easy_narrator.narrate.protocol import open_connection
+from easy_narrator.narrate.protocol import read_frame
+from easy_narrator.narrate.protocol import start_server
+from easy_narrator.narrate.protocol import write_frame
+from easy_narrator.worker import SynthesisWorker
+
+
+class FakeExecutor:
+    """
+    Stands in for the SynthesisExecutor, speaking each phrase as one sample per character
+    """
+    worker_count = 2
+
+    def __init__(self):
+        self.phrases: typing.List[str] = []
+
+    async def synthesize(self, model_configuration, content: str) -> Waveform:
+        self.phrases.append(content)
+        return Waveform(samples=numpy.ones(len(content), dtype=PCM_DTYPE), sample_rate=16000)
+
+
+def converse(conversation: typing.Callable[[asyncio.StreamReader, asyncio.StreamWriter], typing.Awaitable]):
+    """
+    Start a worker and hold a conversation with it over a local connection
+    """
+    worker = SynthesisWorker(FakeExecutor())
+
+    async def connect():
+        server = await start_server("127.0.0.1:0", worker.handle_connection)
+
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await open_connection(f"127.0.0.1:{port}")
+
+            try:
+                return await asyncio.wait_for(conversation(reader, writer), timeout=5)
+            finally:
+                writer.close()
+
+    return asyncio.run(connect())
+
+
+def test_worker_reports_its_status():
+    async def conversation(reader, writer):
+        await write_frame(writer, MessageType.HEALTH)
+        return await read_frame(reader)
+
+    message_type, payload = converse(conversation)
+
+    assert message_type == MessageType.STATUS
+    assert decode_json(payload)["capacity"] == FakeExecutor.worker_count
+
+
+def test_worker_speaks_phrases():
+    # Model names are validated against the models that TTS knows about
+    pytest.importorskip("TTS")
+    content = "Hello there."
+
+    async def conversation(reader, writer):
+        request = {"configuration": {"name": "tts_models/en/ljspeech/tacotron2-DDC_ph"}, "content": content}
+        await write_frame(writer, MessageType.SYNTHESIZE, encode_json(request))
+        return await read_frame(reader)
+
+    message_type, payload = converse(conversation)
+
+    assert message_type == MessageType.RESULT
+    assert decode_result(payload)[0].samples.shape[0] == len(content)
+
+
+def test_worker_explains_why_it_could_not_speak_and_keeps_listening():
+    async def conversation(reader, writer):
+        await write_frame(writer, MessageType.SYNTHESIZE, encode_json({"content": "No configuration"}))
+        error = await read_frame(reader)
+        await write_frame(writer, MessageType.HEALTH)
+        return error, await read_frame(reader)
+
+    (error_type, _), (status_type, _) = converse(conversation)
+
+    assert error_type == MessageType.ERROR
+    assert status_type == MessageType.STATUS
+
+
+def test_worker_closes_the_connection_after_a_malformed_frame():
+    async def conversation(reader, writer):
+        writer.write(FRAME_HEADER.pack(MAX_FRAME_SIZE + 1, MessageType.SYNTHESIZE))
+        await writer.drain()
+        error = await read_frame(reader)
+        return error, await reader.read()
+
+    (message_type, payload), remainder = converse(conversation)
+
+    assert message_type == MessageType.ERROR
+    assert "Refusing" in decode_json(payload)["message"]
+    assert remainder == b""